@@ -0,0 +1,392 @@
+"""
+asyncio implementation of the Gateway.
+
+Serves the same price/news ports and wire formats as ``GatewayServer`` from a
+single event loop. Every tick is handed to each subscriber's bounded write
+queue instead of being written inline, so a slow subscriber can only hurt
+itself: when its queue is full the oldest queued message is conflated away
+(``"conflate"``, the default — each price message is a full snapshot, so only
+the newest matters) or the new one is dropped (``"drop"``). A subscriber that
+overflows ``evict_after`` ticks in a row is disconnected. Drops,
+conflations and evictions are counted in the Gateway's ``ProcessMetrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from config import (
+    ASYNC_CLIENT_QUEUE_SIZE,
+    HOST,
+    MESSAGE_DELIMITER,
+    NEWS_FEED_PORT,
+    PRICE_FEED_PORT,
+    PROTOCOL_HANDSHAKE_TIMEOUT,
+    SLOW_CLIENT_EVICT_AFTER,
+    SLOW_CLIENT_POLICY,
+    TICK_INTERVAL_SECONDS,
+)
+from gateway import RandomWalkSource, gateway_metrics
+from metrics import ProcessMetrics
+from protocol import (
+    BINARY_HELLO,
+    PRICE_PROTOCOL_BINARY,
+    PRICE_PROTOCOL_TEXT,
+    PriceFrameEncoder,
+    TextPriceFormatter,
+    encode_symbol_frame,
+)
+
+
+class Subscriber:
+    """One connected client: a bounded queue drained by its own writer task."""
+
+    __slots__ = (
+        "writer",
+        "protocol",
+        "queue",
+        "policy",
+        "evict_after",
+        "sent",
+        "dropped",
+        "conflated",
+        "overflow_streak",
+        "evicted",
+        "task",
+        "preamble",
+        "metrics",
+    )
+
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        protocol: str = PRICE_PROTOCOL_TEXT,
+        queue_size: int = ASYNC_CLIENT_QUEUE_SIZE,
+        policy: str = SLOW_CLIENT_POLICY,
+        evict_after: int = SLOW_CLIENT_EVICT_AFTER,
+        metrics: Optional[ProcessMetrics] = None,
+    ) -> None:
+        self.writer = writer
+        self.protocol = protocol
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.policy = policy
+        self.evict_after = evict_after
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.overflow_streak = 0
+        self.evicted = False
+        self.task: Optional[asyncio.Task] = None
+        # Written ahead of the next queued message and never conflated away.
+        self.preamble = b""
+        self.metrics = metrics
+
+    def offer(self, data: bytes) -> bool:
+        """Queue ``data`` without waiting; returns False once the client is evicted."""
+        if self.evicted:
+            return False
+        queue = self.queue
+        if not queue.full():
+            self.overflow_streak = 0
+            queue.put_nowait(data)
+            return True
+        self.overflow_streak += 1
+        if self.overflow_streak >= self.evict_after:
+            self.evict()
+            self._count("clients_evicted_total")
+            return False
+        if self.policy == "conflate":
+            queue.get_nowait()
+            queue.put_nowait(data)
+            self.conflated += 1
+            self._count("price_conflated_total")
+        else:
+            self.dropped += 1
+            self._count("price_dropped_total")
+        return True
+
+    def _count(self, name: str) -> None:
+        # Only reached on overflow, so the name lookup stays off the fast path.
+        if self.metrics is not None:
+            self.metrics.counter(name).inc()
+
+    def announce(self, data: bytes) -> None:
+        """
+        Send ``data`` (a new symbol directory) before anything queued from now
+        on. Queued messages are dropped: they were encoded for the old
+        directory, and the next full snapshot supersedes them anyway.
+        """
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.preamble += data
+
+    def start(self) -> None:
+        self.task = asyncio.ensure_future(self._write_loop())
+
+    async def _write_loop(self) -> None:
+        queue = self.queue
+        writer = self.writer
+        try:
+            while True:
+                chunks = [await queue.get()]
+                # Coalesce whatever else is already queued into one write.
+                while not queue.empty():
+                    chunks.append(queue.get_nowait())
+                if self.preamble:
+                    chunks.insert(0, self.preamble)
+                    self.preamble = b""
+                writer.write(b"".join(chunks) if len(chunks) > 1 else chunks[0])
+                self.sent += len(chunks)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            self.evicted = True
+        except asyncio.CancelledError:
+            pass
+
+    def evict(self) -> None:
+        self.evicted = True
+        if self.task is not None:
+            self.task.cancel()
+        with contextlib.suppress(OSError, RuntimeError):
+            self.writer.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "conflated": self.conflated,
+        }
+
+
+class AsyncGatewayServer:
+    def __init__(
+        self,
+        host: str = HOST,
+        price_port: int = PRICE_FEED_PORT,
+        news_port: int = NEWS_FEED_PORT,
+        tick_interval: float = TICK_INTERVAL_SECONDS,
+        queue_size: int = ASYNC_CLIENT_QUEUE_SIZE,
+        policy: str = SLOW_CLIENT_POLICY,
+        evict_after: int = SLOW_CLIENT_EVICT_AFTER,
+        metrics: Optional[ProcessMetrics] = None,
+    ) -> None:
+        self.host = host
+        self.price_port = price_port
+        self.news_port = news_port
+        self.tick_interval = tick_interval
+        self.queue_size = queue_size
+        self.policy = policy
+        self.evict_after = evict_after
+        self.source = RandomWalkSource()
+        self.metrics = metrics or gateway_metrics()
+        self._ticks_total = self.metrics.counter("price_ticks_total")
+        self._updates_total = self.metrics.counter("price_updates_total")
+        self._news_total = self.metrics.counter("news_messages_total")
+        self._broadcast_ns = self.metrics.histogram("broadcast_prices")
+        self._text_formatter = TextPriceFormatter(self.source.symbols)
+        self._frame_encoder = PriceFrameEncoder(len(self.source.symbols))
+        self._price_clients: Set[Subscriber] = set()
+        self._news_clients: Set[Subscriber] = set()
+        self._universe_changes: Deque[Tuple[bool, List[str]]] = deque()
+        self.evicted = 0
+        self._servers: List[asyncio.AbstractServer] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        """Bind both ports; with port 0 the chosen ports are written back."""
+        self._stopping = asyncio.Event()
+        price_server = await asyncio.start_server(
+            self._on_price_client, self.host, self.price_port
+        )
+        news_server = await asyncio.start_server(
+            self._on_news_client, self.host, self.news_port
+        )
+        self._servers = [price_server, news_server]
+        self.price_port = price_server.sockets[0].getsockname()[1]
+        self.news_port = news_server.sockets[0].getsockname()[1]
+
+    async def serve(self, max_ticks: Optional[int] = None) -> None:
+        if not self._servers:
+            await self.start()
+        print("[Gateway] Started asyncio price and news streams.")
+        processed = 0
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        try:
+            while not self._stopping.is_set():
+                if max_ticks is not None and processed >= max_ticks:
+                    break
+                self.broadcast_prices()
+                self.broadcast_news()
+                processed += 1
+                next_tick += self.tick_interval
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self._stopping.wait(), max(0.0, next_tick - loop.time())
+                    )
+        finally:
+            await self.close()
+
+    def stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+        for client in list(self._price_clients) + list(self._news_clients):
+            client.evict()
+        self._price_clients.clear()
+        self._news_clients.clear()
+        for server in self._servers:
+            with contextlib.suppress(Exception):
+                await server.wait_closed()
+
+    def add_symbols(self, symbols: List[str]) -> None:
+        """Start streaming ``symbols`` from the next tick (see ``GatewayServer``)."""
+        self._universe_changes.append((True, list(symbols)))
+
+    def remove_symbols(self, symbols: List[str]) -> None:
+        self._universe_changes.append((False, list(symbols)))
+
+    def _apply_universe_changes(self) -> None:
+        changed = False
+        while self._universe_changes:
+            add, symbols = self._universe_changes.popleft()
+            source = self.source
+            changed |= source.add_symbols(symbols) if add else source.remove_symbols(symbols)
+        if not changed:
+            return
+        symbols = self.source.symbols
+        self._text_formatter = TextPriceFormatter(symbols)
+        self._frame_encoder = PriceFrameEncoder(len(symbols))
+        directory = encode_symbol_frame(symbols)
+        for client in self._price_clients:
+            if client.protocol == PRICE_PROTOCOL_BINARY:
+                client.announce(directory)
+        print(f"[Gateway] Universe now {len(symbols)} symbols.")
+
+    def broadcast_prices(self) -> None:
+        started = time.perf_counter_ns()
+        if self._universe_changes:
+            self._apply_universe_changes()
+        prices = self.source.next_prices()
+        text = binary = None
+        for client in list(self._price_clients):
+            if client.protocol == PRICE_PROTOCOL_BINARY:
+                if binary is None:
+                    binary = self._frame_encoder.encode(prices, time.time_ns())
+                data = binary
+            else:
+                if text is None:
+                    text = self._text_formatter.format(prices) + MESSAGE_DELIMITER
+                data = text
+            self._deliver(client, data, self._price_clients)
+        self._ticks_total.inc()
+        self._updates_total.inc(len(prices))
+        self._broadcast_ns.record(time.perf_counter_ns() - started)
+
+    def broadcast_news(self) -> None:
+        payload = f"{random.randint(0, 100)}".encode() + MESSAGE_DELIMITER
+        for client in list(self._news_clients):
+            self._deliver(client, payload, self._news_clients)
+        self._news_total.inc()
+
+    def _deliver(self, client: Subscriber, data: bytes, clients: Set[Subscriber]) -> None:
+        if not client.offer(data):
+            clients.discard(client)
+            self.evicted += 1
+            print("[Gateway] Evicted slow subscriber.")
+
+    def stats(self) -> Dict[str, int]:
+        totals = {"clients": 0, "queued": 0, "sent": 0, "dropped": 0, "conflated": 0}
+        for client in list(self._price_clients) + list(self._news_clients):
+            totals["clients"] += 1
+            for key, value in client.stats().items():
+                totals[key] += value
+        totals["evicted"] = self.evicted
+        return totals
+
+    async def _on_price_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        protocol = PRICE_PROTOCOL_TEXT
+        try:
+            hello = await asyncio.wait_for(
+                reader.readexactly(len(BINARY_HELLO)), PROTOCOL_HANDSHAKE_TIMEOUT
+            )
+            if hello == BINARY_HELLO:
+                protocol = PRICE_PROTOCOL_BINARY
+                writer.write(encode_symbol_frame(self.source.symbols))
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+            pass
+        await self._serve_client(reader, writer, protocol, self._price_clients, "price")
+
+    async def _on_news_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await self._serve_client(reader, writer, PRICE_PROTOCOL_TEXT, self._news_clients, "news")
+
+    async def _serve_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        protocol: str,
+        clients: Set[Subscriber],
+        label: str,
+    ) -> None:
+        client = Subscriber(
+            writer,
+            protocol=protocol,
+            queue_size=self.queue_size,
+            policy=self.policy,
+            evict_after=self.evict_after,
+            metrics=self.metrics,
+        )
+        client.start()
+        clients.add(client)
+        kind = f"{label} (binary)" if protocol == PRICE_PROTOCOL_BINARY else label
+        print(f"[Gateway] {kind} client connected: {writer.get_extra_info('peername')}")
+        try:
+            # Subscribers never send after the handshake; EOF means they left.
+            while await reader.read(4096):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            clients.discard(client)
+            client.evict()
+
+
+def run_async_gateway(
+    host: str = HOST,
+    price_port: int = PRICE_FEED_PORT,
+    news_port: int = NEWS_FEED_PORT,
+    tick_interval: float = TICK_INTERVAL_SECONDS,
+    max_ticks: Optional[int] = None,
+) -> None:
+    metrics = gateway_metrics(shared=True)
+    server = AsyncGatewayServer(
+        host=host,
+        price_port=price_port,
+        news_port=news_port,
+        tick_interval=tick_interval,
+        metrics=metrics,
+    )
+    try:
+        asyncio.run(server.serve(max_ticks=max_ticks))
+    except KeyboardInterrupt:
+        print("[Gateway] Shutting down.")
+    finally:
+        metrics.close()
+        metrics.unlink()
+
+
+if __name__ == "__main__":
+    run_async_gateway()
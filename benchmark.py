@@ -0,0 +1,404 @@
+"""
+End-to-end pipeline benchmark.
+
+Each case boots the Gateway, the OrderBook, ``strategy_shards`` Strategy shards
+and the OrderManager in their own spawned processes on ephemeral ports,
+exactly as ``main.py`` wires them, but under a benchmark-private shared
+memory name. Counters and latency histograms are read from every process's
+metrics segment (``metrics.py``) after a warm-up and again at the end, so
+only the measured window counts; each process reports its own CPU time over
+that window and its peak RSS. Shards read the shared price book, so the
+Gateway always has a single price subscriber, the OrderBook.
+
+Results are JSON (one entry per case of the symbols x tick interval x
+Strategy shards sweep) so runs from different commits can be diffed:
+
+    python benchmark.py --symbols 3,1000,10000 --tick-interval 0.5,0.01 --output new.json
+    python benchmark.py --output new.json --compare old.json   # exit 1 on regressions
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from config import HOST, SYMBOLS
+from latency import LatencyHistogram
+from metrics import ProcessMetrics, metrics_name
+from shared_memory_utils import SharedPriceBook, doorbell_name, tick_ring_name
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is reported as null
+    resource = None
+
+_QUANTILES = {"p50": 50.0, "p99": 99.0, "p999": 99.9}
+_STARTUP_TIMEOUT = 30.0
+# Latency regressions smaller than this are treated as noise.
+_LATENCY_NOISE_US = 50.0
+# Counters where a higher rate is the regression.
+_FAILURE_COUNTERS = ("dropped", "invalid", "errors")
+
+
+def benchmark_symbols(count: int) -> List[str]:
+    """``SYMBOLS`` first, then generated tickers up to ``count``."""
+    symbols = list(SYMBOLS[:count])
+    symbols += [f"SYM{i:05d}" for i in range(count - len(symbols))]
+    return symbols
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _start_component(role: str, base: str, options: dict) -> dict:
+    """Start one component on a daemon thread; returns the ports it bound."""
+    if role == "OrderManager":
+        from order_manager import OrderManagerServer, order_manager_metrics
+
+        server = OrderManagerServer(
+            host=HOST,
+            port=0,
+            journal_path=options["journal_path"],
+            metrics=order_manager_metrics(shared=True, name=base),
+        )
+        threading.Thread(target=server.run, daemon=True).start()
+        return {"order_port": server.server.getsockname()[1]}
+    if role == "Gateway":
+        from gateway import GatewayServer, gateway_metrics
+
+        # Same price path and news sentiment every run, so order flow repeats.
+        random.seed(options["seed"])
+        server = GatewayServer(
+            host=HOST,
+            price_port=0,
+            news_port=0,
+            tick_interval=options["tick_interval"],
+            symbols=options["symbols"],
+            seed=options["seed"],
+            metrics=gateway_metrics(shared=True, name=base),
+        )
+        threading.Thread(target=server.run, daemon=True).start()
+        return {
+            "price_port": server.price_server.getsockname()[1],
+            "news_port": server.news_server.getsockname()[1],
+        }
+    if role == "OrderBook":
+        from orderbook import run_orderbook
+
+        kwargs = {"host": HOST, "port": options["price_port"], "symbols": options["symbols"]}
+        kwargs.update(shared_name=base, force_recreate=True)
+        threading.Thread(target=run_orderbook, kwargs=kwargs, daemon=True).start()
+        return {}
+    from strategy import run_strategy
+
+    kwargs = {
+        "host": HOST,
+        "news_port": options["news_port"],
+        "order_port": options["order_port"],
+        "symbols": options["shard"],
+        "shared_name": base,
+        "name": role,
+        "doorbell_lock": options["doorbell_lock"],
+    }
+    threading.Thread(target=run_strategy, kwargs=kwargs, daemon=True).start()
+    return {}
+
+
+def _component_process(role, base, options, events, measure, stop, quiet) -> None:
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+    events.put(("ready", role, _start_component(role, base, options)))
+    measure.wait()
+    started = time.process_time()
+    stop.wait()
+    cpu_s = time.process_time() - started
+    events.put(("usage", role, {"cpu_s": cpu_s, "peak_rss_kb": _peak_rss_kb()}))
+
+
+def _group(process: str) -> str:
+    """``Strategy-2/4`` -> ``Strategy`` so shards aggregate."""
+    return process.split("-", 1)[0]
+
+
+def _sample(blocks: Sequence[ProcessMetrics]) -> Dict[str, dict]:
+    counters: Dict[str, int] = {}
+    histograms: Dict[str, LatencyHistogram] = {}
+    for block in blocks:
+        group = _group(block.process)
+        for name, value in block.snapshot().items():
+            key = f"{group} {name}"
+            counters[key] = counters.get(key, 0) + value
+        for name, histogram in block.histograms.items():
+            key = f"{group} {name}"
+            if key in histograms:
+                histograms[key].merge(histogram.copy())
+            else:
+                histograms[key] = histogram.copy()
+    return {"counters": counters, "histograms": histograms}
+
+
+def _attach_all(segments: Sequence[str], timeout: float) -> List[ProcessMetrics]:
+    deadline = time.monotonic() + timeout
+    blocks: Dict[str, ProcessMetrics] = {}
+    while len(blocks) < len(segments):
+        for segment in segments:
+            if segment not in blocks:
+                with contextlib.suppress(FileNotFoundError, ValueError):
+                    blocks[segment] = ProcessMetrics.attach(segment)
+        if len(blocks) < len(segments):
+            if time.monotonic() > deadline:
+                missing = sorted(set(segments) - set(blocks))
+                raise TimeoutError(f"components did not start: {missing}")
+            time.sleep(0.05)
+    return [blocks[segment] for segment in segments]
+
+
+def run_case(
+    symbols: int,
+    tick_interval: float,
+    strategy_shards: int,
+    duration: float = 5.0,
+    warmup: float = 1.0,
+    journal: bool = True,
+    quiet: bool = True,
+    seed: int = 7,
+) -> dict:
+    """Run one configuration end to end and return its result entry."""
+    from strategy import partition_symbols
+
+    universe = benchmark_symbols(symbols)
+    shards = [part for part in partition_symbols(universe, strategy_shards) if part]
+    strategies = (
+        ["Strategy"]
+        if len(shards) == 1
+        else [f"Strategy-{i}/{len(shards)}" for i in range(1, len(shards) + 1)]
+    )
+    base = f"pfb{os.getpid()}_{int(time.time() * 1000) % 100000}"
+    ctx = mp.get_context("spawn")
+    events = ctx.Queue()
+    measure, stop = ctx.Event(), ctx.Event()
+    processes: List[mp.Process] = []
+    ports: dict = {}
+    blocks: List[ProcessMetrics] = []
+    workdir = tempfile.TemporaryDirectory()
+    options = {
+        "symbols": universe,
+        "tick_interval": tick_interval,
+        "seed": seed,
+        "journal_path": os.path.join(workdir.name, "orders.journal") if journal else None,
+        "doorbell_lock": ctx.Lock(),
+    }
+
+    def start(role: str, extra: Optional[dict] = None) -> None:
+        process = ctx.Process(
+            target=_component_process,
+            name=role,
+            args=(role, base, {**options, **ports, **(extra or {})}, events, measure, stop, quiet),
+        )
+        process.start()
+        processes.append(process)
+        _, _, info = events.get(timeout=_STARTUP_TIMEOUT)
+        ports.update(info)
+
+    names = ["Gateway", "OrderBook", *strategies, "OrderManager"]
+    try:
+        start("OrderManager")
+        start("Gateway")
+        start("OrderBook")
+        for name, shard in zip(strategies, shards):
+            start(name, {"shard": shard})
+        blocks = _attach_all([metrics_name(base, name) for name in names], _STARTUP_TIMEOUT)
+        time.sleep(warmup)
+        before = _sample(blocks)
+        measure.set()
+        started = time.perf_counter()
+        time.sleep(duration)
+        after = _sample(blocks)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        usage: Dict[str, dict] = {}
+        while len(usage) < len(processes):
+            kind, role, info = events.get(timeout=_STARTUP_TIMEOUT)
+            if kind == "usage":
+                info["cpu_pct"] = round(100.0 * info["cpu_s"] / elapsed, 1)
+                info["cpu_s"] = round(info["cpu_s"], 3)
+                usage[role] = info
+    finally:
+        stop.set()
+        measure.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for block in blocks:
+            block.close()
+            block.unlink()
+        # The OrderBook's segments outlive its daemon thread; drop them too.
+        for segment in (base, tick_ring_name(base), doorbell_name(base)):
+            SharedPriceBook._try_cleanup_existing(segment)
+        workdir.cleanup()
+
+    counters = {
+        key: value - before["counters"].get(key, 0) for key, value in after["counters"].items()
+    }
+    latency = {}
+    for key, histogram in after["histograms"].items():
+        histogram.subtract(before["histograms"][key])
+        if not histogram.total:
+            continue
+        entry = {"count": histogram.total, "mean": round(histogram.mean_ns / 1000, 1)}
+        for label, percent in _QUANTILES.items():
+            entry[label] = round(histogram.percentile(percent) / 1000, 1)
+        latency[key] = entry
+    return {
+        "symbols": symbols,
+        "tick_interval": tick_interval,
+        "strategy_shards": len(shards),
+        "duration_s": round(elapsed, 3),
+        "throughput_per_s": {
+            key: round(value / elapsed, 1) for key, value in sorted(counters.items())
+        },
+        "latency_us": latency,
+        "processes": {name: usage.get(name) for name in names},
+    }
+
+
+def _case_key(run: dict) -> tuple:
+    return run["symbols"], run["tick_interval"], run["strategy_shards"]
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.2) -> List[str]:
+    """
+    Regressions of ``current`` against ``baseline`` for matching cases:
+    throughput down, failure rates (drops, invalid orders, parse errors) or
+    p99 latency up, by more than ``threshold``.
+    """
+    previous = {_case_key(run): run for run in baseline.get("runs", [])}
+    regressions = []
+    for run in current.get("runs", []):
+        base = previous.get(_case_key(run))
+        if base is None:
+            continue
+        case = "symbols={} tick_interval={} strategy_shards={}".format(*_case_key(run))
+        for key, value in run["throughput_per_s"].items():
+            old = base["throughput_per_s"].get(key)
+            if old is None:
+                continue
+            if any(word in key for word in _FAILURE_COUNTERS):
+                worse = value > old * (1 + threshold) and value > 0
+            else:
+                worse = value < old * (1 - threshold)
+            if worse:
+                regressions.append(f"{case}: {key} {old:,.1f}/s -> {value:,.1f}/s")
+        for hop, stats in run["latency_us"].items():
+            old = base["latency_us"].get(hop)
+            if old is None:
+                continue
+            grew = stats["p99"] - old["p99"]
+            if stats["p99"] > old["p99"] * (1 + threshold) and grew > _LATENCY_NOISE_US:
+                regressions.append(f"{case}: {hop} p99 {old['p99']:,.1f}us -> {stats['p99']:,.1f}us")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def _floats(text: str) -> List[float]:
+    return [float(item) for item in text.split(",") if item]
+
+
+def _ints(text: str) -> List[int]:
+    return [int(item) for item in text.split(",") if item]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the full pipeline end to end.")
+    parser.add_argument("--symbols", type=_ints, default=[3, 100, 1000, 10000])
+    parser.add_argument("--tick-interval", type=_floats, default=[0.5, 0.01])
+    parser.add_argument("--strategy-shards", type=_ints, default=[1], help="Strategy processes (shards of the symbol universe)")
+    parser.add_argument("--duration", type=float, default=5.0, help="measured seconds per case")
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--no-journal", action="store_true", help="run the OrderManager without a journal")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="regression tolerance (longer runs allow less)"
+    )
+    parser.add_argument("--seed", type=int, default=7, help="price walk and news seed")
+    parser.add_argument("--verbose", action="store_true", help="keep component console output")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "runs": [],
+    }
+    for symbols, tick_interval, strategy_shards in itertools.product(
+        args.symbols, args.tick_interval, args.strategy_shards
+    ):
+        print(
+            f"[Benchmark] symbols={symbols} tick_interval={tick_interval} "
+            f"strategy_shards={strategy_shards}",
+            file=sys.stderr,
+        )
+        results["runs"].append(
+            run_case(
+                symbols,
+                tick_interval,
+                strategy_shards,
+                duration=args.duration,
+                warmup=args.warmup,
+                journal=not args.no_journal,
+                quiet=not args.verbose,
+                seed=args.seed,
+            )
+        )
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        regressions = compare_results(baseline, results, args.threshold)
+        for line in regressions:
+            print(f"[Benchmark] REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"[Benchmark] No regressions against {args.compare}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
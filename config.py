@@ -11,6 +11,17 @@ ORDER_MANAGER_PORT = 5103
 
 MESSAGE_DELIMITER = b"*"
 
+# Price feed framing requested by the OrderBook: "binary" (length-prefixed
+# packed records, see protocol.py) or "text" (``SYMBOL,price*`` tokens).
+PRICE_FEED_PROTOCOL = "binary"
+PROTOCOL_HANDSHAKE_TIMEOUT = 0.05  # seconds the Gateway waits for a client hello
+# The text feed has no symbol directory, so the OrderBook adds unknown symbols
+# on sight. Only names matching this pattern are added, and only while the
+# book holds fewer than TEXT_FEED_MAX_SYMBOLS; other tokens are counted in
+# symbols_rejected_total and dropped.
+TEXT_FEED_SYMBOL_PATTERN = r"[A-Z][A-Z0-9.\-]{0,15}"
+TEXT_FEED_MAX_SYMBOLS = 4096
+
 # Symbols to stream and track
 SYMBOLS = ["AAPL", "MSFT", "GOOG"]
 
@@ -20,11 +31,32 @@ INITIAL_PRICES = {
     "MSFT": 325.1,
     "GOOG": 135.8,
 }
+DEFAULT_INITIAL_PRICE = 100.0  # starting price for symbols missing above
 RANDOM_WALK_STD = 0.4
+RANDOM_WALK_SEED = None  # set an int for a reproducible price path
+SHOCK_BLOCK_SIZE = 64  # ticks of Gaussian shocks drawn per generator call
 TICK_INTERVAL_SECONDS = 0.5
+# Threaded Gateway price fan-out: "conflate" keeps only the newest unsent price
+# per symbol for a lagging subscriber and sends it as soon as the socket is
+# writable, "direct" sendall()s every tick to everyone. News always conflates.
+GATEWAY_FANOUT_MODE = "conflate"
+# Historical replay (see replay.py): file to stream instead of the random walk,
+# timestamp speed multiplier (0 = as fast as possible) and max ticks per send.
+REPLAY_FILE = None
+REPLAY_SPEED = 1.0
+REPLAY_MAX_BATCH = 4096
+# "threaded" (gateway.py) or "asyncio" (async_gateway.py). Only the threaded
+# Gateway replays; main.py refuses REPLAY_FILE together with "asyncio".
+GATEWAY_IMPL = "threaded"
+# asyncio Gateway: per-subscriber write queue and what to do when it is full.
+ASYNC_CLIENT_QUEUE_SIZE = 64
+SLOW_CLIENT_POLICY = "conflate"  # "conflate" replaces the oldest message, "drop" the newest
+SLOW_CLIENT_EVICT_AFTER = 500  # consecutive overflowing ticks before disconnecting
 
 # Shared memory
 SHARED_MEMORY_NAME = "pf_price_book"
+TICK_RING_CAPACITY = 65536  # ticks retained for Strategy consumers
+DOORBELL_SLOTS = 64  # max Strategy processes woken by the OrderBook
 
 # Strategy configuration
 SHORT_WINDOW = 3
@@ -32,8 +64,37 @@ LONG_WINDOW = 6
 BULLISH_THRESHOLD = 60
 BEARISH_THRESHOLD = 40
 ORDER_QUANTITY = 10
-MAX_PRICE_HISTORY = LONG_WINDOW
+# "binary" sends fixed-layout order frames (protocol.py); "json" is the debug format.
+ORDER_PROTOCOL = "binary"
+ORDER_SEND_QUEUE_LIMIT = 10000  # orders held while the OrderManager is unreachable
+ORDER_RECONNECT_DELAY_SECONDS = 1.0
+EMA_SPAN = LONG_WINDOW
+# "event" wakes on OrderBook doorbell / news arrival, "poll" sleeps between cycles.
+STRATEGY_WAKE_MODE = "event"
+STRATEGY_POLL_INTERVAL_SECONDS = 0.2  # poll period, and the event-mode wait cap
+# Strategy worker processes; each owns a "hash" or "range" partition of SYMBOLS.
+STRATEGY_SHARDS = 1
+STRATEGY_SHARD_MODE = "hash"
+STRATEGY_STATS_INTERVAL_SECONDS = 10.0  # per-shard throughput log period, 0 = off
+# Directory for per-process ``<name>.npz`` engine checkpoints, restored at
+# start and written on shutdown; None disables checkpointing.
+STRATEGY_CHECKPOINT_DIR = None
+
+# OrderManager pipeline: raw order batches queued between the socket loop and
+# the decode workers. "block" pushes back on senders when full, "drop" sheds.
+ORDER_PIPELINE_QUEUE_SIZE = 1024
+ORDER_PIPELINE_POLICY = "block"
+ORDER_DECODE_WORKERS = 1
+ORDER_ACK_BUFFER_BYTES = 1 << 20  # unsent acks held per connection before dropping
+# Append-only order journal (None disables it) with group-commit fsync.
+ORDER_JOURNAL_PATH = "orders.journal"
+JOURNAL_COMMIT_RECORDS = 256  # fsync once this many records are pending...
+JOURNAL_COMMIT_DELAY_SECONDS = 0.005  # ...or the oldest has waited this long
+JOURNAL_INDEX_STRIDE = 4096  # records between time-index entries
 
 # Logging / misc
 DEFAULT_TIMEOUT = 5.0
+LOG_QUEUE_SIZE = 10000  # console lines buffered by LineLogger before dropping
+LATENCY_REPORT_INTERVAL_SECONDS = 10.0  # per-hop latency histogram log period, 0 = off
+METRICS_PORT = 5104  # main.py serves http://HOST:METRICS_PORT/metrics, 0 = off
 
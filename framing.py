@@ -0,0 +1,105 @@
+"""
+Incremental message framing shared by the socket consumers.
+
+``FrameReader`` receives with ``recv_into`` straight into a preallocated
+buffer and hands out complete messages as ``memoryview`` slices of it, so a
+burst of hundreds of messages in one recv costs no per-message copies or
+buffer re-slicing. Only the trailing partial message is moved back to the
+front of the buffer before the next receive.
+
+Views returned by ``messages``/``frames`` are only valid until the next call
+to ``recv``/``feed``; copy them (``bytes(view)``) to keep them longer.
+"""
+
+from __future__ import annotations
+
+import socket
+from typing import Iterator, Tuple
+
+from config import MESSAGE_DELIMITER
+from protocol import FRAME_HEADER, decode_frame_header
+
+DEFAULT_BUFFER_SIZE = 65536
+
+
+class FrameReader:
+    def __init__(
+        self,
+        capacity: int = DEFAULT_BUFFER_SIZE,
+        delimiter: bytes = MESSAGE_DELIMITER,
+    ) -> None:
+        self.delimiter = delimiter
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # first byte not yet handed out
+        self._end = 0  # one past the last received byte
+
+    @property
+    def pending(self) -> int:
+        """Bytes received but not yet returned as a complete message."""
+        return self._end - self._start
+
+    def recv(self, sock: socket.socket) -> int:
+        """
+        Receive once from ``sock`` into the buffer. Returns the byte count
+        (0 on EOF) and propagates socket errors such as ``BlockingIOError``.
+        """
+        self._make_room()
+        received = sock.recv_into(self._view[self._end :])
+        self._end += received
+        return received
+
+    def feed(self, data) -> None:
+        """Append bytes from a non-socket source."""
+        size = len(data)
+        self._make_room(size)
+        self._buffer[self._end : self._end + size] = data
+        self._end += size
+
+    def messages(self) -> Iterator[memoryview]:
+        """Yield each complete, non-empty delimiter-terminated message."""
+        find = self._buffer.find
+        delimiter = self.delimiter
+        step = len(delimiter)
+        while True:
+            idx = find(delimiter, self._start, self._end)
+            if idx == -1:
+                return
+            start = self._start
+            self._start = idx + step
+            if idx > start:
+                yield self._view[start:idx]
+
+    def frames(self) -> Iterator[Tuple[int, int, memoryview]]:
+        """Yield ``(kind, count, payload)`` for each complete binary frame."""
+        header_size = FRAME_HEADER.size
+        while self._end - self._start >= header_size:
+            kind, count, length = decode_frame_header(self._buffer, self._start)
+            payload_start = self._start + header_size
+            if self._end - payload_start < length:
+                return
+            self._start = payload_start + length
+            yield kind, count, self._view[payload_start : self._start]
+
+    def reset(self) -> None:
+        self._start = self._end = 0
+
+    def _make_room(self, needed: int = 1) -> None:
+        pending = self._end - self._start
+        if self._start:
+            if pending:
+                # The tail is at most one partial message; copy it out first
+                # because the source and destination ranges may overlap.
+                self._buffer[:pending] = bytes(self._view[self._start : self._end])
+            self._start, self._end = 0, pending
+        if len(self._buffer) - self._end >= needed:
+            return
+        # A single message outgrew the buffer; views handed out earlier pin
+        # the old bytearray, so allocate a new one instead of resizing.
+        capacity = len(self._buffer)
+        while capacity - pending < needed:
+            capacity *= 2
+        buffer = bytearray(capacity)
+        buffer[:pending] = self._view[:pending]
+        self._buffer = buffer
+        self._view = memoryview(buffer)
@@ -2,21 +2,184 @@ from __future__ import annotations
 
 import contextlib
 import random
+import selectors
 import socket
 import threading
 import time
-from typing import Dict, Optional, Set
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
 
 from config import (
+    DEFAULT_INITIAL_PRICE,
+    GATEWAY_FANOUT_MODE,
     HOST,
     INITIAL_PRICES,
     MESSAGE_DELIMITER,
     NEWS_FEED_PORT,
     PRICE_FEED_PORT,
+    PROTOCOL_HANDSHAKE_TIMEOUT,
+    RANDOM_WALK_SEED,
     RANDOM_WALK_STD,
+    REPLAY_FILE,
+    REPLAY_SPEED,
+    SHARED_MEMORY_NAME,
+    SHOCK_BLOCK_SIZE,
     SYMBOLS,
     TICK_INTERVAL_SECONDS,
 )
+from metrics import ProcessMetrics, metrics_name
+from protocol import (
+    BINARY_HELLO,
+    PriceFrameEncoder,
+    TextPriceFormatter,
+    encode_price_frame,
+    encode_symbol_frame,
+    format_text_prices,
+)
+from replay import TickReplaySource
+
+GATEWAY_COUNTERS = (
+    "price_ticks_total",
+    "price_updates_total",
+    "news_messages_total",
+    # Slow-subscriber events (asyncio Gateway queues).
+    "price_dropped_total",
+    "price_conflated_total",
+    "clients_evicted_total",
+)
+GATEWAY_HISTOGRAMS = ("broadcast_prices",)
+
+
+def gateway_metrics(shared: bool = False, name: str = SHARED_MEMORY_NAME) -> ProcessMetrics:
+    """Gateway counters; ``shared`` puts them where ``MetricsServer`` reads."""
+    shared_name = metrics_name(name, "Gateway") if shared else None
+    return ProcessMetrics("Gateway", GATEWAY_COUNTERS, GATEWAY_HISTOGRAMS, shared_name)
+
+
+class RandomWalkSource:
+    """
+    Gaussian random-walk prices for ``symbols``, held in one NumPy array and
+    advanced for the whole universe in a single vectorized step per tick.
+    Shocks are drawn ``block_size`` ticks at a time from a seeded
+    ``numpy.random.Generator``, so a fixed ``seed`` replays the same path.
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[List[str]] = None,
+        seed: Optional[int] = RANDOM_WALK_SEED,
+        block_size: int = SHOCK_BLOCK_SIZE,
+    ) -> None:
+        self.symbols: List[str] = list(symbols) if symbols is not None else SYMBOLS
+        self._index = {symbol: idx for idx, symbol in enumerate(self.symbols)}
+        self.values = np.array(
+            [INITIAL_PRICES.get(symbol, DEFAULT_INITIAL_PRICE) for symbol in self.symbols],
+            dtype=np.float64,
+        )
+        self._rng = np.random.default_rng(seed)
+        self._shocks = np.empty((block_size, len(self.symbols)), dtype=np.float64)
+        self._next_row = block_size
+
+    @property
+    def prices(self) -> Dict[str, float]:
+        return dict(zip(self.symbols, self.values.tolist()))
+
+    def next_prices(self) -> np.ndarray:
+        """
+        Advance every symbol one step. The returned array is the live state and
+        is overwritten by the next call; copy it to keep a snapshot.
+        """
+        if self._next_row == len(self._shocks):
+            self._rng.standard_normal(out=self._shocks)
+            self._shocks *= RANDOM_WALK_STD
+            self._next_row = 0
+        values = self.values
+        values += self._shocks[self._next_row]
+        np.maximum(values, 0.01, out=values)
+        self._next_row += 1
+        return values
+
+    def next_price(self, symbol: str) -> float:
+        idx = self._index[symbol]
+        new_price = max(0.01, float(self.values[idx]) + self._rng.normal(0.0, RANDOM_WALK_STD))
+        self.values[idx] = new_price
+        return new_price
+
+    def add_symbols(self, symbols: List[str]) -> bool:
+        """Append ``symbols`` not already streamed; returns whether any were."""
+        new = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self._index]
+        if not new:
+            return False
+        initial = [INITIAL_PRICES.get(symbol, DEFAULT_INITIAL_PRICE) for symbol in new]
+        self._set_universe(self.symbols + new, np.concatenate([self.values, initial]))
+        return True
+
+    def remove_symbols(self, symbols: List[str]) -> bool:
+        """Stop streaming ``symbols``; the remaining ones are renumbered."""
+        drop = {self._index[symbol] for symbol in symbols if symbol in self._index}
+        if not drop:
+            return False
+        keep = [idx for idx in range(len(self.symbols)) if idx not in drop]
+        self._set_universe([self.symbols[idx] for idx in keep], self.values[keep])
+        return True
+
+    def _set_universe(self, symbols: List[str], values: np.ndarray) -> None:
+        self.symbols = symbols
+        self._index = {symbol: idx for idx, symbol in enumerate(symbols)}
+        self.values = np.array(values, dtype=np.float64)
+        # Redraw the shock block at the new width on the next step.
+        self._shocks = np.empty((len(self._shocks), len(symbols)), dtype=np.float64)
+        self._next_row = len(self._shocks)
+
+
+class ConflatedSlots:
+    """
+    Per-subscriber conflation state: the newest unsent price and timestamp for
+    each symbol, a dirty mask, and the unsent tail of the message currently
+    being written. Memory is O(symbols) however far the subscriber lags.
+
+    Whole frames that must not be conflated (replay batches) queue in
+    ``frames`` behind the outbox instead; those grow with the lag.
+
+    ``scheduled`` is set while the writer thread waits for the socket to
+    become writable to send what is pending.
+    """
+
+    __slots__ = ("prices", "ts_ns", "dirty", "outbox", "frames", "scheduled")
+
+    def __init__(self, count: int) -> None:
+        self.prices = np.zeros(count, dtype=np.float64)
+        self.ts_ns = np.zeros(count, dtype=np.int64)
+        self.dirty = np.zeros(count, dtype=bool)
+        self.outbox = memoryview(b"")
+        self.frames: Deque[bytes] = deque()
+        self.scheduled = False
+
+    def pending(self) -> bool:
+        return bool(self.outbox) or bool(self.frames) or bool(self.dirty.any())
+
+    def overwrite(
+        self,
+        prices: np.ndarray,
+        ts_ns,
+        symbol_ids: Optional[np.ndarray] = None,
+    ) -> None:
+        if symbol_ids is None:
+            symbol_ids = slice(None)
+        self.prices[symbol_ids] = prices
+        self.ts_ns[symbol_ids] = ts_ns
+        self.dirty[symbol_ids] = True
+
+    def take(self):
+        """Return and clear the dirty slots; ``None`` ids means every symbol."""
+        if self.dirty.all():
+            self.dirty[:] = False
+            return None, self.prices, self.ts_ns
+        symbol_ids = np.flatnonzero(self.dirty)
+        self.dirty[:] = False
+        return symbol_ids, self.prices[symbol_ids], self.ts_ns[symbol_ids]
 
 
 class GatewayServer:
@@ -26,18 +189,43 @@ class GatewayServer:
         price_port: int = PRICE_FEED_PORT,
         news_port: int = NEWS_FEED_PORT,
         tick_interval: float = TICK_INTERVAL_SECONDS,
+        fanout: str = GATEWAY_FANOUT_MODE,
+        symbols: Optional[List[str]] = None,
+        seed: Optional[int] = RANDOM_WALK_SEED,
+        metrics: Optional[ProcessMetrics] = None,
     ) -> None:
         self.host = host
         self.price_port = price_port
         self.news_port = news_port
         self.tick_interval = tick_interval
-        self.price_prices: Dict[str, float] = INITIAL_PRICES.copy()
+        self.fanout = fanout
+        self.source = RandomWalkSource(symbols, seed=seed)
+        self.metrics = metrics or gateway_metrics()
+        self._ticks_total = self.metrics.counter("price_ticks_total")
+        self._updates_total = self.metrics.counter("price_updates_total")
+        self._news_total = self.metrics.counter("news_messages_total")
+        self._broadcast_ns = self.metrics.histogram("broadcast_prices")
+        self._text_formatter = TextPriceFormatter(self.source.symbols)
+        self._frame_encoder = PriceFrameEncoder(len(self.source.symbols))
         self.delimiter_text = MESSAGE_DELIMITER.decode()
         self._price_clients: Set[socket.socket] = set()
+        # Price subscribers that negotiated the binary framing; same lock.
+        self._binary_price_clients: Set[socket.socket] = set()
+        self._conflation: Dict[socket.socket, ConflatedSlots] = {}
+        # (add, symbols) requests applied by the tick loop before its next tick.
+        self._universe_changes: Deque[Tuple[bool, List[str]]] = deque()
         self._news_clients: Set[socket.socket] = set()
+        # Unsent news per client: the message in flight plus only the newest.
+        self._news_slots: Dict[socket.socket, ConflatedSlots] = {}
         self._stop = threading.Event()
         self._price_lock = threading.Lock()
         self._news_lock = threading.Lock()
+        # Subscribers with a backlog, handed to the writer thread, which sends
+        # it as soon as their sockets become writable instead of next tick.
+        self._write_ready: Deque[socket.socket] = deque()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
 
         self.price_server = self._build_server_socket(self.price_port)
         self.news_server = self._build_server_socket(self.news_port)
@@ -45,6 +233,7 @@ class GatewayServer:
         self.price_accept_thread = threading.Thread(
             target=self._accept_loop,
             args=(self.price_server, self._price_clients, self._price_lock, "price"),
+            kwargs={"binary_set": self._binary_price_clients},
             daemon=True,
         )
         self.news_accept_thread = threading.Thread(
@@ -52,6 +241,11 @@ class GatewayServer:
             args=(self.news_server, self._news_clients, self._news_lock, "news"),
             daemon=True,
         )
+        self.writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+
+    @property
+    def price_prices(self) -> Dict[str, float]:
+        return self.source.prices
 
     def _build_server_socket(self, port: int) -> socket.socket:
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -67,27 +261,153 @@ class GatewayServer:
         client_set: Set[socket.socket],
         lock: threading.Lock,
         label: str,
+        binary_set: Optional[Set[socket.socket]] = None,
     ) -> None:
         while not self._stop.is_set():
             try:
                 conn, addr = server.accept()
-                conn.setblocking(False)
-                with lock:
-                    client_set.add(conn)
-                print(f"[Gateway] {label} client connected: {addr}")
             except socket.timeout:
                 continue
             except OSError:
                 break
+            if binary_set is None:
+                self._admit(conn, addr, client_set, lock, label)
+                continue
+            # The handshake can wait PROTOCOL_HANDSHAKE_TIMEOUT for a hello;
+            # do it on a short-lived thread so the next accept() is not held
+            # up behind a silent or slow client.
+            threading.Thread(
+                target=self._admit,
+                args=(conn, addr, client_set, lock, label, binary_set),
+                daemon=True,
+            ).start()
+
+    def _admit(
+        self,
+        conn: socket.socket,
+        addr,
+        client_set: Set[socket.socket],
+        lock: threading.Lock,
+        label: str,
+        binary_set: Optional[Set[socket.socket]] = None,
+    ) -> None:
+        target, kind = client_set, label
+        if binary_set is not None and self._negotiate_binary(conn):
+            target, kind = binary_set, f"{label} (binary)"
+        with lock:
+            if self._stop.is_set():
+                conn.close()
+                return
+            # Under the lock so no universe change slips in between the
+            # directory and the first price frame.
+            if target is binary_set:
+                try:
+                    conn.sendall(encode_symbol_frame(self.source.symbols))
+                except OSError:
+                    conn.close()
+                    return
+            conn.setblocking(False)
+            target.add(conn)
+        print(f"[Gateway] {kind} client connected: {addr}")
+
+    def _negotiate_binary(self, conn: socket.socket) -> bool:
+        """
+        Give a new price client ``PROTOCOL_HANDSHAKE_TIMEOUT`` to ask for the
+        binary framing; clients that stay silent get the text protocol.
+        """
+        received = b""
+        try:
+            conn.settimeout(PROTOCOL_HANDSHAKE_TIMEOUT)
+            while len(received) < len(BINARY_HELLO):
+                chunk = conn.recv(len(BINARY_HELLO) - len(received))
+                if not chunk:
+                    break
+                received += chunk
+            return received == BINARY_HELLO
+        except (socket.timeout, OSError):
+            return False
+
+    def add_symbols(self, symbols: List[str]) -> None:
+        """
+        Start streaming ``symbols`` from the next tick. Binary subscribers get
+        a fresh symbol directory first; text subscribers just see new tokens.
+        Safe to call from any thread. Replays keep their file's universe.
+        """
+        self._universe_changes.append((True, list(symbols)))
+
+    def remove_symbols(self, symbols: List[str]) -> None:
+        """Stop streaming ``symbols`` from the next tick (see ``add_symbols``)."""
+        self._universe_changes.append((False, list(symbols)))
+
+    def _apply_universe_changes(self) -> None:
+        changed = False
+        while self._universe_changes:
+            add, symbols = self._universe_changes.popleft()
+            source = self.source
+            changed |= source.add_symbols(symbols) if add else source.remove_symbols(symbols)
+        if not changed:
+            return
+        symbols = self.source.symbols
+        directory = encode_symbol_frame(symbols)
+        with self._price_lock:
+            self._text_formatter = TextPriceFormatter(symbols)
+            self._frame_encoder = PriceFrameEncoder(len(symbols))
+            if self.fanout == "conflate":
+                # Finish the message in flight, then (binary) the new directory.
+                for client in self._price_clients | self._binary_price_clients:
+                    old = self._conflation.get(client)
+                    slots = self._conflation[client] = ConflatedSlots(len(symbols))
+                    pending = b""
+                    if old is not None:
+                        pending = b"".join([bytes(old.outbox), *old.frames])
+                    if client in self._binary_price_clients:
+                        pending += directory
+                    slots.outbox = memoryview(pending)
+                    self._schedule_write(client, slots)
+        if self.fanout != "conflate":
+            self._send_to_clients(directory, self._binary_price_clients, self._price_lock)
+        print(f"[Gateway] Universe now {len(symbols)} symbols.")
 
     def broadcast_prices(self) -> None:
-        message = self._serialize_prices().encode()
-        self._broadcast(message, self._price_clients, self._price_lock)
+        started = time.perf_counter_ns()
+        if self._universe_changes:
+            self._apply_universe_changes()
+        prices = self._next_prices()
+        if self.fanout == "conflate":
+            self._broadcast_conflated(prices, time.time_ns())
+        else:
+            if self._price_clients:
+                message = self._text_formatter.format(prices)
+                self._broadcast(message, self._price_clients, self._price_lock)
+            if self._binary_price_clients:
+                frame = self._frame_encoder.encode(prices, time.time_ns())
+                self._send_to_clients(frame, self._binary_price_clients, self._price_lock)
+        self._ticks_total.inc()
+        self._updates_total.inc(len(prices))
+        self._broadcast_ns.record(time.perf_counter_ns() - started)
 
     def broadcast_news(self) -> None:
+        """
+        Write the sentiment to every news client without blocking. A client
+        that cannot take it yet gets it once writable; if it falls further
+        behind, only the newest sentiment is kept.
+        """
         sentiment = random.randint(0, 100)
-        payload = f"{sentiment}".encode()
-        self._broadcast(payload, self._news_clients, self._news_lock)
+        data = f"{sentiment}".encode() + MESSAGE_DELIMITER
+        disconnected: List[socket.socket] = []
+        with self._news_lock:
+            for client in self._news_clients:
+                slots = self._news_slots.get(client)
+                if slots is None:
+                    slots = self._news_slots[client] = ConflatedSlots(0)
+                slots.frames.clear()
+                slots.frames.append(data)
+                if not self._flush_conflated(client, slots, False):
+                    disconnected.append(client)
+                else:
+                    self._schedule_write(client, slots)
+            self._drop_news(disconnected)
+        self._news_total.inc()
 
     def _broadcast(
         self,
@@ -95,7 +415,14 @@ class GatewayServer:
         client_set: Set[socket.socket],
         lock: threading.Lock,
     ) -> None:
-        data = payload + MESSAGE_DELIMITER
+        self._send_to_clients(payload + MESSAGE_DELIMITER, client_set, lock)
+
+    def _send_to_clients(
+        self,
+        data: bytes,
+        client_set: Set[socket.socket],
+        lock: threading.Lock,
+    ) -> None:
         disconnected: List[socket.socket] = []
         with lock:
             for client in list(client_set):
@@ -108,23 +435,208 @@ class GatewayServer:
                 with contextlib.suppress(OSError):
                     client.close()
 
-    def _serialize_prices(self) -> str:
-        entries = []
-        for symbol in SYMBOLS:
-            price = self._next_price(symbol)
-            entries.append(f"{symbol},{price:.2f}")
-        return self.delimiter_text.join(entries)
+    def broadcast_batch(
+        self, symbol_ids: np.ndarray, prices: np.ndarray, ts_ns: np.ndarray
+    ) -> None:
+        """
+        Publish a partial update (e.g. one replay batch) for some symbols.
+        Every tick is sent in order, repeated symbols included: with conflated
+        fanout the batch is queued whole rather than merged into the slots.
+        """
+        started = time.perf_counter_ns()
+        message = frame = None
+        if self._price_clients:
+            symbols = [self.source.symbols[idx] for idx in symbol_ids.tolist()]
+            message = format_text_prices(symbols, prices.tolist()) + MESSAGE_DELIMITER
+        if self._binary_price_clients:
+            frame = encode_price_frame(symbol_ids, prices, ts_ns)
+        if self.fanout == "conflate":
+            self._queue_frames(message, frame)
+        else:
+            if message is not None:
+                self._send_to_clients(message, self._price_clients, self._price_lock)
+            if frame is not None:
+                self._send_to_clients(frame, self._binary_price_clients, self._price_lock)
+        self._ticks_total.inc()
+        self._updates_total.inc(len(prices))
+        self._broadcast_ns.record(time.perf_counter_ns() - started)
+
+    def _queue_frames(self, message: Optional[bytes], frame: Optional[bytes]) -> None:
+        """
+        Append a whole text ``message`` / binary ``frame`` to every price
+        subscriber's queue and write what each socket accepts without blocking.
+        Conflated prices still pending are queued ahead of it so order holds.
+        """
+        disconnected: List[socket.socket] = []
+        with self._price_lock:
+            subscribers = [(client, False, message) for client in self._price_clients]
+            subscribers += [(client, True, frame) for client in self._binary_price_clients]
+            for client, binary, data in subscribers:
+                if data is None:
+                    continue  # Connected after the batch was encoded.
+                slots = self._conflation.get(client)
+                if slots is None:
+                    slots = self._conflation[client] = ConflatedSlots(len(self.source.symbols))
+                if slots.dirty.any():
+                    slots.frames.append(self._encode_dirty(slots, binary))
+                slots.frames.append(data)
+                if not self._flush_conflated(client, slots, binary):
+                    disconnected.append(client)
+                else:
+                    self._schedule_write(client, slots)
+            self._drop_conflated(disconnected)
+
+    def _broadcast_conflated(
+        self,
+        prices: np.ndarray,
+        ts_ns,
+        symbol_ids: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Overwrite every price subscriber's per-symbol slots with this tick and
+        write whatever each socket accepts without blocking. A subscriber that
+        cannot keep up skips intermediate ticks instead of queueing them.
+        """
+        disconnected: List[socket.socket] = []
+        with self._price_lock:
+            subscribers = [(client, False) for client in self._price_clients]
+            subscribers += [(client, True) for client in self._binary_price_clients]
+            for client, binary in subscribers:
+                slots = self._conflation.get(client)
+                if slots is None:
+                    slots = self._conflation[client] = ConflatedSlots(len(self.source.symbols))
+                slots.overwrite(prices, ts_ns, symbol_ids)
+                if not self._flush_conflated(client, slots, binary):
+                    disconnected.append(client)
+                else:
+                    self._schedule_write(client, slots)
+            self._drop_conflated(disconnected)
+
+    def _drop_conflated(self, disconnected: List[socket.socket]) -> None:
+        for client in disconnected:
+            self._price_clients.discard(client)
+            self._binary_price_clients.discard(client)
+            self._conflation.pop(client, None)
+            with contextlib.suppress(OSError):
+                client.close()
+
+    def _encode_dirty(self, slots: ConflatedSlots, binary: bool) -> bytes:
+        symbol_ids, prices, ts_ns = slots.take()
+        if symbol_ids is None:
+            # Caught up: every slot is dirty, use the bulk encoders.
+            if binary:
+                return self._frame_encoder.encode(prices, ts_ns)
+            return self._text_formatter.format(prices) + MESSAGE_DELIMITER
+        if binary:
+            return encode_price_frame(symbol_ids, prices, ts_ns)
+        symbols = [self.source.symbols[idx] for idx in symbol_ids.tolist()]
+        return format_text_prices(symbols, prices.tolist()) + MESSAGE_DELIMITER
+
+    def _flush_conflated(
+        self, client: socket.socket, slots: ConflatedSlots, binary: bool
+    ) -> bool:
+        """Returns False when the subscriber has disconnected."""
+        while True:
+            if not slots.outbox:
+                if slots.frames:
+                    slots.outbox = memoryview(slots.frames.popleft())
+                elif slots.dirty.any():
+                    slots.outbox = memoryview(self._encode_dirty(slots, binary))
+                else:
+                    return True
+            try:
+                sent = client.send(slots.outbox)
+            except BlockingIOError:
+                return True
+            except OSError:
+                return False
+            slots.outbox = slots.outbox[sent:]
+            if slots.outbox:
+                return True
+
+    def _schedule_write(self, client: socket.socket, slots: ConflatedSlots) -> None:
+        """Hand ``client`` to the writer thread if it still has unsent data."""
+        if slots.scheduled or not slots.pending() or not self.writer_thread.is_alive():
+            return
+        slots.scheduled = True
+        self._write_ready.append(client)
+        with contextlib.suppress(OSError):
+            self._wake_send.send(b"\1")
+
+    def _write_loop(self) -> None:
+        """
+        Send subscriber backlogs as soon as their sockets become writable.
+        Only this thread touches the selector; the tick thread queues clients
+        in ``_write_ready`` and wakes it through a socket pair.
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake_recv, selectors.EVENT_READ)
+        try:
+            while not self._stop.is_set():
+                for key, _ in selector.select():
+                    if key.fileobj is self._wake_recv:
+                        with contextlib.suppress(BlockingIOError, InterruptedError):
+                            while self._wake_recv.recv(4096):
+                                pass
+                        while self._write_ready:
+                            self._watch_writable(selector, self._write_ready.popleft())
+                    elif not self._flush_backlog(key.fileobj):
+                        selector.unregister(key.fileobj)
+        finally:
+            selector.close()
+
+    def _watch_writable(self, selector: selectors.BaseSelector, client: socket.socket) -> None:
+        if client.fileno() < 0:
+            return  # Dropped since it was queued.
+        try:
+            key = selector.get_key(client)
+        except KeyError:
+            key = None
+        if key is not None and key.fileobj is not client:
+            # A closed subscriber's descriptor number was reused.
+            selector.unregister(key.fileobj)
+            key = None
+        if key is None:
+            selector.register(client, selectors.EVENT_WRITE)
+
+    def _flush_backlog(self, client: socket.socket) -> bool:
+        """Writer-thread flush; returns whether ``client`` still has a backlog."""
+        for lock, table, binary_set, drop in (
+            (self._price_lock, self._conflation, self._binary_price_clients, self._drop_conflated),
+            (self._news_lock, self._news_slots, None, self._drop_news),
+        ):
+            with lock:
+                slots = table.get(client)
+                if slots is None:
+                    continue
+                binary = binary_set is not None and client in binary_set
+                if not self._flush_conflated(client, slots, binary):
+                    drop([client])
+                    return False
+                slots.scheduled = slots.pending()
+                return slots.scheduled
+        return False
+
+    def _drop_news(self, disconnected: List[socket.socket]) -> None:
+        for client in disconnected:
+            self._news_clients.discard(client)
+            self._news_slots.pop(client, None)
+            with contextlib.suppress(OSError):
+                client.close()
+
+    def _next_prices(self) -> np.ndarray:
+        return self.source.next_prices()
+
+    def _serialize_prices(self, prices: np.ndarray) -> str:
+        return self._text_formatter.format(prices).decode()
 
     def _next_price(self, symbol: str) -> float:
-        current = self.price_prices.get(symbol, INITIAL_PRICES[symbol])
-        delta = random.gauss(0, RANDOM_WALK_STD)
-        new_price = max(0.01, current + delta)
-        self.price_prices[symbol] = new_price
-        return new_price
+        return self.source.next_price(symbol)
 
     def run(self) -> None:
         self.price_accept_thread.start()
         self.news_accept_thread.start()
+        self.writer_thread.start()
         print("[Gateway] Started price and news streams.")
         tick_count = 0
         try:
@@ -136,15 +648,40 @@ class GatewayServer:
         except KeyboardInterrupt:
             print("[Gateway] Shutting down.")
         finally:
-            self._stop.set()
-            self.price_server.close()
-            self.news_server.close()
-            for client in list(self._price_clients) + list(self._news_clients):
+            self.stop()
+            clients = self._price_clients | self._binary_price_clients | self._news_clients
+            for client in clients:
                 with contextlib.suppress(OSError):
                     client.close()
 
+    def replay(self, source: TickReplaySource, min_subscribers: int = 1) -> None:
+        """
+        Stream a historical tick file instead of the random walk, starting once
+        ``min_subscribers`` price clients are connected so runs are
+        reproducible. News keeps its wall-clock ``tick_interval`` cadence.
+        """
+        while len(self._price_clients) + len(self._binary_price_clients) < min_subscribers:
+            if self._stop.wait(0.05):
+                return
+        print(f"[Gateway] Replaying {source.path} ({source.total} ticks).")
+        next_news = time.perf_counter()
+        try:
+            for symbol_ids, prices, ts_ns in source.batches():
+                if self._stop.is_set():
+                    break
+                self.broadcast_batch(symbol_ids, prices, ts_ns)
+                if time.perf_counter() >= next_news:
+                    self.broadcast_news()
+                    next_news += self.tick_interval
+        except KeyboardInterrupt:
+            print("[Gateway] Shutting down.")
+        finally:
+            print(f"[Gateway] Replay finished: {source.report()}")
+
     def stop(self) -> None:
         self._stop.set()
+        with contextlib.suppress(OSError):
+            self._wake_send.send(b"\0")
         with contextlib.suppress(OSError):
             self.price_server.close()
             self.news_server.close()
@@ -156,8 +693,55 @@ def run_gateway(
     news_port: int = NEWS_FEED_PORT,
     tick_interval: float = TICK_INTERVAL_SECONDS,
     max_ticks: Optional[int] = None,
+    replay_path: Optional[str] = REPLAY_FILE,
+    replay_speed: float = REPLAY_SPEED,
+) -> None:
+    metrics = gateway_metrics(shared=True)
+    try:
+        _serve_gateway(
+            metrics, host, price_port, news_port, tick_interval, max_ticks, replay_path, replay_speed
+        )
+    finally:
+        metrics.close()
+        metrics.unlink()
+
+
+def _serve_gateway(
+    metrics: ProcessMetrics,
+    host: str,
+    price_port: int,
+    news_port: int,
+    tick_interval: float,
+    max_ticks: Optional[int],
+    replay_path: Optional[str],
+    replay_speed: float,
 ) -> None:
-    server = GatewayServer(host=host, price_port=price_port, news_port=news_port, tick_interval=tick_interval)
+    if replay_path:
+        source = TickReplaySource(replay_path, speed=replay_speed)
+        server = GatewayServer(
+            host=host,
+            price_port=price_port,
+            news_port=news_port,
+            tick_interval=tick_interval,
+            symbols=source.symbols,
+            metrics=metrics,
+        )
+        server.price_accept_thread.start()
+        server.news_accept_thread.start()
+        server.writer_thread.start()
+        try:
+            server.replay(source)
+        finally:
+            server.stop()
+        return
+
+    server = GatewayServer(
+        host=host,
+        price_port=price_port,
+        news_port=news_port,
+        tick_interval=tick_interval,
+        metrics=metrics,
+    )
     if max_ticks is None:
         server.run()
         return
@@ -0,0 +1,250 @@
+"""
+Incremental per-symbol indicators for the Strategy.
+
+``IncrementalIndicators`` keeps running sums over a circular price buffer so a
+new tick updates the short/long moving averages, an EMA and the rolling
+variance in O(1), independent of window length. All state lives in
+preallocated NumPy arrays with one row per symbol, so ``update_many`` can
+advance every symbol that ticked in a cycle with a handful of array ops.
+A symbol costs ``8 * long_window + 44`` bytes, and ``state`` hands the arrays
+to ``np.savez`` for checkpoints.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+
+from config import EMA_SPAN, LONG_WINDOW, SHORT_WINDOW
+
+SIGNAL_SELL = -1
+SIGNAL_NONE = 0
+SIGNAL_BUY = 1
+
+SIGNAL_NAMES = {SIGNAL_BUY: "BUY", SIGNAL_SELL: "SELL", SIGNAL_NONE: None}
+
+# Averages closer than this (relative) are treated as equal, so running-sum
+# rounding cannot invent a crossover on a flat series.
+_CROSS_TOLERANCE = 1e-9
+
+# Per-row arrays that make up the checkpointable state.
+_STATE_ARRAYS = (
+    "history",
+    "head",
+    "filled",
+    "short_sum",
+    "long_sum",
+    "long_sumsq",
+    "ema",
+    "_since_resync",
+)
+
+
+class IncrementalIndicators:
+    __slots__ = ("count", "short_window", "long_window", "alpha") + _STATE_ARRAYS
+
+    def __init__(
+        self,
+        count: int,
+        short_window: int = SHORT_WINDOW,
+        long_window: int = LONG_WINDOW,
+        ema_span: int = EMA_SPAN,
+    ) -> None:
+        if not 0 < short_window <= long_window:
+            raise ValueError("short_window must be positive and no longer than long_window")
+        self.count = count
+        self.short_window = short_window
+        self.long_window = long_window
+        self.alpha = 2.0 / (ema_span + 1)
+        self.history = np.zeros((count, long_window), dtype=np.float64)
+        self.head = np.zeros(count, dtype=np.int32)
+        self.filled = np.zeros(count, dtype=np.int32)
+        self.short_sum = np.zeros(count, dtype=np.float64)
+        self.long_sum = np.zeros(count, dtype=np.float64)
+        self.long_sumsq = np.zeros(count, dtype=np.float64)
+        self.ema = np.full(count, np.nan, dtype=np.float64)
+        # Updates since the row's sums were last recomputed from the buffer.
+        self._since_resync = np.zeros(count, dtype=np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in _STATE_ARRAYS)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """The per-row arrays (live, not copies) plus the window sizes."""
+        state = {name: getattr(self, name) for name in _STATE_ARRAYS}
+        state["windows"] = np.array([self.short_window, self.long_window])
+        return state
+
+    def load_state(
+        self,
+        state: Mapping[str, np.ndarray],
+        rows: Optional[np.ndarray] = None,
+        source_rows: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Copy ``source_rows`` of a ``state`` dict into ``rows`` (all rows by
+        default). The windows must match the ones the state was saved with.
+        """
+        if tuple(np.asarray(state["windows"]).tolist()) != (self.short_window, self.long_window):
+            raise ValueError("Indicator state was saved with different windows")
+        rows = slice(None) if rows is None else rows
+        source_rows = slice(None) if source_rows is None else source_rows
+        for name in _STATE_ARRAYS:
+            getattr(self, name)[rows] = np.asarray(state[name])[source_rows]
+
+    def update(self, idx: int, price: float) -> int:
+        """Add one price for row ``idx`` and return its crossover signal."""
+        long_window = self.long_window
+        short_window = self.short_window
+        row = self.history[idx]
+        head = int(self.head[idx])
+        filled = int(self.filled[idx])
+
+        if filled >= short_window:
+            self.short_sum[idx] -= row[(head - short_window) % long_window]
+        if filled == long_window:
+            leaving = row[head]
+            self.long_sum[idx] -= leaving
+            self.long_sumsq[idx] -= leaving * leaving
+        else:
+            filled += 1
+            self.filled[idx] = filled
+
+        row[head] = price
+        self.short_sum[idx] += price
+        self.long_sum[idx] += price
+        self.long_sumsq[idx] += price * price
+        self.head[idx] = (head + 1) % long_window
+
+        ema = self.ema[idx]
+        self.ema[idx] = price if ema != ema else ema + self.alpha * (price - ema)
+
+        since = self._since_resync[idx] + 1
+        if since >= long_window:
+            self._resync(idx)
+            since = 0
+        self._since_resync[idx] = since
+
+        if filled < long_window:
+            return SIGNAL_NONE
+        short_avg = self.short_sum[idx] / short_window
+        long_avg = self.long_sum[idx] / long_window
+        diff = short_avg - long_avg
+        if abs(diff) <= _CROSS_TOLERANCE * abs(long_avg):
+            return SIGNAL_NONE
+        return SIGNAL_BUY if diff > 0 else SIGNAL_SELL
+
+    def update_many(self, rows: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """
+        Vectorized ``update`` for distinct ``rows``; returns one signal per
+        row as an int8 array. Use ``update_sequence`` when rows may repeat.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        long_window = self.long_window
+        short_window = self.short_window
+        history = self.history
+        heads = self.head[rows]
+        filled = self.filled[rows]
+
+        evict = filled >= short_window
+        self.short_sum[rows[evict]] -= history[rows[evict], (heads[evict] - short_window) % long_window]
+        full = filled == long_window
+        leaving = history[rows[full], heads[full]]
+        self.long_sum[rows[full]] -= leaving
+        self.long_sumsq[rows[full]] -= leaving * leaving
+        filled = np.minimum(filled + 1, long_window)
+        self.filled[rows] = filled
+
+        history[rows, heads] = prices
+        self.short_sum[rows] += prices
+        self.long_sum[rows] += prices
+        self.long_sumsq[rows] += prices * prices
+        self.head[rows] = (heads + 1) % long_window
+
+        ema = self.ema[rows]
+        self.ema[rows] = np.where(np.isnan(ema), prices, ema + self.alpha * (prices - ema))
+
+        since = self._since_resync[rows] + 1
+        due = since >= long_window
+        if due.any():
+            self._resync(rows[due])
+            since[due] = 0
+        self._since_resync[rows] = since
+        return self.signals(rows)
+
+    def update_sequence(self, rows: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """
+        Apply ticks in order when a row may appear more than once: the k-th
+        tick of every row goes in the k-th vectorized pass.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        count = len(rows)
+        signals = np.zeros(count, dtype=np.int8)
+        if not count:
+            return signals
+        order = np.argsort(rows, kind="stable")
+        ordered = rows[order]
+        positions = np.arange(count)
+        group_start = np.where(np.r_[True, ordered[1:] != ordered[:-1]], positions, 0)
+        rank = np.empty(count, dtype=np.int64)
+        rank[order] = positions - np.maximum.accumulate(group_start)
+        for level in range(int(rank.max()) + 1):
+            selected = np.flatnonzero(rank == level)
+            signals[selected] = self.update_many(rows[selected], prices[selected])
+        return signals
+
+    def signals(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Current crossover signal for ``rows`` (all rows by default)."""
+        if rows is None:
+            rows = np.arange(self.count)
+        short_avg = self.short_sum[rows] / self.short_window
+        long_avg = self.long_sum[rows] / self.long_window
+        diff = short_avg - long_avg
+        signals = np.sign(diff).astype(np.int8)
+        signals[np.abs(diff) <= _CROSS_TOLERANCE * np.abs(long_avg)] = SIGNAL_NONE
+        signals[self.filled[rows] < self.long_window] = SIGNAL_NONE
+        return signals
+
+    def _resync(self, rows) -> None:
+        """Recompute rows' sums from their buffers to shed accumulated rounding."""
+        rows = np.atleast_1d(rows)
+        window = self.history[rows]
+        filled = self.filled[rows][:, None]
+        head = self.head[rows][:, None]
+        # Until a row fills up, its prices sit in the first ``filled`` slots.
+        held = np.where(np.arange(self.long_window) < filled, window, 0.0)
+        back = np.arange(1, self.short_window + 1)
+        recent = np.take_along_axis(window, (head - back) % self.long_window, axis=1)
+        self.long_sum[rows] = held.sum(axis=1)
+        self.long_sumsq[rows] = (held * held).sum(axis=1)
+        self.short_sum[rows] = np.where(back <= filled, recent, 0.0).sum(axis=1)
+
+    def short_mean(self, idx: Optional[int] = None):
+        return self._mean(self.short_sum, self.short_window, idx)
+
+    def long_mean(self, idx: Optional[int] = None):
+        return self._mean(self.long_sum, self.long_window, idx)
+
+    def _mean(self, sums: np.ndarray, window: int, idx: Optional[int]):
+        counts = np.minimum(self.filled, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        return means if idx is None else float(means[idx])
+
+    def variance(self, idx: Optional[int] = None):
+        """Population variance over each row's current long window."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.long_sum / self.filled
+            variance = np.maximum(self.long_sumsq / self.filled - mean * mean, 0.0)
+        return variance if idx is None else float(variance[idx])
+
+    def zscore(self, idx: Optional[int] = None):
+        """Distance of the latest price from the long mean, in standard deviations."""
+        latest = self.history[np.arange(self.count), (self.head - 1) % self.long_window]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scores = (latest - self.long_mean()) / np.sqrt(self.variance())
+        return scores if idx is None else float(scores[idx])
@@ -0,0 +1,209 @@
+"""
+Low-overhead latency histograms for the per-hop measurements.
+
+``LatencyHistogram`` uses HDR-style log-linear buckets: values below 128 ns
+get one bucket each, and every further power of two is split into 64
+buckets, so any recorded value is known to within 1/64 (~1.6%) while the
+whole range up to ~18 minutes fits in a couple of thousand int64 counters.
+``record_many`` buckets a NumPy array of samples in one vectorized pass.
+
+All timestamps compared across processes come from ``time.monotonic_ns``,
+which reads the same system-wide monotonic clock in every process on the
+host, unlike ``time.time`` it never jumps when the wall clock is adjusted.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import LATENCY_REPORT_INTERVAL_SECONDS
+
+_SUB_BITS = 7
+_SUB_COUNT = 1 << _SUB_BITS  # exact buckets below 128 ns
+_HALF = _SUB_COUNT // 2  # buckets per further power of two
+_MAX_BITS = 40  # values are clamped to 2**40 ns (~18 minutes)
+_BUCKETS = _SUB_COUNT + (_MAX_BITS - _SUB_BITS) * _HALF
+_MAX_VALUE = (1 << _MAX_BITS) - 1
+_MAX_SHIFT = _MAX_BITS - _SUB_BITS + 1  # first shift past _MAX_VALUE
+_HEADER_CELLS = 2
+HISTOGRAM_BYTES = (_HEADER_CELLS + _BUCKETS) * 8
+
+_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _bucket_index(values: np.ndarray) -> np.ndarray:
+    values = np.clip(values, 0, _MAX_VALUE).astype(np.int64)
+    _, exponent = np.frexp(values.astype(np.float64))  # bit length for ints
+    shift = np.maximum(exponent - _SUB_BITS, 0)
+    top = values >> shift  # the 7 most significant bits
+    return np.where(shift == 0, values, _SUB_COUNT + (shift - 1) * _HALF + (top - _HALF))
+
+
+def _bucket_floor(index: int) -> int:
+    if index < _SUB_COUNT:
+        return index
+    shift, offset = divmod(index - _SUB_COUNT, _HALF)
+    return (_HALF + offset) << (shift + 1)
+
+
+class LatencyHistogram:
+    """
+    ``buffer`` (``HISTOGRAM_BYTES`` writable bytes, e.g. a slice of a
+    metrics segment) backs the counters; by default they are private.
+    """
+
+    def __init__(self, buffer=None) -> None:
+        if buffer is None:
+            buffer = bytearray(HISTOGRAM_BYTES)
+        # sum_ns, max_ns, then one count per bucket (the total is their sum).
+        self._cells = memoryview(buffer).cast("q")
+        self._header = np.ndarray((_HEADER_CELLS,), dtype=np.int64, buffer=buffer)
+        self.counts = np.ndarray(
+            (_BUCKETS,), dtype=np.int64, buffer=buffer, offset=_HEADER_CELLS * 8
+        )
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def sum_ns(self) -> int:
+        return self._cells[0]
+
+    @property
+    def max_ns(self) -> int:
+        return self._cells[1]
+
+    def record(self, value_ns: int) -> None:
+        """Scalar fast path for a Python int: integer math, no temporary arrays."""
+        if value_ns < 0:
+            value_ns = 0
+        shift = value_ns.bit_length() - _SUB_BITS
+        if shift <= 0:
+            cell = _HEADER_CELLS + value_ns
+        elif shift < _MAX_SHIFT:
+            # Same bucket as _bucket_index: shift * _HALF + the top 7 bits.
+            cell = _HEADER_CELLS + shift * _HALF + (value_ns >> shift)
+        else:
+            cell = _HEADER_CELLS + _BUCKETS - 1
+        cells = self._cells
+        cells[cell] += 1
+        cells[0] += value_ns
+        if value_ns > cells[1]:
+            cells[1] = value_ns
+
+    def record_many(self, values_ns: np.ndarray) -> None:
+        values_ns = np.asarray(values_ns, dtype=np.int64)
+        if not len(values_ns):
+            return
+        np.add.at(self.counts, _bucket_index(values_ns), 1)
+        header = self._header
+        header[0] += int(values_ns.sum())
+        header[1] = max(int(header[1]), int(values_ns.max()))
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts += other.counts
+        self._header[0] += other.sum_ns
+        self._header[1] = max(self.max_ns, other.max_ns)
+
+    def copy(self) -> "LatencyHistogram":
+        """A private snapshot, e.g. of a histogram another process is writing."""
+        snapshot = LatencyHistogram()
+        snapshot.counts[:] = self.counts
+        snapshot._header[:] = self._header
+        return snapshot
+
+    def subtract(self, earlier: "LatencyHistogram") -> None:
+        """Keep only what was recorded since ``earlier`` (a ``copy``); max is kept."""
+        self.counts -= earlier.counts
+        self._header[0] -= earlier.sum_ns
+
+    def reset(self) -> None:
+        self._header[:] = 0
+        self.counts[:] = 0
+
+    def count_below(self, bounds) -> List[int]:
+        """Values recorded below each bound; exact when bounds are powers of two."""
+        cumulative = np.cumsum(self.counts)
+        indexes = _bucket_index(np.asarray(bounds, dtype=np.int64)).tolist()
+        return [int(cumulative[index - 1]) if index else 0 for index in indexes]
+
+    def release(self) -> None:
+        """Drop the buffer export so a shared-memory backing can be closed."""
+        self._cells.release()
+
+    def percentile(self, percent: float) -> int:
+        """Lower bound (ns) of the bucket holding the ``percent`` quantile."""
+        cumulative = np.cumsum(self.counts)
+        total = int(cumulative[-1])
+        if not total:
+            return 0
+        rank = max(1, int(np.ceil(total * percent / 100.0)))
+        index = int(np.searchsorted(cumulative, rank))
+        return min(_bucket_floor(index), self.max_ns)
+
+    @property
+    def mean_ns(self) -> float:
+        total = self.total
+        return self.sum_ns / total if total else 0.0
+
+    def summary(self) -> str:
+        total = self.total
+        if not total:
+            return "n=0"
+        quantiles = " ".join(
+            f"p{percent:g}={self.percentile(percent) / 1000:.1f}us" for percent in _PERCENTILES
+        )
+        return (
+            f"n={total} mean={self.mean_ns / 1000:.1f}us {quantiles} "
+            f"max={self.max_ns / 1000:.1f}us"
+        )
+
+
+class LatencyRecorder:
+    """
+    Named per-hop histograms for one process, reported on an interval.
+    ``histograms`` pre-seeds hops with existing (e.g. shared-memory)
+    histograms; any other hop gets a private one on first use.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float = LATENCY_REPORT_INTERVAL_SECONDS,
+        emit: Callable[[str], None] = print,
+        histograms: Optional[Dict[str, LatencyHistogram]] = None,
+    ) -> None:
+        self.name = name
+        self.interval = interval
+        self.emit = emit
+        self.hops: Dict[str, LatencyHistogram] = dict(histograms or {})
+        self._last_report = time.monotonic()
+
+    def histogram(self, hop: str) -> LatencyHistogram:
+        histogram = self.hops.get(hop)
+        if histogram is None:
+            histogram = self.hops[hop] = LatencyHistogram()
+        return histogram
+
+    def record(self, hop: str, values_ns) -> None:
+        self.histogram(hop).record_many(np.atleast_1d(values_ns))
+
+    def report(self, reset: bool = False) -> None:
+        for hop, histogram in self.hops.items():
+            if not histogram.total:
+                continue
+            self.emit(f"[{self.name}] latency {hop}: {histogram.summary()}")
+            if reset:
+                histogram.reset()
+        self._last_report = time.monotonic()
+
+    def maybe_report(self, now: Optional[float] = None) -> None:
+        if self.interval <= 0 or not self.hops:
+            return
+        now = time.monotonic() if now is None else now
+        if now - self._last_report >= self.interval:
+            self.report()
@@ -0,0 +1,72 @@
+"""
+Buffered console logging off the hot path.
+
+``LineLogger.log`` only appends a line to a bounded queue; a background
+thread drains everything queued so far and writes it with a single
+``write``/``flush`` pair. When the queue is full new lines are dropped and
+counted rather than blocking the caller, so slow stdout can never stall a
+socket loop.
+"""
+
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+from typing import Dict, List, Optional, TextIO
+
+from config import LOG_QUEUE_SIZE
+
+_STOP = object()
+
+
+class LineLogger:
+    def __init__(
+        self, stream: Optional[TextIO] = None, max_pending: int = LOG_QUEUE_SIZE
+    ) -> None:
+        self.stream = stream
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self.written = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="line-logger", daemon=True)
+
+    def start(self) -> "LineLogger":
+        self._thread.start()
+        return self
+
+    def log(self, line: str) -> None:
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Write whatever is queued, then end the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self._queue.qsize(), "written": self.written, "dropped": self.dropped}
+
+    def _run(self) -> None:
+        get = self._queue.get
+        while True:
+            lines: List[str] = [get()]
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = any(line is _STOP for line in lines)
+            if done:
+                lines = [line for line in lines if line is not _STOP]
+            if lines:
+                # Resolved per batch so pytest's capsys and redirects apply.
+                stream = self.stream or sys.stdout
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+                self.written += len(lines)
+            if done:
+                return
@@ -2,28 +2,60 @@ from __future__ import annotations
 
 import multiprocessing as mp
 
+from async_gateway import run_async_gateway
+from config import (
+    GATEWAY_IMPL,
+    METRICS_PORT,
+    REPLAY_FILE,
+    STRATEGY_SHARD_MODE,
+    STRATEGY_SHARDS,
+    SYMBOLS,
+)
 from gateway import run_gateway
+from metrics import MetricsServer
 from order_manager import run_ordermanager
 from orderbook import run_orderbook
-from strategy import run_strategy
+from strategy import partition_symbols, run_strategy
+
+
+def strategy_specs(
+    shards: int = STRATEGY_SHARDS, mode: str = STRATEGY_SHARD_MODE, doorbell_lock=None
+):
+    """One Strategy process per non-empty symbol partition."""
+    if shards <= 1:
+        return [("Strategy", run_strategy, {"doorbell_lock": doorbell_lock})]
+    parts = [part for part in partition_symbols(SYMBOLS, shards, mode) if part]
+    specs = []
+    for shard, symbols in enumerate(parts, start=1):
+        name = f"Strategy-{shard}/{len(parts)}"
+        kwargs = {"symbols": symbols, "name": name, "doorbell_lock": doorbell_lock}
+        specs.append((name, run_strategy, kwargs))
+    return specs
 
 
 def main() -> None:
+    if REPLAY_FILE and GATEWAY_IMPL == "asyncio":
+        raise ValueError(
+            'REPLAY_FILE needs the threaded Gateway; set GATEWAY_IMPL = "threaded" to replay.'
+        )
     ctx = mp.get_context("spawn")
-    price_lock = ctx.Lock()
+    gateway = run_async_gateway if GATEWAY_IMPL == "asyncio" else run_gateway
 
     process_specs = [
-        ("OrderManager", run_ordermanager, ()),
-        ("Gateway", run_gateway, ()),
-        ("OrderBook", run_orderbook, (price_lock,)),
-        ("Strategy", run_strategy, (price_lock,)),
-    ]
+        ("OrderManager", run_ordermanager, {}),
+        ("Gateway", gateway, {}),
+        ("OrderBook", run_orderbook, {}),
+    ] + strategy_specs(doorbell_lock=ctx.Lock())
 
     processes = []
-    for name, target, args in process_specs:
-        process = ctx.Process(target=target, name=name, args=args)
+    for name, target, kwargs in process_specs:
+        process = ctx.Process(target=target, name=name, kwargs=kwargs)
         process.start()
         processes.append(process)
+    # Each child publishes its own metrics segment; this only reads them.
+    metrics_server = None
+    if METRICS_PORT:
+        metrics_server = MetricsServer([name for name, _, _ in process_specs]).start()
 
     try:
         for process in processes:
@@ -35,6 +67,8 @@ def main() -> None:
     finally:
         for process in processes:
             process.join()
+        if metrics_server is not None:
+            metrics_server.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+"""
+Per-process counters and latency histograms with a Prometheus-style text
+exposition.
+
+Each process owns one ``ProcessMetrics`` block, normally a shared-memory
+segment named ``metrics_name(SHARED_MEMORY_NAME, process)``. The block is
+self-describing: a small header and the counter/histogram names are followed
+by int64 counter cells and one ``LatencyHistogram`` per name. Only the owning
+process writes, so updates take no lock (keep each counter to one writer
+thread, or guard it as the OrderManager does). ``MetricsServer`` in ``main``
+maps every segment read-only and serves ``render_metrics`` on ``/metrics``.
+
+``python metrics.py --bench`` measures the per-event cost of a counter
+increment and a scalar histogram record.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config import HOST, METRICS_PORT, SHARED_MEMORY_NAME
+from latency import HISTOGRAM_BYTES, LatencyHistogram
+
+METRICS_MAGIC = b"PFMETR01"
+# magic, counter count, histogram count, name blob length
+METRICS_HEADER = struct.Struct("<8sIII4x")
+METRIC_PREFIX = "pf_"
+# Prometheus ``le`` bounds: every power of two from 1 us to ~18 minutes.
+_LE_BOUNDS = [1 << bits for bits in range(10, 41)]
+_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def metrics_name(base: str, process: str) -> str:
+    # Kept short: macOS caps shared-memory names at 31 characters.
+    return f"{base}_m_{re.sub(r'[^0-9A-Za-z]+', '_', process).strip('_').lower()}"
+
+
+class Counter:
+    __slots__ = ("_cells", "_index")
+
+    def __init__(self, cells: memoryview, index: int) -> None:
+        self._cells = cells
+        self._index = index
+
+    def inc(self, amount: int = 1) -> None:
+        self._cells[self._index] += amount
+
+    @property
+    def value(self) -> int:
+        return self._cells[self._index]
+
+
+class ProcessMetrics:
+    """
+    Counters and histograms for one process. With ``shared_name`` the block
+    lives in shared memory for ``MetricsServer`` to read; without it the
+    block is private, which is what components get when run standalone.
+    """
+
+    def __init__(
+        self,
+        process: str,
+        counters: Sequence[str] = (),
+        histograms: Sequence[str] = (),
+        shared_name: Optional[str] = None,
+        force_recreate: bool = True,
+    ) -> None:
+        names = "\n".join([process, *counters, *histograms]).encode()
+        blob = -(-len(names) // 8) * 8
+        size = (
+            METRICS_HEADER.size
+            + blob
+            + len(counters) * 8
+            + len(histograms) * HISTOGRAM_BYTES
+        )
+        self.shm: Optional[shared_memory.SharedMemory] = None
+        if shared_name is None:
+            buf = memoryview(bytearray(size))
+        else:
+            if force_recreate:
+                _unlink_existing(shared_name)
+            self.shm = shared_memory.SharedMemory(name=shared_name, create=True, size=size)
+            buf = self.shm.buf
+        buf[: METRICS_HEADER.size] = METRICS_HEADER.pack(
+            METRICS_MAGIC, len(counters), len(histograms), len(names)
+        )
+        buf[METRICS_HEADER.size : METRICS_HEADER.size + len(names)] = names
+        self._map(buf, process, list(counters), list(histograms), METRICS_HEADER.size + blob)
+
+    @classmethod
+    def attach(cls, shared_name: str) -> "ProcessMetrics":
+        """Map an existing segment written by another process."""
+        shm = shared_memory.SharedMemory(name=shared_name)
+        try:
+            magic, counters, histograms, length = METRICS_HEADER.unpack_from(shm.buf)
+            if magic != METRICS_MAGIC:
+                raise ValueError(f"{shared_name}: not a metrics segment")
+            start = METRICS_HEADER.size
+            names = bytes(shm.buf[start : start + length]).decode().split("\n")
+        except Exception:
+            shm.close()
+            raise
+        metrics = cls.__new__(cls)
+        metrics.shm = shm
+        metrics._map(
+            shm.buf,
+            names[0],
+            names[1 : 1 + counters],
+            names[1 + counters : 1 + counters + histograms],
+            start + -(-length // 8) * 8,
+        )
+        return metrics
+
+    def _map(
+        self, buf: memoryview, process: str, counters: List[str], histograms: List[str], offset: int
+    ) -> None:
+        self.process = process
+        end = offset + len(counters) * 8
+        self._cells = buf[offset:end].cast("q")
+        self.counters = {name: Counter(self._cells, i) for i, name in enumerate(counters)}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        for name in histograms:
+            self.histograms[name] = LatencyHistogram(buf[end : end + HISTOGRAM_BYTES])
+            end += HISTOGRAM_BYTES
+
+    def counter(self, name: str) -> Counter:
+        return self.counters[name]
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        return self.histograms[name]
+
+    def snapshot(self) -> Dict[str, int]:
+        return {name: counter.value for name, counter in self.counters.items()}
+
+    def close(self) -> None:
+        # Every view into the segment must go before SharedMemory.close.
+        for histogram in self.histograms.values():
+            histogram.release()
+        self.histograms = {}
+        self.counters = {}
+        self._cells.release()
+        if self.shm is not None:
+            self.shm.close()
+
+    def unlink(self) -> None:
+        if self.shm is not None:
+            with contextlib.suppress(FileNotFoundError):
+                self.shm.unlink()
+
+
+def _unlink_existing(name: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        shm = shared_memory.SharedMemory(name=name)
+        shm.close()
+        shm.unlink()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_metrics(blocks: Iterable[ProcessMetrics]) -> str:
+    """
+    Prometheus text format: ``pf_<counter>{process=...}`` counters, and
+    ``pf_latency_ns`` histograms with power-of-two ``le`` bounds plus
+    ``pf_latency_quantile_ns`` gauges from the full-resolution buckets.
+    """
+    blocks = list(blocks)
+    families: Dict[str, List[str]] = {}
+    for block in blocks:
+        process = _label(block.process)
+        for name, value in block.snapshot().items():
+            families.setdefault(METRIC_PREFIX + name, []).append(
+                f'{METRIC_PREFIX}{name}{{process="{process}"}} {value}'
+            )
+    lines: List[str] = []
+    for family, samples in families.items():
+        lines.append(f"# TYPE {family} counter")
+        lines.extend(samples)
+
+    histogram_lines: List[str] = []
+    quantile_lines: List[str] = []
+    for block in blocks:
+        for name, histogram in block.histograms.items():
+            labels = f'process="{_label(block.process)}",name="{_label(name)}"'
+            total = histogram.total
+            for bound, below in zip(_LE_BOUNDS, histogram.count_below(_LE_BOUNDS)):
+                histogram_lines.append(
+                    f'{METRIC_PREFIX}latency_ns_bucket{{{labels},le="{bound}"}} {min(below, total)}'
+                )
+            histogram_lines.append(f'{METRIC_PREFIX}latency_ns_bucket{{{labels},le="+Inf"}} {total}')
+            histogram_lines.append(f"{METRIC_PREFIX}latency_ns_sum{{{labels}}} {histogram.sum_ns}")
+            histogram_lines.append(f"{METRIC_PREFIX}latency_ns_count{{{labels}}} {total}")
+            for quantile in _QUANTILES:
+                quantile_lines.append(
+                    f'{METRIC_PREFIX}latency_quantile_ns{{{labels},quantile="{quantile:g}"}} '
+                    f"{histogram.percentile(quantile * 100)}"
+                )
+    if histogram_lines:
+        lines.append(f"# TYPE {METRIC_PREFIX}latency_ns histogram")
+        lines.extend(histogram_lines)
+        lines.append(f"# TYPE {METRIC_PREFIX}latency_quantile_ns gauge")
+        lines.extend(quantile_lines)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serves ``GET /metrics`` for the named processes' segments on a
+    background thread. Segments are mapped per scrape, so processes that
+    start late or restart (recreating their segment) are picked up.
+    """
+
+    def __init__(
+        self,
+        processes: Sequence[str],
+        host: str = HOST,
+        port: int = METRICS_PORT,
+        base: str = SHARED_MEMORY_NAME,
+    ) -> None:
+        self.segments = [metrics_name(base, process) for process in processes]
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server API
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = server.scrape().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:  # noqa: A002
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+
+    def start(self) -> "MetricsServer":
+        self._thread.start()
+        print(f"[Main] Metrics on http://{self.httpd.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def scrape(self) -> str:
+        blocks: List[ProcessMetrics] = []
+        try:
+            for segment in self.segments:
+                with contextlib.suppress(FileNotFoundError, ValueError):
+                    blocks.append(ProcessMetrics.attach(segment))
+            return render_metrics(blocks)
+        finally:
+            for block in blocks:
+                block.close()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def benchmark(events: int = 1_000_000) -> Dict[str, float]:
+    """Nanoseconds per counter increment and per scalar histogram record."""
+    block = ProcessMetrics("Bench", ["events_total"], ["bench"])
+    counter = block.counter("events_total")
+    histogram = block.histogram("bench")
+    values = np.random.default_rng(0).integers(1_000, 10_000_000, size=1024).tolist()
+    try:
+        started = time.perf_counter_ns()
+        for i in range(events):
+            values[i & 1023]
+        loop_ns = (time.perf_counter_ns() - started) / events
+        started = time.perf_counter_ns()
+        for i in range(events):
+            counter.inc(values[i & 1023])
+        inc_ns = (time.perf_counter_ns() - started) / events
+        started = time.perf_counter_ns()
+        for i in range(events):
+            histogram.record(values[i & 1023])
+        record_ns = (time.perf_counter_ns() - started) / events
+    finally:
+        block.close()
+    return {"counter.inc": inc_ns - loop_ns, "histogram.record": record_ns - loop_ns}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Metrics utilities.")
+    parser.add_argument("--bench", action="store_true", help="measure per-event overhead")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    if args.bench:
+        for name, cost in benchmark(args.events).items():
+            print(f"{name:<18} {cost:7.1f} ns/event")
+        return
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
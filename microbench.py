@@ -0,0 +1,390 @@
+"""
+Microbenchmarks for the hot paths, each parameterized by input size.
+
+Every case prepares its input once, then ``timeit`` picks a loop count and
+the fastest of ``repeat`` timings is kept (the run least disturbed by the
+rest of the machine), reported as nanoseconds per item. ``--save`` writes
+the results as a baseline and ``--check`` compares against one, exiting 1
+when any case is still more than ``--threshold`` slower after being
+re-timed (see ``check``). Baselines are specific to a host and Python
+build, so save and check on the same machine:
+
+    python microbench.py --save microbench.json
+    python microbench.py --check microbench.json
+
+``MICROBENCH_BASELINE=microbench.json pytest`` runs the same check as part
+of the test suite.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from typing import Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmark import benchmark_symbols, git_commit
+from config import HOST, SHORT_WINDOW
+
+DEFAULT_THRESHOLD = 0.10
+
+# name -> (sizes, factory); the factory is a context manager yielding a
+# zero-argument callable that processes ``size`` items.
+Factory = Callable[[int], ContextManager[Callable[[], None]]]
+CASES: Dict[str, Tuple[Sequence[int], Factory]] = {}
+
+
+def case(name: str, sizes: Sequence[int]) -> Callable[[Callable], Factory]:
+    def register(function: Callable) -> Factory:
+        factory = contextlib.contextmanager(function)
+        CASES[name] = (tuple(sizes), factory)
+        return factory
+
+    return register
+
+
+@contextlib.contextmanager
+def _price_book(symbols: Sequence[str]) -> Iterator:
+    from shared_memory_utils import SharedPriceBook
+
+    book = SharedPriceBook(
+        symbols, name=f"pfmb{os.getpid()}", create=True, force_recreate=True
+    )
+    try:
+        yield book
+    finally:
+        book.close()
+        book.unlink()
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        yield
+
+
+@case("orderbook.handle_price_token", sizes=(1, 100, 1000))
+def _handle_price_token(size: int):
+    from orderbook import _handle_price_token, orderbook_metrics
+
+    symbols = benchmark_symbols(max(size, 3))
+    tokens = [f"{symbols[i % len(symbols)]},{100 + i * 0.01:.2f}".encode() for i in range(size)]
+    metrics = orderbook_metrics()
+    with _price_book(symbols) as book:
+
+        updates = metrics.counter("price_updates_total")
+        publish = metrics.histogram("publish_prices")
+
+        def run() -> None:
+            # One received chunk: per-token publish, per-chunk metrics (_recv_loop).
+            started = time.perf_counter_ns()
+            published = 0
+            for token in tokens:
+                published += _handle_price_token(token, book, None, None, metrics)
+            updates.inc(published)
+            publish.record(time.perf_counter_ns() - started)
+
+        yield run
+
+
+@case("orderbook.handle_price_records", sizes=(3, 1000, 10000))
+def _handle_price_records(size: int):
+    from orderbook import _handle_price_records, orderbook_metrics
+    from protocol import PRICE_WIRE_DTYPE
+
+    records = np.zeros(size, dtype=PRICE_WIRE_DTYPE)
+    records["symbol_id"] = np.arange(size)
+    records["price"] = 100.0
+    records["origin_ns"] = time.monotonic_ns()
+    payload = records.tobytes()
+    id_to_row = np.arange(size, dtype=np.int64)
+    metrics = orderbook_metrics()
+    with _price_book(benchmark_symbols(size)) as book:
+        yield lambda: _handle_price_records(payload, id_to_row, book, None, None, None, metrics)
+
+
+@case("SharedPriceBook.update", sizes=(3, 1000))
+def _book_update(size: int):
+    symbols = benchmark_symbols(size)
+    with _price_book(symbols) as book:
+
+        def run() -> None:
+            for symbol in symbols:
+                book.update(symbol, 101.0)
+
+        yield run
+
+
+@case("SharedPriceBook.update_many", sizes=(3, 1000, 10000))
+def _book_update_many(size: int):
+    rows = np.arange(size)
+    prices = np.full(size, 101.0)
+    ts_ns = np.full(size, time.time_ns(), dtype=np.int64)
+    with _price_book(benchmark_symbols(size)) as book:
+        yield lambda: book.update_many(rows, prices, ts_ns)
+
+
+@case("SharedPriceBook.read", sizes=(3, 1000))
+def _book_read(size: int):
+    symbols = benchmark_symbols(size)
+    with _price_book(symbols) as book:
+
+        def run() -> None:
+            for symbol in symbols:
+                book.read(symbol)
+
+        yield run
+
+
+@case("SharedPriceBook.read_records", sizes=(3, 1000, 10000))
+def _book_read_records(size: int):
+    with _price_book(benchmark_symbols(size)) as book:
+        yield book.read_records
+
+
+@case("SharedPriceBook.snapshot", sizes=(3, 1000, 10000))
+def _book_snapshot(size: int):
+    with _price_book(benchmark_symbols(size)) as book:
+        yield book.snapshot
+
+
+@contextlib.contextmanager
+def _engine(symbols: Sequence[str], order_protocol: str = "binary") -> Iterator:
+    from order_sender import OrderSender
+    from strategy import StrategyEngine
+
+    sender = OrderSender(HOST, 0, name="Microbench", max_pending=1 << 30)
+    with _price_book(symbols) as book:
+        engine = StrategyEngine(
+            book, None, HOST, 0, 0, symbols, order_sender=sender, order_protocol=order_protocol
+        )
+        yield engine
+
+
+@case("StrategyEngine._process_prices", sizes=(3, 1000, 10000))
+def _process_prices(size: int):
+    symbols = benchmark_symbols(size)
+    with _engine(symbols) as engine:
+        engine.price_book.update_many(
+            np.arange(size), 100.0 + np.arange(size) % 7, np.full(size, time.time_ns())
+        )
+        # Neutral news: the cycle reads the book and updates every signal,
+        # then finds nothing to trade.
+        engine.latest_sentiment = 50
+
+        def run() -> None:
+            engine._seen_sequences = None  # every row is fresh again
+            engine._process_prices()
+
+        yield run
+
+
+@case("IncrementalIndicators.update_many", sizes=(3, 1000, 10000))
+def _indicators_update_many(size: int):
+    from indicators import IncrementalIndicators
+
+    indicators = IncrementalIndicators(size, SHORT_WINDOW, SHORT_WINDOW * 2)
+    rows = np.arange(size)
+    prices = 100.0 + np.random.default_rng(0).standard_normal(size)
+    yield lambda: indicators.update_many(rows, prices)
+
+
+@case("IncrementalIndicators.update_sequence", sizes=(3, 1000, 10000))
+def _indicators_update_sequence(size: int):
+    from indicators import IncrementalIndicators
+
+    indicators = IncrementalIndicators(8, SHORT_WINDOW, SHORT_WINDOW * 2)
+    rows = np.arange(size) % 8
+    prices = 100.0 + np.random.default_rng(0).standard_normal(size)
+    yield lambda: indicators.update_sequence(rows, prices)
+
+
+def _send_orders(size: int, order_protocol: str):
+    symbols = benchmark_symbols(max(size, 3))
+    with _engine(symbols, order_protocol) as engine, _quiet():
+        staged = engine.order_sender._staged
+        origin_ns = time.monotonic_ns()
+
+        def run() -> None:
+            for i in range(size):
+                side = "BUY" if i & 1 else "SELL"
+                engine._send_order(i, side, 100.0 + i, time.time(), origin_ns)
+            staged.clear()
+
+        yield run
+
+
+@case("StrategyEngine._send_order.binary", sizes=(1, 100))
+def _send_order_binary(size: int):
+    yield from _send_orders(size, "binary")
+
+
+@case("StrategyEngine._send_order.json", sizes=(1, 100))
+def _send_order_json(size: int):
+    yield from _send_orders(size, "json")
+
+
+@contextlib.contextmanager
+def _order_manager() -> Iterator:
+    from order_manager import OrderManagerServer
+
+    server = OrderManagerServer(host=HOST, port=0)
+    server.logger.stream = open(os.devnull, "w")
+    server.logger.start()
+    try:
+        yield server
+    finally:
+        server.logger.stop()
+        server.logger.stream.close()
+        server.server.close()
+
+
+def _binary_orders(count: int) -> Tuple[List[str], bytes]:
+    from protocol import ORDER_WIRE_DTYPE, PRICE_SCALE
+
+    symbols = benchmark_symbols(max(count, 3))
+    records = np.zeros(count, dtype=ORDER_WIRE_DTYPE)
+    records["symbol_id"] = np.arange(count)
+    records["quantity"] = 10
+    records["price"] = 100 * PRICE_SCALE
+    records["side"] = 1
+    return symbols, records.tobytes()
+
+
+@case("OrderManagerServer._decode_batch.binary", sizes=(1, 100, 1000))
+def _decode_binary(size: int):
+    symbols, payload = _binary_orders(size)
+    with _order_manager() as server:
+        yield lambda: server._decode_batch([(symbols, payload)])
+
+
+@case("OrderManagerServer._decode_batch.json", sizes=(1, 100, 1000))
+def _decode_json(size: int):
+    batch = [
+        (None, json.dumps({"symbol": f"S{i}", "side": "BUY", "quantity": 10, "price": 1.0}).encode())
+        for i in range(size)
+    ]
+    with _order_manager() as server:
+        yield lambda: server._decode_batch(batch)
+
+
+@case("OrderManagerServer._record_order", sizes=(1, 100))
+def _record_order(size: int):
+    from protocol import decode_orders
+
+    symbols, payload = _binary_orders(size)
+    orders = decode_orders(payload, symbols)
+    with _order_manager() as server:
+
+        def run() -> None:
+            for order in orders:
+                server._record_order(order)
+
+        yield run
+
+
+def run_case(name: str, size: int, repeat: int = 5, min_time: float = 0.05) -> float:
+    """Fastest observed nanoseconds per item for one case and size."""
+    _, factory = CASES[name]
+    with factory(size) as function:
+        timer = timeit.Timer(function)
+        function()
+        number = 1
+        while timer.timeit(number) < min_time and number < 1 << 20:
+            number *= 2
+        best = min(timer.repeat(repeat, number)) / number
+    return best * 1e9 / size
+
+
+def run_all(
+    names: Optional[Sequence[str]] = None, repeat: int = 5, min_time: float = 0.05
+) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for name in names or CASES:
+        sizes, _ = CASES[name]
+        for size in sizes:
+            results[f"{name}[{size}]"] = round(run_case(name, size, repeat, min_time), 2)
+    return results
+
+
+def compare(
+    baseline: Dict[str, float], current: Dict[str, float], threshold: float = DEFAULT_THRESHOLD
+) -> List[str]:
+    """Cases that got more than ``threshold`` slower than ``baseline``."""
+    slower = []
+    for key, value in current.items():
+        old = baseline.get(key)
+        if old and value > old * (1 + threshold):
+            slower.append(f"{key}: {old:,.1f} -> {value:,.1f} ns/item (+{value / old - 1:.0%})")
+    return slower
+
+
+def check(
+    baseline: Dict[str, float],
+    names: Optional[Sequence[str]] = None,
+    repeat: int = 5,
+    min_time: float = 0.05,
+    threshold: float = DEFAULT_THRESHOLD,
+    retries: int = 2,
+) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Run the cases and compare against ``baseline``. Cases that look slower
+    are timed again up to ``retries`` times, keeping the fastest result, so
+    a single burst of noise from another process does not fail the check.
+    """
+    results = run_all(names, repeat, min_time)
+    for _ in range(retries):
+        suspects = [key for key in results if compare(baseline, {key: results[key]}, threshold)]
+        if not suspects:
+            break
+        for key in suspects:
+            name, size = key[:-1].rsplit("[", 1)
+            results[key] = min(results[key], round(run_case(name, int(size), repeat, min_time), 2))
+    return results, compare(baseline, results, threshold)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks.")
+    parser.add_argument("cases", nargs="*", help=f"subset of: {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timing")
+    parser.add_argument("--save", help="write results as a baseline JSON file")
+    parser.add_argument("--check", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.check:
+        with open(args.check) as handle:
+            baseline = json.load(handle)["results"]
+        results, slower = check(baseline, args.cases, args.repeat, args.min_time, args.threshold)
+    else:
+        results, slower = run_all(args.cases, args.repeat, args.min_time), []
+    for key, value in results.items():
+        print(f"{key:<48} {value:>12,.1f} ns/item")
+    if args.save:
+        document = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.save, "w") as handle:
+            json.dump(document, handle, indent=2)
+            handle.write("\n")
+    if args.check:
+        for line in slower:
+            print(f"[Microbench] SLOWER {line}", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+        print(f"[Microbench] Within {args.threshold:.0%} of {args.check}.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
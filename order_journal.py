@@ -0,0 +1,251 @@
+"""
+Append-only binary order journal for the OrderManager.
+
+Every accepted order becomes one fixed-size ``JOURNAL_DTYPE`` record after a
+small file header, so a journal can be memory-mapped and scanned as a NumPy
+array. Writes go straight to the OS; a flusher thread fsyncs them in groups
+once ``commit_records`` are pending or the oldest pending record is
+``commit_delay`` seconds old, which bounds how long any order waits to be
+durable (see ``wait_durable``).
+
+Every ``index_stride`` records the journal also appends ``(ts_ns, record)``
+to ``<path>.idx`` so time-range reads start near the right block instead of
+scanning from the beginning. Receive timestamps never go backwards within a
+journal, which keeps both files sorted.
+
+Both timestamps are wall clock: ``ts_ns`` is the OrderManager's
+``time.time_ns()`` and ``order_ts_ns`` the order's ``timestamp`` (the
+Strategy's ``time.time()`` decision time, whichever order protocol it used).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import (
+    JOURNAL_COMMIT_DELAY_SECONDS,
+    JOURNAL_COMMIT_RECORDS,
+    JOURNAL_INDEX_STRIDE,
+)
+from protocol import NO_SENTIMENT, PRICE_SCALE, SIDE_CODES
+
+JOURNAL_MAGIC = b"OMJRNL01"
+JOURNAL_HEADER = struct.Struct("<8sII")  # magic, record size, reserved
+JOURNAL_DTYPE = np.dtype(
+    [
+        ("ts_ns", "<i8"),  # OrderManager receive time, non-decreasing
+        ("order_ts_ns", "<i8"),  # Strategy decision time, wall clock (time.time_ns)
+        ("price", "<i8"),  # PRICE_SCALE units
+        ("quantity", "<i4"),
+        ("side", "i1"),
+        ("sentiment", "i1"),
+        ("symbol", "S16"),
+    ]
+)
+INDEX_DTYPE = np.dtype([("ts_ns", "<i8"), ("record", "<i8")])
+
+
+class JournalError(ValueError):
+    """Raised when a file is not a journal this code can read."""
+
+
+def index_path(path: str) -> str:
+    return f"{path}.idx"
+
+
+class OrderJournal:
+    def __init__(
+        self,
+        path: str,
+        commit_records: int = JOURNAL_COMMIT_RECORDS,
+        commit_delay: float = JOURNAL_COMMIT_DELAY_SECONDS,
+        index_stride: int = JOURNAL_INDEX_STRIDE,
+    ) -> None:
+        self.path = path
+        self.commit_records = commit_records
+        self.commit_delay = commit_delay
+        self.index_stride = index_stride
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._index_fd = os.open(index_path(path), os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.write(self._fd, JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_DTYPE.itemsize, 0))
+            os.fsync(self._fd)
+            size = JOURNAL_HEADER.size
+        else:
+            _check_header(path)
+        # A torn tail from a crash mid-write is ignored, then overwritten.
+        self.written = (size - JOURNAL_HEADER.size) // JOURNAL_DTYPE.itemsize
+        torn = (size - JOURNAL_HEADER.size) % JOURNAL_DTYPE.itemsize
+        if torn:
+            os.ftruncate(self._fd, size - torn)
+        self.durable = self.written
+        self._last_ts = self._tail_timestamp()
+        self._pending_since: Optional[float] = None
+        self._lock = threading.Lock()
+        self._commit = threading.Condition(self._lock)
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="journal-flush", daemon=True)
+        self._flusher.start()
+
+    def append(self, orders: Iterable[dict]) -> int:
+        """Write ``orders`` and return the record count to pass to ``wait_durable``."""
+        orders = list(orders)
+        if not orders:
+            return self.written
+        records = np.zeros(len(orders), dtype=JOURNAL_DTYPE)
+        records["symbol"] = [str(order.get("symbol", "")).encode()[:16] for order in orders]
+        records["side"] = [SIDE_CODES.get(order.get("side"), 0) for order in orders]
+        records["quantity"] = [order.get("quantity") or 0 for order in orders]
+        records["price"] = np.round(
+            np.array([order.get("price") or 0.0 for order in orders], dtype=np.float64) * PRICE_SCALE
+        )
+        records["sentiment"] = [
+            NO_SENTIMENT if order.get("sentiment") is None else order["sentiment"] for order in orders
+        ]
+        records["order_ts_ns"] = [int((order.get("timestamp") or 0.0) * 1e9) for order in orders]
+        with self._commit:
+            ts_ns = max(time.time_ns(), self._last_ts)
+            records["ts_ns"] = ts_ns
+            self._last_ts = ts_ns
+            first = self.written
+            os.write(self._fd, records.tobytes())
+            self.written += len(records)
+            self._write_index(first, ts_ns)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            self._commit.notify_all()
+            return self.written
+
+    def wait_durable(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Block until the first ``count`` records are fsynced."""
+        with self._commit:
+            return self._commit.wait_for(lambda: self.durable >= count or self._closed, timeout)
+
+    def close(self) -> None:
+        with self._commit:
+            if self._closed:
+                return
+            self._closed = True
+            self._commit.notify_all()
+        self._flusher.join()
+        os.fsync(self._fd)
+        os.fsync(self._index_fd)
+        self.durable = self.written
+        os.close(self._fd)
+        os.close(self._index_fd)
+
+    def _write_index(self, first: int, ts_ns: int) -> None:
+        stride = self.index_stride
+        boundary = -(-first // stride) * stride
+        if boundary < self.written:
+            entries = np.arange(boundary, self.written, stride)
+            index = np.empty(len(entries), dtype=INDEX_DTYPE)
+            index["record"] = entries
+            index["ts_ns"] = ts_ns
+            os.write(self._index_fd, index.tobytes())
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._commit:
+                self._commit.wait_for(lambda: self.written > self.durable or self._closed)
+                if self._closed:
+                    return
+                deadline = self._pending_since + self.commit_delay
+                self._commit.wait_for(
+                    lambda: self.written - self.durable >= self.commit_records or self._closed,
+                    max(0.0, deadline - time.monotonic()),
+                )
+                target = self.written
+                self._pending_since = None
+            # fsync outside the lock so appends keep flowing meanwhile.
+            os.fsync(self._fd)
+            with self._commit:
+                self.durable = max(self.durable, target)
+                if self.written > self.durable and self._pending_since is None:
+                    self._pending_since = time.monotonic()
+                self._commit.notify_all()
+
+    def _tail_timestamp(self) -> int:
+        if not self.written:
+            return 0
+        offset = JOURNAL_HEADER.size + (self.written - 1) * JOURNAL_DTYPE.itemsize
+        tail = os.pread(self._fd, JOURNAL_DTYPE.itemsize, offset)
+        return int(np.frombuffer(tail, dtype=JOURNAL_DTYPE)["ts_ns"][0])
+
+
+def _check_header(path: str) -> None:
+    with open(path, "rb") as handle:
+        header = handle.read(JOURNAL_HEADER.size)
+    if len(header) < JOURNAL_HEADER.size:
+        raise JournalError(f"{path}: truncated journal header")
+    magic, record_size, _ = JOURNAL_HEADER.unpack(header)
+    if magic != JOURNAL_MAGIC or record_size != JOURNAL_DTYPE.itemsize:
+        raise JournalError(f"{path}: not an order journal (or a different record layout)")
+
+
+def read_journal(path: str) -> np.ndarray:
+    """Memory-map every complete record (read-only)."""
+    _check_header(path)
+    count = (os.path.getsize(path) - JOURNAL_HEADER.size) // JOURNAL_DTYPE.itemsize
+    if not count:
+        return np.zeros(0, dtype=JOURNAL_DTYPE)
+    return np.memmap(path, dtype=JOURNAL_DTYPE, mode="r", offset=JOURNAL_HEADER.size, shape=(count,))
+
+
+def read_range(path: str, start_ns: int, end_ns: int) -> np.ndarray:
+    """Records received in ``[start_ns, end_ns)``, located through the index."""
+    records = read_journal(path)
+    lo, hi = 0, len(records)
+    try:
+        index = np.fromfile(index_path(path), dtype=INDEX_DTYPE)
+    except FileNotFoundError:
+        index = np.zeros(0, dtype=INDEX_DTYPE)
+    if len(index):
+        # Narrow to the index blocks that can hold the range, then search
+        # only inside them so the whole map is never touched.
+        first = int(np.searchsorted(index["ts_ns"], start_ns, side="left")) - 1
+        if first >= 0:
+            lo = int(index["record"][first])
+        last = int(np.searchsorted(index["ts_ns"], end_ns, side="left"))
+        if last < len(index):
+            hi = min(hi, int(index["record"][last]) + 1)
+    window = records[lo:hi]["ts_ns"]
+    begin = lo + int(np.searchsorted(window, start_ns, side="left"))
+    end = lo + int(np.searchsorted(window, end_ns, side="left"))
+    return records[begin:end]
+
+
+def rebuild_positions(records: np.ndarray) -> Dict[str, int]:
+    """Net signed quantity per symbol (BUY adds, SELL subtracts)."""
+    if not len(records):
+        return {}
+    symbols, inverse = np.unique(records["symbol"], return_inverse=True)
+    signed = records["side"].astype(np.int64) * records["quantity"]
+    totals = np.bincount(inverse, weights=signed, minlength=len(symbols))
+    return {symbol.decode(): int(total) for symbol, total in zip(symbols, totals)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild positions from an order journal.")
+    parser.add_argument("path", help="journal written by the OrderManager")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+    records = read_journal(args.path)
+    positions = rebuild_positions(records)
+    elapsed = time.perf_counter() - started
+    for symbol, quantity in sorted(positions.items()):
+        print(f"{symbol:<16} {quantity:>12}")
+    rate = len(records) / elapsed if elapsed else 0.0
+    print(f"{len(records)} records replayed in {elapsed * 1000:.1f} ms ({rate:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    main()
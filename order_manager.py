@@ -2,102 +2,457 @@ from __future__ import annotations
 
 import contextlib
 import json
+import queue
+import selectors
 import socket
 import threading
-from typing import Callable, List, Optional
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 
-from config import HOST, MESSAGE_DELIMITER, ORDER_MANAGER_PORT
+import numpy as np
+
+from config import (
+    HOST,
+    ORDER_ACK_BUFFER_BYTES,
+    ORDER_DECODE_WORKERS,
+    ORDER_JOURNAL_PATH,
+    ORDER_MANAGER_PORT,
+    ORDER_PIPELINE_POLICY,
+    ORDER_PIPELINE_QUEUE_SIZE,
+    SHARED_MEMORY_NAME,
+)
+from framing import FrameReader
+from latency import LatencyRecorder
+from line_logger import LineLogger
+from metrics import ProcessMetrics, metrics_name
+from order_journal import OrderJournal
+from protocol import (
+    FRAME_KIND_ORDERS,
+    FRAME_KIND_SYMBOLS,
+    ORDER_HELLO_TOKEN,
+    ORDER_WIRE_DTYPE,
+    ProtocolError,
+    decode_orders,
+    decode_symbols,
+    encode_ack_frame,
+)
 
 OrderHandler = Callable[[dict], None]
+# Raw messages from one receive: ``(None, json_line)`` or ``(symbols, order_payload)``.
+RawBatch = List[Tuple[Optional[List[str]], bytes]]
+
+_STOP_WORKER = None
+
+ORDER_MANAGER_COUNTERS = (
+    "orders_total",
+    "orders_dropped_total",
+    "invalid_orders_total",
+    "acks_total",
+    "acks_dropped_total",
+)
+ORDER_MANAGER_HOPS = ("strategy->ordermanager", "gateway->ordermanager")
+ORDER_MANAGER_HISTOGRAMS = ORDER_MANAGER_HOPS + ("handle_batch",)
+
+
+def order_manager_metrics(shared: bool = False, name: str = SHARED_MEMORY_NAME) -> ProcessMetrics:
+    shared_name = metrics_name(name, "OrderManager") if shared else None
+    return ProcessMetrics(
+        "OrderManager", ORDER_MANAGER_COUNTERS, ORDER_MANAGER_HISTOGRAMS, shared_name
+    )
+
+
+class _Connection:
+    """
+    Per-client parse state: JSON lines until the binary hello, then frames.
+
+    Workers append ack frames to ``outbox``; only the selector loop writes
+    them to the non-blocking socket, so frames are never interleaved or cut.
+    ``scheduled`` is set while the loop owes the outbox a flush, so workers
+    wake it once per flush rather than once per batch.
+    """
+
+    __slots__ = (
+        "sock", "reader", "binary", "symbols", "ack_lock", "outbox", "scheduled", "writing", "closed"
+    )
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.reader = FrameReader()
+        self.binary = False
+        self.symbols: List[str] = []
+        self.ack_lock = threading.Lock()
+        self.outbox = bytearray()
+        self.scheduled = False
+        # Loop-thread only: whether the socket is registered for EVENT_WRITE.
+        self.writing = False
+        self.closed = False
+
+    def queue_ack(self, frame: bytes, limit: int) -> Tuple[bool, bool]:
+        """
+        Queue an ack frame from a worker thread. Returns whether it was
+        queued (not when the client is gone or ``limit`` bytes are already
+        unsent) and whether the loop must be woken to flush it.
+        """
+        with self.ack_lock:
+            if self.closed or len(self.outbox) + len(frame) > limit:
+                return False, False
+            self.outbox += frame
+            wake = not self.scheduled
+            self.scheduled = True
+            return True, wake
+
+    def flush_acks(self) -> Optional[bool]:
+        """
+        Write what the socket accepts. Returns whether unsent acks remain,
+        or None when the socket failed.
+        """
+        with self.ack_lock:
+            if self.closed:
+                return False
+            try:
+                sent = self.sock.send(self.outbox) if self.outbox else 0
+            except (BlockingIOError, InterruptedError):
+                sent = 0
+            except OSError:
+                return None
+            del self.outbox[:sent]
+            self.scheduled = bool(self.outbox)
+            return self.scheduled
 
 
 class OrderManagerServer:
+    """
+    One ``selectors`` loop multiplexes the listening socket and every client,
+    so connections cost no threads. ``stop`` wakes the loop through a socket
+    pair instead of relying on accept timeouts.
+
+    The loop only frames messages: each receive's raw messages go as one
+    batch into a bounded queue that ``decode_workers`` threads drain, decode
+    and hand to ``on_order``; console lines go through a ``LineLogger``. When
+    the queue is full, ``policy="block"`` stalls the loop so TCP pushes back
+    on the senders, while ``"drop"`` discards the batch and counts its orders.
+    With more than one worker, batches from different receives may be
+    handled out of order.
+
+    With a ``journal_path`` every decoded order is appended to an
+    ``OrderJournal`` before ``on_order`` sees it.
+
+    Binary order frames are acknowledged once handled, and the Strategy's
+    monotonic timestamps feed the ``strategy->ordermanager`` and
+    ``gateway->ordermanager`` latency histograms. Workers queue acks per
+    connection and the loop writes them on ``EVENT_WRITE``; acks beyond
+    ``ack_buffer_bytes`` of unsent data are dropped and counted. Counters and histograms
+    live in ``metrics``; worker-side updates happen under one lock, the
+    drop counter is only written by the loop thread.
+    """
+
     def __init__(
         self,
         host: str = HOST,
         port: int = ORDER_MANAGER_PORT,
         on_order: Optional[OrderHandler] = None,
+        queue_size: int = ORDER_PIPELINE_QUEUE_SIZE,
+        policy: str = ORDER_PIPELINE_POLICY,
+        decode_workers: int = ORDER_DECODE_WORKERS,
+        journal_path: Optional[str] = None,
+        metrics: Optional[ProcessMetrics] = None,
+        ack_buffer_bytes: int = ORDER_ACK_BUFFER_BYTES,
     ) -> None:
         self.host = host
         self.port = port
         self.on_order = on_order
+        self.policy = policy
+        self.ack_buffer_bytes = ack_buffer_bytes
+        self.logger = LineLogger()
+        self.journal = OrderJournal(journal_path) if journal_path else None
+        self.metrics = metrics or order_manager_metrics()
+        self._orders_total = self.metrics.counter("orders_total")
+        self._dropped_total = self.metrics.counter("orders_dropped_total")
+        self._invalid_total = self.metrics.counter("invalid_orders_total")
+        self._acks_total = self.metrics.counter("acks_total")
+        self._acks_dropped_total = self.metrics.counter("acks_dropped_total")
+        self._batch_ns = self.metrics.histogram("handle_batch")
+        self.latency = LatencyRecorder(
+            "OrderManager",
+            emit=self.logger.log,
+            histograms={hop: self.metrics.histogram(hop) for hop in ORDER_MANAGER_HOPS},
+        )
+        self._batches: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"order-decoder-{i}", daemon=True)
+            for i in range(decode_workers)
+        ]
+        self._processed_lock = threading.Lock()
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server.bind((self.host, self.port))
         self.server.listen()
-        self.server.settimeout(1.0)
+        self.server.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        # A full wake pipe already holds a pending wake-up.
+        self._wake_send.setblocking(False)
+        # Connections with freshly queued acks, appended by the workers.
+        self._ack_ready: Deque[_Connection] = deque()
         self._stop = threading.Event()
 
     def run(self) -> None:
-        print(f"[OrderManager] Listening for orders on {self.host}:{self.port}.")
-        clients: List[threading.Thread] = []
+        self.logger.start()
+        for worker in self._workers:
+            worker.start()
+        self.logger.log(f"[OrderManager] Listening for orders on {self.host}:{self.port}.")
+        selector = self._selector
+        selector.register(self.server, selectors.EVENT_READ, None)
+        selector.register(self._wake_recv, selectors.EVENT_READ, None)
         try:
             while not self._stop.is_set():
-                try:
-                    conn, addr = self.server.accept()
-                    print(f"[OrderManager] Client connected {addr}")
-                    thread = threading.Thread(
-                        target=self._handle_client, args=(conn,), daemon=True
-                    )
-                    thread.start()
-                    clients.append(thread)
-                except socket.timeout:
-                    continue
-                except OSError:
-                    break
+                for key, mask in selector.select():
+                    if key.fileobj is self.server:
+                        self._accept()
+                    elif key.fileobj is self._wake_recv:
+                        self._wake()
+                    else:
+                        if mask & selectors.EVENT_WRITE:
+                            self._flush_acks(key.data)
+                        if mask & selectors.EVENT_READ and not key.data.closed:
+                            self._service(key.data)
         except KeyboardInterrupt:
-            print("[OrderManager] Shutting down.")
+            self.logger.log("[OrderManager] Shutting down.")
         finally:
-            self.stop()
-            for client in clients:
-                client.join(timeout=1)
+            self._stop.set()
+            self._close_all()
+            # Workers finish the batches already queued, then exit.
+            for _ in self._workers:
+                self._batches.put(_STOP_WORKER)
+            for worker in self._workers:
+                worker.join()
+            if self.journal is not None:
+                self.journal.close()
+            self.logger.stop()
 
-    def _handle_client(self, conn: socket.socket) -> None:
-        buffer = b""
-        with conn:
-            while not self._stop.is_set():
-                try:
-                    chunk = conn.recv(4096)
-                except OSError:
-                    return
-                if not chunk:
-                    return
-                buffer += chunk
-                while True:
-                    idx = buffer.find(MESSAGE_DELIMITER)
-                    if idx == -1:
-                        break
-                    token = buffer[:idx]
-                    buffer = buffer[idx + len(MESSAGE_DELIMITER) :]
-                    if token:
-                        self._log_order(token)
-
-    def _log_order(self, token: bytes) -> None:
+    @property
+    def processed(self) -> int:
+        return self._orders_total.value
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped_total.value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": self._batches.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "log_dropped": self.logger.dropped,
+        }
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, addr = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self._stop.set()
+                return
+            self.logger.log(f"[OrderManager] Client connected {addr}")
+            conn.setblocking(False)
+            self._selector.register(conn, selectors.EVENT_READ, _Connection(conn))
+
+    def _wake(self) -> None:
+        with contextlib.suppress(BlockingIOError, InterruptedError):
+            while self._wake_recv.recv(4096):
+                pass
+        while self._ack_ready:
+            self._flush_acks(self._ack_ready.popleft())
+
+    def _flush_acks(self, client: _Connection) -> None:
+        pending = client.flush_acks()
+        if pending is None:
+            self._drop(client)
+        elif pending != client.writing and not client.closed:
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if pending else 0)
+            self._selector.modify(client.sock, events, client)
+            client.writing = pending
+
+    def _service(self, client: _Connection) -> None:
+        try:
+            received = client.reader.recv(client.sock)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            received = 0
+        if not received or not self._dispatch(client, time.monotonic_ns()):
+            self._drop(client)
+
+    def _dispatch(self, client: _Connection, recv_ns: int) -> bool:
+        """Queue every complete message buffered for ``client`` as one batch."""
+        reader = client.reader
+        batch: RawBatch = []
+        if not client.binary:
+            for token in reader.messages():
+                if token == ORDER_HELLO_TOKEN:
+                    client.binary = True
+                    break
+                batch.append((None, bytes(token)))
+        ok = True
+        if client.binary:
+            try:
+                for kind, count, payload in reader.frames():
+                    if kind == FRAME_KIND_SYMBOLS:
+                        client.symbols = decode_symbols(payload, count)
+                    elif kind == FRAME_KIND_ORDERS:
+                        batch.append((client.symbols, bytes(payload)))
+            except ProtocolError as exc:
+                self.logger.log(f"[OrderManager] Dropping client after bad frame: {exc}")
+                ok = False
+        if batch:
+            self._enqueue(client, recv_ns, batch)
+        return ok
+
+    def _enqueue(self, client: Optional[_Connection], recv_ns: int, batch: RawBatch) -> None:
+        item = (client, recv_ns, batch)
+        if self.policy == "block":
+            self._batches.put(item)
+            return
+        try:
+            self._batches.put_nowait(item)
+        except queue.Full:
+            self._dropped_total.inc(len(batch))
+
+    def _work(self) -> None:
+        while True:
+            item = self._batches.get()
+            if item is _STOP_WORKER:
+                return
+            client, recv_ns, batch = item
+            started = time.perf_counter_ns()
+            orders, invalid = self._decode_batch(batch)
+            if self.journal is not None:
+                self.journal.append(orders)
+            for order in orders:
+                self._record_order(order)
+            acked, unacked = self._acknowledge(client, recv_ns, batch)
+            with self._processed_lock:
+                self._orders_total.inc(len(orders))
+                self._invalid_total.inc(invalid)
+                self._acks_total.inc(acked)
+                self._acks_dropped_total.inc(unacked)
+                self._batch_ns.record(time.perf_counter_ns() - started)
+                self.latency.maybe_report()
+
+    def _acknowledge(
+        self, client: Optional[_Connection], recv_ns: int, batch: RawBatch
+    ) -> Tuple[int, int]:
+        """
+        Queue acks for the batch's binary orders and record their inbound hop
+        latencies; returns how many orders were acked and how many acks were
+        dropped.
+        """
+        payloads = [
+            raw
+            for symbols, raw in batch
+            if symbols is not None and not len(raw) % ORDER_WIRE_DTYPE.itemsize
+        ]
+        if not payloads:
+            return 0, 0
+        records = np.frombuffer(b"".join(payloads), dtype=ORDER_WIRE_DTYPE)
+        with self._processed_lock:
+            self.latency.record("strategy->ordermanager", recv_ns - records["ts_ns"])
+            self.latency.record("gateway->ordermanager", recv_ns - records["price_ts_ns"])
+        if client is None:
+            return 0, 0
+        frame = encode_ack_frame(
+            records["symbol_id"], records["ts_ns"], recv_ns, time.monotonic_ns()
+        )
+        queued, wake = client.queue_ack(frame, self.ack_buffer_bytes)
+        if not queued:
+            return 0, len(records)
+        if wake:
+            self._ack_ready.append(client)
+            with contextlib.suppress(OSError):
+                self._wake_send.send(b"\1")
+        return len(records), 0
+
+    def _decode_batch(self, batch: RawBatch) -> Tuple[List[dict], int]:
+        """Decoded orders, and how many messages could not be decoded."""
+        orders: List[dict] = []
+        invalid = 0
+        for symbols, raw in batch:
+            if symbols is None:
+                order = self._parse_json_order(raw)
+                if order is not None:
+                    orders.append(order)
+                else:
+                    invalid += 1
+                continue
+            try:
+                orders.extend(decode_orders(raw, symbols))
+            except ProtocolError as exc:
+                invalid += 1
+                self.logger.log(f"[OrderManager] Invalid order frame: {exc}")
+        return orders, invalid
+
+    def _drop(self, client: _Connection) -> None:
+        with client.ack_lock:
+            client.closed = True
+        with contextlib.suppress(KeyError, ValueError):
+            self._selector.unregister(client.sock)
+        with contextlib.suppress(OSError):
+            client.sock.close()
+
+    def _close_all(self) -> None:
+        for key in list(self._selector.get_map().values()):
+            if key.data is not None:
+                self._drop(key.data)
+        with contextlib.suppress(OSError):
+            self.server.close()
+        self._selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+    def _parse_json_order(self, raw: bytes) -> Optional[dict]:
         try:
-            order = json.loads(token.decode())
-            if self.on_order:
-                self.on_order(order)
-            print(
-                "[OrderManager] "
-                f"{order.get('side')} {order.get('quantity')} {order.get('symbol')} @ "
-                f"{order.get('price')} (sentiment={order.get('sentiment')}, "
-                f"latency_ms={order.get('latency_ms')})"
-            )
-        except json.JSONDecodeError:
-            print(f"[OrderManager] Invalid order payload: {token!r}")
+            return json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self.logger.log(f"[OrderManager] Invalid order payload: {raw!r}")
+            return None
+
+    def _record_order(self, order: dict) -> None:
+        if self.on_order:
+            self.on_order(order)
+        self.logger.log(
+            "[OrderManager] "
+            f"{order.get('side')} {order.get('quantity')} {order.get('symbol')} @ "
+            f"{order.get('price')} (sentiment={order.get('sentiment')}, "
+            f"latency_ms={order.get('latency_ms')})"
+        )
 
     def stop(self) -> None:
+        """Ask the loop to exit; safe to call from any thread, or more than once."""
+        if self._stop.is_set():
+            return
         self._stop.set()
         with contextlib.suppress(OSError):
-            self.server.close()
+            self._wake_send.send(b"\0")
 
 
 def run_ordermanager(
     host: str = HOST,
     port: int = ORDER_MANAGER_PORT,
+    journal_path: Optional[str] = ORDER_JOURNAL_PATH,
 ) -> None:
-    server = OrderManagerServer(host=host, port=port)
-    server.run()
+    metrics = order_manager_metrics(shared=True)
+    server = OrderManagerServer(
+        host=host, port=port, journal_path=journal_path, metrics=metrics
+    )
+    try:
+        server.run()
+    finally:
+        metrics.close()
+        metrics.unlink()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""
+Background order submission for the Strategy.
+
+``OrderSender`` owns the OrderManager connection on its own thread so the
+decision loop never blocks on the network. ``submit`` only appends the
+encoded order to a pending list; ``flush`` (called once per Strategy cycle)
+hands the list to the sender thread, which writes everything queued since
+its last write in one buffer on a ``TCP_NODELAY`` socket. If the connection
+fails mid-write, only the orders not fully written are resent.
+Connecting and reconnecting also happen on that thread; orders submitted
+while disconnected are held (up to ``max_pending``) and sent on reconnect.
+With an ``on_ack`` callback, a reader thread per connection hands every
+OrderManager ack frame to it as a NumPy record array.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import socket
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import (
+    HOST,
+    ORDER_MANAGER_PORT,
+    ORDER_RECONNECT_DELAY_SECONDS,
+    ORDER_SEND_QUEUE_LIMIT,
+)
+from framing import FrameReader
+from protocol import FRAME_KIND_ACKS, ProtocolError, decode_acks
+
+AckHandler = Callable[[np.ndarray], None]
+
+
+class OrderSender:
+    def __init__(
+        self,
+        host: str = HOST,
+        port: int = ORDER_MANAGER_PORT,
+        name: str = "Strategy",
+        max_pending: int = ORDER_SEND_QUEUE_LIMIT,
+        reconnect_delay: float = ORDER_RECONNECT_DELAY_SECONDS,
+        handshake: bytes = b"",
+        on_ack: Optional[AckHandler] = None,
+    ) -> None:
+        self.host = host
+        # Written first on every (re)connection, e.g. a protocol hello.
+        self.handshake = handshake
+        self.on_ack = on_ack
+        self.acked = 0
+        self.port = port
+        self.name = name
+        self.max_pending = max_pending
+        self.reconnect_delay = reconnect_delay
+        self.sock: Optional[socket.socket] = None
+        self.sent = 0
+        self.writes = 0
+        self.dropped = 0
+        self._staged: List[bytes] = []
+        self._pending: List[bytes] = []
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-orders", daemon=True)
+
+    @property
+    def connected(self) -> bool:
+        return self.sock is not None
+
+    def start(self) -> "OrderSender":
+        self._thread.start()
+        return self
+
+    def submit(self, payload: bytes) -> None:
+        """Stage one encoded order; nothing is sent until ``flush``."""
+        self._staged.append(payload)
+
+    def flush(self) -> None:
+        """Hand every order staged this cycle to the sender thread."""
+        if not self._staged:
+            return
+        staged, self._staged = self._staged, []
+        with self._wakeup:
+            pending = self._pending
+            pending.extend(staged)
+            overflow = len(pending) - self.max_pending
+            if overflow > 0:
+                # Stale orders are the least useful; shed the oldest first.
+                del pending[:overflow]
+                self.dropped += overflow
+            self._wakeup.notify()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self.flush()
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self._close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._wakeup:
+            queued = len(self._pending)
+        return {
+            "sent": self.sent,
+            "writes": self.writes,
+            "queued": queued,
+            "dropped": self.dropped,
+            "acked": self.acked,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.sock is None and not self._connect():
+                self._stop.wait(self.reconnect_delay)
+                continue
+            with self._wakeup:
+                while not self._pending and not self._stop.is_set():
+                    self._wakeup.wait()
+                batch, self._pending = self._pending, []
+            if batch:
+                self._write(batch)
+        if self.sock is not None and self._pending:
+            with self._wakeup:
+                batch, self._pending = self._pending, []
+            self._write(batch)
+
+    def _write(self, batch: List[bytes]) -> None:
+        data = memoryview(b"".join(batch))
+        written = 0
+        try:
+            while written < len(data):
+                written += self.sock.send(data[written:])
+        except OSError:
+            print(f"[{self.name}] OrderManager unreachable, retrying.")
+            self._close()
+            # Only orders that never fully reached the socket are resent; a
+            # partially written one is cut off with the old connection.
+            done = 0
+            for payload in batch:
+                if written < len(payload):
+                    break
+                written -= len(payload)
+                done += 1
+            self.sent += done
+            with self._wakeup:
+                # Ahead of anything submitted meanwhile, keeping order.
+                self._pending[:0] = batch[done:]
+            return
+        self.sent += len(batch)
+        self.writes += 1
+
+    def _connect(self) -> bool:
+        try:
+            sock = socket.create_connection((self.host, self.port))
+        except OSError:
+            print(f"[{self.name}] Unable to reach port {self.port}, retrying shortly.")
+            return False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.handshake:
+            try:
+                sock.sendall(self.handshake)
+            except OSError:
+                sock.close()
+                return False
+        self.sock = sock
+        print(f"[{self.name}] Connected to port {self.port}.")
+        if self.on_ack is not None:
+            threading.Thread(
+                target=self._read_acks, args=(sock,), name=f"{self.name}-acks", daemon=True
+            ).start()
+        return True
+
+    def _read_acks(self, sock: socket.socket) -> None:
+        """Runs until the connection closes; the sender thread owns reconnects."""
+        reader = FrameReader(capacity=16384)
+        while True:
+            try:
+                if not reader.recv(sock):
+                    return
+                for kind, _, payload in reader.frames():
+                    if kind == FRAME_KIND_ACKS:
+                        acks = decode_acks(payload).copy()
+                        self.acked += len(acks)
+                        self.on_ack(acks)
+            except (OSError, ProtocolError):
+                return
+
+    def _close(self) -> None:
+        if self.sock is not None:
+            with contextlib.suppress(OSError):
+                self.sock.close()
+            self.sock = None
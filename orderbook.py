@@ -1,12 +1,57 @@
 from __future__ import annotations
 
+import re
 import socket
 import time
 from multiprocessing.synchronize import Lock
-from typing import Optional
+from typing import List, Optional
 
-from config import HOST, MESSAGE_DELIMITER, PRICE_FEED_PORT, SYMBOLS, SHARED_MEMORY_NAME
-from shared_memory_utils import SharedPriceBook
+import numpy as np
+
+from config import (
+    HOST,
+    PRICE_FEED_PORT,
+    PRICE_FEED_PROTOCOL,
+    SYMBOLS,
+    SHARED_MEMORY_NAME,
+    TEXT_FEED_MAX_SYMBOLS,
+    TEXT_FEED_SYMBOL_PATTERN,
+)
+from framing import FrameReader
+from latency import LatencyRecorder
+from metrics import ProcessMetrics, metrics_name
+from protocol import (
+    BINARY_HELLO,
+    FRAME_KIND_PRICES,
+    FRAME_KIND_SYMBOLS,
+    PRICE_PROTOCOL_BINARY,
+    ProtocolError,
+    decode_price_records,
+    decode_symbols,
+)
+from shared_memory_utils import (
+    SharedDoorbell,
+    SharedPriceBook,
+    SharedTickRing,
+    doorbell_name,
+    tick_ring_name,
+)
+
+ORDERBOOK_COUNTERS = (
+    "price_updates_total",
+    "price_frames_total",
+    "parse_errors_total",
+    "symbols_added_total",
+    "symbols_rejected_total",
+)
+ORDERBOOK_HOPS = ("gateway->orderbook",)
+ORDERBOOK_HISTOGRAMS = ORDERBOOK_HOPS + ("publish_prices",)
+_TEXT_SYMBOL = re.compile(TEXT_FEED_SYMBOL_PATTERN)
+
+
+def orderbook_metrics(shared: bool = False, name: str = SHARED_MEMORY_NAME) -> ProcessMetrics:
+    shared_name = metrics_name(name, "OrderBook") if shared else None
+    return ProcessMetrics("OrderBook", ORDERBOOK_COUNTERS, ORDERBOOK_HISTOGRAMS, shared_name)
 
 
 def run_orderbook(
@@ -16,28 +61,57 @@ def run_orderbook(
     symbols=None,
     shared_name: Optional[str] = None,
     force_recreate: bool = True,
+    protocol: str = PRICE_FEED_PROTOCOL,
 ) -> None:
     symbols = symbols or SYMBOLS
+    shared_name = shared_name or SHARED_MEMORY_NAME
     shared_prices = SharedPriceBook(
         symbols,
-        name=shared_name or SHARED_MEMORY_NAME,
+        name=shared_name,
         create=True,
         force_recreate=force_recreate,
     )
+    tick_ring = SharedTickRing(
+        tick_ring_name(shared_name), create=True, force_recreate=force_recreate
+    )
+    doorbell = SharedDoorbell(
+        doorbell_name(shared_name), create=True, force_recreate=force_recreate
+    )
+    metrics = orderbook_metrics(shared=True, name=shared_name)
+    latency = LatencyRecorder(
+        "OrderBook", histograms={hop: metrics.histogram(hop) for hop in ORDERBOOK_HOPS}
+    )
     try:
-        _pump_prices(shared_prices, lock, host, port)
+        _pump_prices(
+            shared_prices, lock, host, port, tick_ring, doorbell, protocol, latency, metrics
+        )
     finally:
+        metrics.close()
+        metrics.unlink()
+        doorbell.close()
+        tick_ring.close()
         shared_prices.close()
 
 
 def _pump_prices(
-    price_book: SharedPriceBook, lock: Optional[Lock], host: str, port: int
+    price_book: SharedPriceBook,
+    lock: Optional[Lock],
+    host: str,
+    port: int,
+    tick_ring: Optional[SharedTickRing] = None,
+    doorbell: Optional[SharedDoorbell] = None,
+    protocol: str = PRICE_FEED_PROTOCOL,
+    latency: Optional[LatencyRecorder] = None,
+    metrics: Optional[ProcessMetrics] = None,
 ) -> None:
     while True:
         try:
             sock = socket.create_connection((host, port))
-            print("[OrderBook] Connected to price feed.")
-            _recv_loop(sock, price_book, lock)
+            print(f"[OrderBook] Connected to price feed ({protocol}).")
+            if protocol == PRICE_PROTOCOL_BINARY:
+                _recv_binary_loop(sock, price_book, lock, tick_ring, doorbell, latency, metrics)
+            else:
+                _recv_loop(sock, price_book, lock, tick_ring, doorbell, metrics)
         except ConnectionRefusedError:
             print(f"[OrderBook] Price feed {host}:{port} unavailable, retrying in 1s.")
             time.sleep(1)
@@ -45,40 +119,183 @@ def _pump_prices(
             break
 
 
-def _recv_loop(sock: socket.socket, price_book: SharedPriceBook, lock: Optional[Lock]):
-    buffer = b""
+def _recv_loop(
+    sock: socket.socket,
+    price_book: SharedPriceBook,
+    lock: Optional[Lock],
+    tick_ring: Optional[SharedTickRing] = None,
+    doorbell: Optional[SharedDoorbell] = None,
+    metrics: Optional[ProcessMetrics] = None,
+):
+    reader = FrameReader()
     with sock:
         while True:
-            chunk = sock.recv(4096)
-            if not chunk:
+            if not reader.recv(sock):
                 print("[OrderBook] Connection closed by gateway, reconnecting.")
                 break
-            buffer += chunk
-            while True:
-                delimiter_index = buffer.find(MESSAGE_DELIMITER)
-                if delimiter_index == -1:
-                    break
-                token = buffer[:delimiter_index]
-                buffer = buffer[delimiter_index + len(MESSAGE_DELIMITER) :]
-                if not token:
-                    continue
-                _handle_price_token(token, price_book, lock)
+            started = time.perf_counter_ns()
+            published = 0
+            for token in reader.messages():
+                published += _handle_price_token(token, price_book, lock, tick_ring, metrics)
+            if not published:
+                continue
+            # One wake-up and one metrics update per received chunk, not per tick.
+            if doorbell is not None:
+                doorbell.ring()
+            if metrics is not None:
+                metrics.counter("price_updates_total").inc(published)
+                metrics.histogram("publish_prices").record(time.perf_counter_ns() - started)
 
 
-def _handle_price_token(
-    token: bytes, price_book: SharedPriceBook, lock: Optional[Lock]
+def _recv_binary_loop(
+    sock: socket.socket,
+    price_book: SharedPriceBook,
+    lock: Optional[Lock],
+    tick_ring: Optional[SharedTickRing] = None,
+    doorbell: Optional[SharedDoorbell] = None,
+    latency: Optional[LatencyRecorder] = None,
+    metrics: Optional[ProcessMetrics] = None,
+):
+    reader = FrameReader()
+    # Gateway symbol id -> SharedPriceBook row, -1 for symbols we do not track.
+    id_to_row = np.empty(0, dtype=np.int64)
+    # The Gateway's current directory; later directories are universe changes.
+    announced: Optional[List[str]] = None
+    with sock:
+        sock.sendall(BINARY_HELLO)
+        while True:
+            if not reader.recv(sock):
+                print("[OrderBook] Connection closed by gateway, reconnecting.")
+                break
+            published = False
+            try:
+                for kind, count, payload in reader.frames():
+                    if kind == FRAME_KIND_SYMBOLS:
+                        symbols = decode_symbols(payload, count)
+                        if announced is not None:
+                            _follow_universe(announced, symbols, price_book, lock)
+                        announced = symbols
+                        id_to_row = _map_symbols(symbols, price_book)
+                    elif kind == FRAME_KIND_PRICES:
+                        _handle_price_records(
+                            payload, id_to_row, price_book, lock, tick_ring, latency, metrics
+                        )
+                        published = True
+            except ProtocolError as exc:
+                print(f"[OrderBook] Dropping malformed feed ({exc}), reconnecting.")
+                break
+            finally:
+                if published and doorbell is not None:
+                    doorbell.ring()
+            if latency is not None:
+                latency.maybe_report()
+
+
+def _map_symbols(symbols, price_book: SharedPriceBook) -> np.ndarray:
+    return np.array([price_book._index.get(symbol, -1) for symbol in symbols], dtype=np.int64)
+
+
+def _follow_universe(
+    previous: List[str], symbols: List[str], price_book: SharedPriceBook, lock: Optional[Lock]
 ) -> None:
+    """
+    Mirror a live Gateway universe change into the price book. Only changes
+    relative to the connection's first directory count, so an OrderBook
+    started with a subset of the Gateway's symbols keeps that subset.
+    """
+    known = set(previous)
+    added = [symbol for symbol in symbols if symbol not in known]
+    removed = sorted(known.difference(symbols))
+    if lock:
+        with lock:
+            price_book.add_symbols(added)
+            price_book.remove_symbols(removed)
+    else:
+        price_book.add_symbols(added)
+        price_book.remove_symbols(removed)
+    if added or removed:
+        print(f"[OrderBook] Universe change: +{len(added)} / -{len(removed)} symbols.")
+
+
+def _handle_price_records(
+    payload,
+    id_to_row: np.ndarray,
+    price_book: SharedPriceBook,
+    lock: Optional[Lock],
+    tick_ring: Optional[SharedTickRing] = None,
+    latency: Optional[LatencyRecorder] = None,
+    metrics: Optional[ProcessMetrics] = None,
+) -> None:
+    started = time.perf_counter_ns()
+    records = decode_price_records(payload)
+    symbol_ids = records["symbol_id"]
+    known = symbol_ids < len(id_to_row)
+    rows = id_to_row[symbol_ids[known]]
+    tracked = rows >= 0
+    rows = rows[tracked]
+    records = records[known][tracked]
+    prices = records["price"]
+    ts_ns = records["ts_ns"]
+    origin_ns = records["origin_ns"]
+    book_ns = time.monotonic_ns()
+    if lock:
+        with lock:
+            price_book.update_many(rows, prices, ts_ns, origin_ns, book_ns)
+    else:
+        price_book.update_many(rows, prices, ts_ns, origin_ns, book_ns)
+    if tick_ring is not None:
+        tick_ring.publish_many(rows, prices, ts_ns, origin_ns, book_ns)
+    if latency is not None and len(origin_ns):
+        latency.record("gateway->orderbook", book_ns - origin_ns)
+    if metrics is not None:
+        metrics.counter("price_frames_total").inc()
+        metrics.counter("price_updates_total").inc(len(rows))
+        metrics.histogram("publish_prices").record(time.perf_counter_ns() - started)
+
+
+def _handle_price_token(
+    token,
+    price_book: SharedPriceBook,
+    lock: Optional[Lock],
+    tick_ring: Optional[SharedTickRing] = None,
+    metrics: Optional[ProcessMetrics] = None,
+) -> bool:
+    """Returns whether the token was published; callers count and time batches."""
     try:
-        decoded = token.decode()
+        decoded = str(token, "utf-8")
         symbol, price_str = decoded.split(",")
         price = float(price_str)
+        ts_ns = time.time_ns()
+        # The text feed carries no Gateway timestamp; latency starts here.
+        book_ns = time.monotonic_ns()
+        # The one string lookup on this path; everything after uses the row.
+        row = price_book._index.get(symbol)
+        if row is None:
+            # The text feed has no directory; a new token is a new symbol, as
+            # long as it looks like one and the book has room for it.
+            if (
+                not _TEXT_SYMBOL.fullmatch(symbol)
+                or len(price_book.symbols) >= TEXT_FEED_MAX_SYMBOLS
+            ):
+                if metrics is not None:
+                    metrics.counter("symbols_rejected_total").inc()
+                return False
+            row = int(price_book.add_symbols([symbol])[0])
+            if metrics is not None:
+                metrics.counter("symbols_added_total").inc()
         if lock:
             with lock:
-                price_book.update(symbol, price)
+                price_book.update_row(row, price, ts_ns=ts_ns, origin_ns=book_ns)
         else:
-            price_book.update(symbol, price)
+            price_book.update_row(row, price, ts_ns=ts_ns, origin_ns=book_ns)
+        if tick_ring is not None:
+            tick_ring.publish(row, price, ts_ns, book_ns, book_ns)
     except ValueError:
-        print(f"[OrderBook] Could not parse token: {token!r}")
+        print(f"[OrderBook] Could not parse token: {bytes(token)!r}")
+        if metrics is not None:
+            metrics.counter("parse_errors_total").inc()
+        return False
+    return True
 
 
 if __name__ == "__main__":
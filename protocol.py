@@ -0,0 +1,263 @@
+"""
+Wire formats for the Gateway price feed.
+
+The text format is ``SYMBOL,price`` tokens separated by ``MESSAGE_DELIMITER``.
+A client that prefers the binary format sends ``BINARY_HELLO`` right after
+connecting; the Gateway answers with a symbol directory frame and from then
+on streams length-prefixed price frames:
+
+    header  FRAME_HEADER     magic, kind, record count, payload bytes
+    payload PRICE_RECORD * n symbol id (u32), price (f64), timestamp ns (i64),
+                             origin ns (i64)
+
+``timestamp`` is the tick's event time (wall clock, or the historical time
+in a replay); ``origin`` is ``time.monotonic_ns()`` when the Gateway encoded
+the frame, carried through the stack for latency measurement.
+
+Symbol ids index the directory frame. Records are packed little-endian so a
+payload can be decoded in one call with ``np.frombuffer`` or
+``PRICE_RECORD.iter_unpack``.
+
+Orders travel the other way in the same frame layout. A Strategy that sends
+``ORDER_HELLO`` followed by a symbol directory frame of its own may then send
+``FRAME_KIND_ORDERS`` frames of ``ORDER_RECORD``s (symbol id, quantity,
+price in ``PRICE_SCALE`` units, decision and tick timestamps in ns, wall-clock
+decision time in ns, side, sentiment); connections without the hello keep
+sending JSON lines. The first two order timestamps are monotonic, for latency
+only: the decision time and the origin of the tick that triggered it. The
+wall-clock ``time.time_ns()`` decision time is what decoded orders expose as
+``timestamp``, as JSON orders do. The OrderManager answers every binary order frame
+with a ``FRAME_KIND_ACKS`` frame of ``ACK_RECORD``s (symbol id, the order's
+decision time, OrderManager receive and ack times).
+"""
+
+from __future__ import annotations
+
+import struct
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import MESSAGE_DELIMITER
+
+PRICE_PROTOCOL_TEXT = "text"
+PRICE_PROTOCOL_BINARY = "binary"
+
+BINARY_HELLO = b"PFBIN2" + MESSAGE_DELIMITER
+
+FRAME_MAGIC = 0x5046
+FRAME_KIND_PRICES = 1
+FRAME_KIND_SYMBOLS = 2
+FRAME_KIND_ORDERS = 3
+FRAME_KIND_ACKS = 4
+FRAME_HEADER = struct.Struct("<HHII")
+
+PRICE_RECORD = struct.Struct("<Idqq")
+PRICE_WIRE_DTYPE = np.dtype(
+    [("symbol_id", "<u4"), ("price", "<f8"), ("ts_ns", "<i8"), ("origin_ns", "<i8")]
+)
+assert PRICE_WIRE_DTYPE.itemsize == PRICE_RECORD.size
+
+ORDER_PROTOCOL_JSON = "json"
+ORDER_PROTOCOL_BINARY = "binary"
+
+ORDER_HELLO_TOKEN = b"OMBIN2"
+ORDER_HELLO = ORDER_HELLO_TOKEN + MESSAGE_DELIMITER
+
+PRICE_SCALE = 10_000  # order prices travel as integer ten-thousandths
+SIDE_CODES = {"BUY": 1, "SELL": -1}
+SIDE_NAMES = {code: side for side, code in SIDE_CODES.items()}
+NO_SENTIMENT = -1
+
+ORDER_RECORD = struct.Struct("<Iiqqqqbb")
+ORDER_WIRE_DTYPE = np.dtype(
+    [
+        ("symbol_id", "<u4"),
+        ("quantity", "<i4"),
+        ("price", "<i8"),
+        ("ts_ns", "<i8"),
+        ("price_ts_ns", "<i8"),
+        ("wall_ns", "<i8"),
+        ("side", "i1"),
+        ("sentiment", "i1"),
+    ]
+)
+assert ORDER_WIRE_DTYPE.itemsize == ORDER_RECORD.size
+ACK_RECORD = struct.Struct("<Iqqq")
+ACK_WIRE_DTYPE = np.dtype(
+    [("symbol_id", "<u4"), ("order_ts_ns", "<i8"), ("recv_ns", "<i8"), ("ack_ns", "<i8")]
+)
+assert ACK_WIRE_DTYPE.itemsize == ACK_RECORD.size
+
+# One order with its frame header, packed in a single call.
+_ORDER_FRAME = struct.Struct(FRAME_HEADER.format + ORDER_RECORD.format.lstrip("<"))
+
+_SYMBOL_SEPARATOR = b"\n"
+
+
+class ProtocolError(ValueError):
+    """Raised when a binary frame does not match the expected layout."""
+
+
+def format_text_prices(symbols: Sequence[str], prices: Sequence[float]) -> bytes:
+    """``SYMBOL,price`` tokens joined by the delimiter (no trailing delimiter)."""
+    delimiter = MESSAGE_DELIMITER.decode()
+    return delimiter.join(
+        f"{symbol},{price:.2f}" for symbol, price in zip(symbols, prices)
+    ).encode()
+
+
+class TextPriceFormatter:
+    """
+    Formats a full snapshot for a fixed symbol list with a single ``%``
+    operation on a precompiled template instead of one f-string per symbol.
+    """
+
+    def __init__(self, symbols: Sequence[str]) -> None:
+        delimiter = MESSAGE_DELIMITER.decode()
+        self.symbols = list(symbols)
+        self._template = delimiter.join(
+            f"{symbol.replace('%', '%%')},%.2f" for symbol in self.symbols
+        )
+
+    def format(self, prices: np.ndarray) -> bytes:
+        return (self._template % tuple(prices.tolist())).encode()
+
+
+class PriceFrameEncoder:
+    """Reuses one preallocated record array to encode full-universe price frames."""
+
+    def __init__(self, count: int) -> None:
+        self._records = np.zeros(count, dtype=PRICE_WIRE_DTYPE)
+        self._records["symbol_id"] = np.arange(count)
+        self._header = FRAME_HEADER.pack(
+            FRAME_MAGIC, FRAME_KIND_PRICES, count, self._records.nbytes
+        )
+
+    def encode(self, prices: np.ndarray, ts_ns, origin_ns: Optional[int] = None) -> bytes:
+        records = self._records
+        records["price"] = prices
+        records["ts_ns"] = ts_ns
+        records["origin_ns"] = time.monotonic_ns() if origin_ns is None else origin_ns
+        return self._header + records.tobytes()
+
+
+def encode_frame(kind: int, count: int, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(FRAME_MAGIC, kind, count, len(payload)) + payload
+
+
+def decode_frame_header(buffer, offset: int = 0) -> Tuple[int, int, int]:
+    """Return ``(kind, count, payload_length)`` for the frame at ``offset``."""
+    magic, kind, count, length = FRAME_HEADER.unpack_from(buffer, offset)
+    if magic != FRAME_MAGIC:
+        raise ProtocolError(f"Bad frame magic 0x{magic:04x}")
+    return kind, count, length
+
+
+def encode_price_frame(
+    symbol_ids: Sequence[int],
+    prices: Sequence[float],
+    ts_ns,
+    origin_ns: Optional[int] = None,
+) -> bytes:
+    records = np.empty(len(prices), dtype=PRICE_WIRE_DTYPE)
+    records["symbol_id"] = symbol_ids
+    records["price"] = prices
+    records["ts_ns"] = ts_ns
+    records["origin_ns"] = time.monotonic_ns() if origin_ns is None else origin_ns
+    return encode_frame(FRAME_KIND_PRICES, len(records), records.tobytes())
+
+
+def decode_price_records(payload) -> np.ndarray:
+    """Zero-copy structured view over a price frame payload."""
+    if len(payload) % PRICE_WIRE_DTYPE.itemsize:
+        raise ProtocolError(f"Truncated price payload of {len(payload)} bytes")
+    return np.frombuffer(payload, dtype=PRICE_WIRE_DTYPE)
+
+
+def encode_symbol_frame(symbols: Sequence[str]) -> bytes:
+    payload = _SYMBOL_SEPARATOR.join(symbol.encode() for symbol in symbols)
+    return encode_frame(FRAME_KIND_SYMBOLS, len(symbols), payload)
+
+
+def decode_symbols(payload, count: int) -> List[str]:
+    if not count:
+        return []
+    symbols = bytes(payload).decode().split(_SYMBOL_SEPARATOR.decode())
+    if len(symbols) != count:
+        raise ProtocolError(f"Expected {count} symbols, got {len(symbols)}")
+    return symbols
+
+
+def encode_order(
+    symbol_id: int,
+    side: str,
+    quantity: int,
+    price: float,
+    sentiment: Optional[int],
+    ts_ns: int,
+    price_ts_ns: int,
+    wall_ns: Optional[int] = None,
+) -> bytes:
+    """A complete single-order frame; ``wall_ns`` defaults to now."""
+    return _ORDER_FRAME.pack(
+        FRAME_MAGIC,
+        FRAME_KIND_ORDERS,
+        1,
+        ORDER_RECORD.size,
+        symbol_id,
+        quantity,
+        round(price * PRICE_SCALE),
+        ts_ns,
+        price_ts_ns,
+        time.time_ns() if wall_ns is None else wall_ns,
+        SIDE_CODES[side],
+        NO_SENTIMENT if sentiment is None else sentiment,
+    )
+
+
+def decode_orders(payload, symbols: Sequence[str]) -> List[Dict]:
+    """
+    Expand an order frame payload into dicts shaped like the JSON orders,
+    with ``latency_ms`` derived from the two monotonic timestamps (also kept
+    as ``ts_ns`` / ``origin_ns``) and the wall-clock ``timestamp``.
+    """
+    if len(payload) % ORDER_WIRE_DTYPE.itemsize:
+        raise ProtocolError(f"Truncated order payload of {len(payload)} bytes")
+    records = np.frombuffer(payload, dtype=ORDER_WIRE_DTYPE)
+    orders = []
+    for symbol_id, quantity, price, ts_ns, price_ts_ns, wall_ns, side, sentiment in records.tolist():
+        if symbol_id >= len(symbols) or side not in SIDE_NAMES:
+            raise ProtocolError(f"Order references symbol {symbol_id} / side {side}")
+        orders.append(
+            {
+                "symbol": symbols[symbol_id],
+                "side": SIDE_NAMES[side],
+                "quantity": quantity,
+                "price": price / PRICE_SCALE,
+                "sentiment": None if sentiment == NO_SENTIMENT else sentiment,
+                "timestamp": wall_ns / 1e9,
+                "latency_ms": round((ts_ns - price_ts_ns) / 1e6, 2),
+                "ts_ns": ts_ns,
+                "origin_ns": price_ts_ns,
+            }
+        )
+    return orders
+
+
+def encode_ack_frame(
+    symbol_ids: np.ndarray, order_ts_ns: np.ndarray, recv_ns: int, ack_ns: int
+) -> bytes:
+    records = np.empty(len(symbol_ids), dtype=ACK_WIRE_DTYPE)
+    records["symbol_id"] = symbol_ids
+    records["order_ts_ns"] = order_ts_ns
+    records["recv_ns"] = recv_ns
+    records["ack_ns"] = ack_ns
+    return encode_frame(FRAME_KIND_ACKS, len(records), records.tobytes())
+
+
+def decode_acks(payload) -> np.ndarray:
+    if len(payload) % ACK_WIRE_DTYPE.itemsize:
+        raise ProtocolError(f"Truncated ack payload of {len(payload)} bytes")
+    return np.frombuffer(payload, dtype=ACK_WIRE_DTYPE)
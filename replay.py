@@ -0,0 +1,222 @@
+"""
+Historical tick replay for the Gateway.
+
+``load_ticks`` converts a CSV (or Parquet, when pyarrow is installed) tick
+file into a columnar cache next to it on first use, one ``.npy`` per column
+(``ts_ns``, ``symbol_id``, ``price``), and memory-maps those afterwards, so
+even very large days load instantly and are paged in on demand. Each batch
+reads one contiguous slice per column; the paced search scans ``ts_ns`` only. ``TickReplaySource`` walks the ticks in timestamp order and
+yields batches paced by the original timestamps divided by ``speed``
+(``speed <= 0`` replays as fast as possible).
+
+Usage: ``python replay.py ticks.csv --speed 10``
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import REPLAY_MAX_BATCH, REPLAY_SPEED
+
+REPLAY_COLUMNS = {"ts_ns": np.int64, "symbol_id": np.int64, "price": np.float64}
+
+_TIMESTAMP_COLUMNS = ("timestamp", "ts", "time", "datetime", "date")
+_SYMBOL_COLUMNS = ("symbol", "ticker")
+_PRICE_COLUMNS = ("price", "last", "close")
+
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray]
+Columns = Dict[str, np.ndarray]
+
+
+def load_ticks(path: str) -> Tuple[List[str], Columns]:
+    """Return ``(symbols, columns)``, each column a read-only memory map."""
+    cache_paths = {name: f"{path}.{name}.npy" for name in REPLAY_COLUMNS}
+    symbols_path = f"{path}.symbols.json"
+    if not _cache_is_fresh(path, [*cache_paths.values(), symbols_path]):
+        symbols, columns = _convert(path)
+        for name, cache_path in cache_paths.items():
+            np.save(cache_path, columns[name])
+        with open(symbols_path, "w", encoding="utf-8") as handle:
+            json.dump(symbols, handle)
+    with open(symbols_path, encoding="utf-8") as handle:
+        symbols = json.load(handle)
+    return symbols, {
+        name: np.load(cache_path, mmap_mode="r") for name, cache_path in cache_paths.items()
+    }
+
+
+def _cache_is_fresh(path: str, cache_paths: List[str]) -> bool:
+    try:
+        source_mtime = os.path.getmtime(path)
+        return all(os.path.getmtime(cache_path) >= source_mtime for cache_path in cache_paths)
+    except FileNotFoundError:
+        return False
+
+
+def _convert(path: str) -> Tuple[List[str], Columns]:
+    if path.endswith(".parquet"):
+        timestamps, symbol_names, prices = _read_parquet(path)
+    else:
+        timestamps, symbol_names, prices = _read_csv(path)
+    symbols, symbol_ids = np.unique(np.asarray(symbol_names, dtype=object), return_inverse=True)
+    order = np.argsort(timestamps, kind="stable")
+    columns = {"ts_ns": timestamps, "symbol_id": symbol_ids, "price": prices}
+    return [str(symbol) for symbol in symbols], {
+        name: np.ascontiguousarray(columns[name][order], dtype=dtype)
+        for name, dtype in REPLAY_COLUMNS.items()
+    }
+
+
+def _read_csv(path: str):
+    timestamps: List[int] = []
+    symbols: List[str] = []
+    prices: List[float] = []
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = [column.strip().lower() for column in next(reader)]
+        ts_col = _find_column(header, _TIMESTAMP_COLUMNS, path)
+        symbol_col = _find_column(header, _SYMBOL_COLUMNS, path)
+        price_col = _find_column(header, _PRICE_COLUMNS, path)
+        for row in reader:
+            if not row:
+                continue
+            timestamps.append(_parse_timestamp(row[ts_col]))
+            symbols.append(row[symbol_col].strip())
+            prices.append(float(row[price_col]))
+    return np.array(timestamps, dtype=np.int64), symbols, np.array(prices, dtype=np.float64)
+
+
+def _read_parquet(path: str):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Replaying Parquet files requires pyarrow.") from exc
+    table = pq.read_table(path)
+    header = [name.lower() for name in table.column_names]
+    ts_values = table.column(_find_column(header, _TIMESTAMP_COLUMNS, path)).to_pylist()
+    symbols = table.column(_find_column(header, _SYMBOL_COLUMNS, path)).to_pylist()
+    prices = table.column(_find_column(header, _PRICE_COLUMNS, path)).to_numpy()
+    timestamps = np.array([_parse_timestamp(value) for value in ts_values], dtype=np.int64)
+    return timestamps, [str(symbol) for symbol in symbols], prices.astype(np.float64)
+
+
+def _find_column(header: List[str], candidates, path: str) -> int:
+    for name in candidates:
+        if name in header:
+            return header.index(name)
+    raise ValueError(f"{path}: none of the columns {candidates} found in {header}")
+
+
+def _parse_timestamp(value) -> int:
+    """Epoch seconds/ms/us/ns (by magnitude) or an ISO-8601 string, as ns."""
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            value = float(text)
+        except ValueError:
+            return int(np.datetime64(text, "ns").astype(np.int64))
+    elif not isinstance(value, (int, float)):
+        # datetime-like values coming out of Parquet.
+        return int(value.timestamp() * 1_000_000_000)
+    magnitude = abs(value)
+    if magnitude >= 1e17:
+        return int(value)
+    if magnitude >= 1e14:
+        return int(value * 1_000)
+    if magnitude >= 1e11:
+        return int(value * 1_000_000)
+    return int(value * 1_000_000_000)
+
+
+class TickReplaySource:
+    """
+    Streams memory-mapped ticks in batches. In paced mode every tick whose
+    scaled timestamp is due is sent together (capped at ``max_batch``); in
+    as-fast-as-possible mode batches are simply ``max_batch`` ticks long.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        speed: float = REPLAY_SPEED,
+        max_batch: int = REPLAY_MAX_BATCH,
+    ) -> None:
+        self.path = path
+        self.symbols, self.ticks = load_ticks(path)
+        self.speed = speed
+        self.max_batch = max_batch
+        self.sent = 0
+        self.batches_sent = 0
+        self.elapsed = 0.0
+
+    def batches(self) -> Iterator[Batch]:
+        timestamps = self.ticks["ts_ns"]
+        symbol_ids = self.ticks["symbol_id"]
+        prices = self.ticks["price"]
+        total = self.total
+        if not total:
+            return
+        paced = self.speed > 0
+        first_ts = int(timestamps[0])
+        start = time.perf_counter()
+        pos = 0
+        while pos < total:
+            end = min(pos + self.max_batch, total)
+            if paced:
+                due_ts = first_ts + (time.perf_counter() - start) * self.speed * 1e9
+                next_ts = int(timestamps[pos])
+                if next_ts > due_ts:
+                    time.sleep((next_ts - due_ts) / self.speed / 1e9)
+                    due_ts = first_ts + (time.perf_counter() - start) * self.speed * 1e9
+                due_end = int(np.searchsorted(timestamps, due_ts, side="right"))
+                end = min(end, max(due_end, pos + 1))
+            batch = (
+                np.array(symbol_ids[pos:end]),
+                np.array(prices[pos:end]),
+                np.array(timestamps[pos:end]),
+            )
+            self.sent += end - pos
+            pos = end
+            self.batches_sent += 1
+            self.elapsed = time.perf_counter() - start
+            yield batch
+        self.elapsed = time.perf_counter() - start
+
+    @property
+    def total(self) -> int:
+        """Ticks in the file."""
+        return len(self.ticks["ts_ns"])
+
+    @property
+    def throughput(self) -> float:
+        """Ticks per second achieved so far."""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        return (
+            f"{self.sent} ticks in {self.batches_sent} batches over "
+            f"{self.elapsed:.2f}s ({self.throughput:,.0f} ticks/s, speed={self.speed})"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from gateway import run_gateway
+
+    parser = argparse.ArgumentParser(description="Replay a tick file through the Gateway.")
+    parser.add_argument("path", help="CSV or Parquet file with timestamp, symbol, price columns")
+    parser.add_argument(
+        "--speed", type=float, default=REPLAY_SPEED, help="time multiplier, 0 = as fast as possible"
+    )
+    args = parser.parse_args(argv)
+    run_gateway(replay_path=args.path, replay_speed=args.speed)
+
+
+if __name__ == "__main__":
+    main()
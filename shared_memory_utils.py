@@ -1,19 +1,110 @@
 from __future__ import annotations
 
 import contextlib
+import socket
+import time
 from multiprocessing import shared_memory
-from typing import Dict, Iterable, List, Optional
+from multiprocessing.synchronize import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 
-from config import SHARED_MEMORY_NAME, SYMBOLS
+from config import DOORBELL_SLOTS, HOST, SHARED_MEMORY_NAME, SYMBOLS, TICK_RING_CAPACITY
+
+# One row per symbol. ``seq`` doubles as the row's seqlock counter: it is odd
+# while the writer is mid-update and ``seq // 2`` is the number of updates.
+# ``origin_ns`` (Gateway send) and ``book_ns`` (OrderBook publish) are
+# ``time.monotonic_ns()`` stamps used to measure per-hop latency.
+PRICE_RECORD_DTYPE = np.dtype(
+    [
+        ("seq", np.uint64),
+        ("ts_ns", np.int64),
+        ("bid", np.float64),
+        ("ask", np.float64),
+        ("last", np.float64),
+        ("size", np.int64),
+        ("origin_ns", np.int64),
+        ("book_ns", np.int64),
+    ]
+)
+
+# One slot of the tick ring; ``symbol_id`` is the row in the SharedPriceBook.
+TICK_RECORD_DTYPE = np.dtype(
+    [
+        ("symbol_id", np.int64),
+        ("price", np.float64),
+        ("ts_ns", np.int64),
+        ("origin_ns", np.int64),
+        ("book_ns", np.int64),
+    ]
+)
+
+# Price book segment layout: ``_BOOK_HEADER_WORDS`` uint64 header words, a
+# directory of ``capacity`` ``SYMBOL_SLOT_DTYPE`` entries, then ``capacity``
+# ``PRICE_RECORD_DTYPE`` rows starting on a 64-byte boundary. Rows are handed
+# out in order and never reused, so a row number is a stable symbol id.
+BOOK_MAGIC = int.from_bytes(b"PFBOOK01", "little")
+BOOK_LAYOUT_VERSION = 1
+SYMBOL_SLOT_DTYPE = np.dtype([("symbol", "S31"), ("active", "u1")])
+_BOOK_MAGIC = 0
+_BOOK_LAYOUT = 1
+_BOOK_CAPACITY = 2
+_BOOK_COUNT = 3
+_BOOK_GENERATION = 4
+# Only meaningful in the root (generation 0) segment: the newest generation,
+# and a counter bumped after every directory change that readers poll.
+_BOOK_LATEST = 5
+_BOOK_VERSION = 6
+_BOOK_HEADER_WORDS = 8
+
+# Tick ring header words (uint64). CLAIM is raised before slots are written and
+# HEAD after, so readers can tell which copied slots may have been overwritten.
+_RING_HEAD = 0
+_RING_CLAIM = 1
+_RING_CAPACITY = 2
+_RING_HEADER_WORDS = 8
+
+# Spins a reader performs on a busy row before yielding its time slice.
+_SPIN_LIMIT = 100
+
+
+def price_book_segment_name(name: str, generation: int) -> str:
+    """Generation 0 is the root segment every process opens by ``name``."""
+    return name if generation == 0 else f"{name}_g{generation}"
+
+
+def _book_offsets(capacity: int) -> Tuple[int, int, int]:
+    """Directory offset, records offset and total size for ``capacity`` rows."""
+    directory = _BOOK_HEADER_WORDS * np.uint64().nbytes
+    records = -(-(directory + capacity * SYMBOL_SLOT_DTYPE.itemsize) // 64) * 64
+    return directory, records, records + capacity * PRICE_RECORD_DTYPE.itemsize
 
 
 class SharedPriceBook:
     """
     Wrapper around multiprocessing.shared_memory.SharedMemory that stores one
-    float per symbol. Prices default to NaN until the OrderBook publishes the
-    first tick.
+    ``PRICE_RECORD_DTYPE`` row (bid/ask/last/size/timestamp/seq) per symbol.
+    Prices default to NaN until the OrderBook publishes the first tick.
+
+    Every row is guarded by its own sequence counter (a seqlock) living in the
+    same segment, so no inter-process lock is needed. The single writer bumps
+    the counter to an odd value, stores the fields and bumps it back to even;
+    readers never block and simply retry a row whose counter was odd or
+    changed while they were copying it.
+
+    The symbol universe lives in the segment too. The writer (``create=True``)
+    can ``add_symbols`` and ``remove_symbols`` while readers are attached; a
+    removed symbol keeps its row, marked inactive with NaN prices. When the
+    segment is full the writer copies it into a new generation segment twice
+    the size and points the root segment at it. Readers call ``refresh`` (it
+    runs at the start of every ``read_records``) to pick up new symbols and
+    remap to the newest generation; superseded generations stay mapped until
+    ``close``, so views taken from them remain valid.
+
+    ``last``, ``bid``, ``ask``, ``size``, ``timestamps`` and ``sequences`` are
+    zero-copy column views over the current generation for vectorized
+    consumers; use ``read_records`` when the fields of a row must be read
+    consistently.
     """
 
     def __init__(
@@ -22,48 +113,306 @@ class SharedPriceBook:
         name: str = SHARED_MEMORY_NAME,
         create: bool = False,
         force_recreate: bool = False,
+        capacity: Optional[int] = None,
     ) -> None:
-        self.symbols: List[str] = list(symbols) if symbols is not None else SYMBOLS
         self.name = name
-        self._index = {symbol: idx for idx, symbol in enumerate(self.symbols)}
-        size = len(self.symbols) * np.float64().nbytes
-
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._retired: List[shared_memory.SharedMemory] = []
+        self._version = -1
         if create:
+            symbols = list(symbols) if symbols is not None else SYMBOLS
+            capacity = max(capacity or 0, len(symbols), 1)
             if force_recreate:
                 self._try_cleanup_existing(name)
             try:
-                self.shm = shared_memory.SharedMemory(
-                    name=self.name, create=True, size=size
+                self._root = shared_memory.SharedMemory(
+                    name=self.name, create=True, size=_book_offsets(capacity)[2]
                 )
+                _init_book_header(self._root, capacity, 0)
             except FileExistsError:
                 # Someone already created it – attach to the existing segment.
-                self.shm = shared_memory.SharedMemory(name=self.name)
+                self._root = shared_memory.SharedMemory(name=self.name)
         else:
-            self.shm = shared_memory.SharedMemory(name=self.name)
-
-        self.array = np.ndarray(
-            (len(self.symbols),), dtype=np.float64, buffer=self.shm.buf
+            self._root = shared_memory.SharedMemory(name=self.name)
+        self._root_header = np.ndarray(
+            (_BOOK_HEADER_WORDS,), dtype=np.uint64, buffer=self._root.buf
         )
+        if int(self._root_header[_BOOK_MAGIC]) != BOOK_MAGIC:
+            self._root.close()
+            raise ValueError(f"{name} is not an initialized price book segment")
+        self._map(self._root, 0)
+        self.refresh()
         if create:
-            self.array[:] = np.nan
+            self.add_symbols(symbols)
+
+    def _map(self, shm: shared_memory.SharedMemory, generation: int) -> None:
+        header = np.ndarray((_BOOK_HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+        capacity = int(header[_BOOK_CAPACITY])
+        directory, records, _ = _book_offsets(capacity)
+        self.shm = shm
+        self.generation = generation
+        self.capacity = capacity
+        self._header = header
+        self._directory = np.ndarray(
+            (capacity,), dtype=SYMBOL_SLOT_DTYPE, buffer=shm.buf, offset=directory
+        )
+        self._rows = np.ndarray(
+            (capacity,), dtype=PRICE_RECORD_DTYPE, buffer=shm.buf, offset=records
+        )
+        self._resize(len(self.symbols))
+
+    def _resize(self, count: int) -> None:
+        self.records = self._rows[:count]
+        self._seq = self.records["seq"]
+        # Kept under its historical name: the last traded price per symbol.
+        self.array = self.records["last"]
+        self.active = self._directory["active"][:count].view(bool)
+
+    @property
+    def last(self) -> np.ndarray:
+        return self.records["last"]
+
+    @property
+    def bid(self) -> np.ndarray:
+        return self.records["bid"]
+
+    @property
+    def ask(self) -> np.ndarray:
+        return self.records["ask"]
+
+    @property
+    def size(self) -> np.ndarray:
+        return self.records["size"]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.records["ts_ns"]
+
+    @property
+    def sequences(self) -> np.ndarray:
+        return self._seq
+
+    def refresh(self) -> bool:
+        """
+        Pick up directory changes and generation switches made by the writer;
+        returns whether anything changed. Costs one header read when nothing
+        did, so it is safe to call every cycle.
+        """
+        version = int(self._root_header[_BOOK_VERSION])
+        if version == self._version:
+            return False
+        latest = int(self._root_header[_BOOK_LATEST])
+        if latest != self.generation:
+            try:
+                shm = shared_memory.SharedMemory(
+                    name=price_book_segment_name(self.name, latest)
+                )
+            except FileNotFoundError:
+                # Superseded again while we looked; the next call catches up.
+                return False
+            self._retire(self.shm)
+            self._map(shm, latest)
+        count = int(self._header[_BOOK_COUNT])
+        names = self._directory["symbol"]
+        for row in range(len(self.symbols), count):
+            symbol = names[row].decode()
+            self.symbols.append(symbol)
+            self._index[symbol] = row
+        self._resize(count)
+        self._version = version
+        return True
+
+    def add_symbols(self, symbols: Iterable[str]) -> np.ndarray:
+        """
+        Writer only: start tracking ``symbols`` (reactivating removed ones) and
+        return their rows. Grows into a new generation when the segment is full.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        new = [symbol for symbol in symbols if symbol not in self._index]
+        for symbol in new:
+            if len(symbol.encode()) > SYMBOL_SLOT_DTYPE["symbol"].itemsize:
+                raise ValueError(f"Symbol {symbol!r} does not fit the directory")
+        count = len(self.symbols)
+        if count + len(new) > self.capacity:
+            self._grow(max(self.capacity * 2, count + len(new)))
+        for row, symbol in enumerate(new, start=count):
+            self._rows[row] = (0, 0, np.nan, np.nan, np.nan, 0, 0, 0)
+            self._directory[row] = (symbol.encode(), 1)
+            self.symbols.append(symbol)
+            self._index[symbol] = row
+        rows = np.array([self._index[symbol] for symbol in symbols], dtype=np.int64)
+        changed = bool(new)
+        if len(rows) and not self._directory["active"][rows].all():
+            self._directory["active"][rows] = 1
+            changed = True
+        if changed:
+            self._header[_BOOK_COUNT] = len(self.symbols)
+            self._resize(len(self.symbols))
+            self._publish()
+        return rows
+
+    def remove_symbols(self, symbols: Iterable[str]) -> None:
+        """Writer only: mark ``symbols`` inactive and blank their prices."""
+        rows = [self._index[symbol] for symbol in symbols if symbol in self._index]
+        rows = [row for row in rows if self.active[row]]
+        if not rows:
+            return
+        seq = self._seq
+        records = self.records
+        seq[rows] += 1
+        for field in ("last", "bid", "ask"):
+            records[field][rows] = np.nan
+        records["book_ns"][rows] = time.monotonic_ns()
+        seq[rows] += 1
+        self._directory["active"][rows] = 0
+        self._publish()
+
+    def _grow(self, capacity: int) -> None:
+        generation = self.generation + 1
+        name = price_book_segment_name(self.name, generation)
+        self._try_cleanup_existing(name)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_book_offsets(capacity)[2])
+        count = len(self.symbols)
+        directory, records, _ = _book_offsets(capacity)
+        np.ndarray((count,), dtype=SYMBOL_SLOT_DTYPE, buffer=shm.buf, offset=directory)[:] = (
+            self._directory[:count]
+        )
+        np.ndarray((count,), dtype=PRICE_RECORD_DTYPE, buffer=shm.buf, offset=records)[:] = (
+            self._rows[:count]
+        )
+        _init_book_header(shm, capacity, generation, count)
+        previous = self.shm
+        self._map(shm, generation)
+        self._root_header[_BOOK_LATEST] = generation
+        self._publish()
+        self._retire(previous, unlink=True)
+
+    def _publish(self) -> None:
+        self._root_header[_BOOK_VERSION] += 1
+        self._version = int(self._root_header[_BOOK_VERSION])
 
-    def update(self, symbol: str, price: float) -> None:
-        idx = self._index[symbol]
-        self.array[idx] = price
+    def _retire(self, shm: shared_memory.SharedMemory, unlink: bool = False) -> None:
+        if shm is self._root:
+            return
+        if unlink:
+            with contextlib.suppress(FileNotFoundError):
+                shm.unlink()
+        self._retired.append(shm)
+
+    def update(
+        self,
+        symbol: str,
+        price: float,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        size: Optional[int] = None,
+        ts_ns: Optional[int] = None,
+        origin_ns: Optional[int] = None,
+    ) -> None:
+        """
+        Publish a new last price (and optionally quote fields) for ``symbol``.
+        Fields left as ``None`` keep their previous value; ``ts_ns`` defaults
+        to the wall-clock time of the update and ``origin_ns`` to the publish
+        time, for feeds that carry no Gateway timestamp.
+        """
+        self.update_row(self._index[symbol], price, bid, ask, size, ts_ns, origin_ns)
+
+    def update_row(
+        self,
+        idx: int,
+        price: float,
+        bid: Optional[float] = None,
+        ask: Optional[float] = None,
+        size: Optional[int] = None,
+        ts_ns: Optional[int] = None,
+        origin_ns: Optional[int] = None,
+    ) -> None:
+        """``update`` for a row (symbol id) the caller already resolved."""
+        row = self.records[idx : idx + 1]
+        seq = self._seq
+        book_ns = time.monotonic_ns()
+        seq[idx] += 1
+        row["last"] = price
+        row["ts_ns"] = time.time_ns() if ts_ns is None else ts_ns
+        row["origin_ns"] = book_ns if origin_ns is None else origin_ns
+        row["book_ns"] = book_ns
+        if bid is not None:
+            row["bid"] = bid
+        if ask is not None:
+            row["ask"] = ask
+        if size is not None:
+            row["size"] = size
+        seq[idx] += 1
+
+    def update_many(
+        self,
+        rows: np.ndarray,
+        prices: np.ndarray,
+        ts_ns: np.ndarray,
+        origin_ns=None,
+        book_ns: Optional[int] = None,
+    ) -> None:
+        """Publish last prices for several rows (book indices) in one pass."""
+        seq = self._seq
+        records = self.records
+        book_ns = time.monotonic_ns() if book_ns is None else book_ns
+        seq[rows] += 1
+        records["last"][rows] = prices
+        records["ts_ns"][rows] = ts_ns
+        records["origin_ns"][rows] = book_ns if origin_ns is None else origin_ns
+        records["book_ns"][rows] = book_ns
+        seq[rows] += 1
 
     def read(self, symbol: str) -> float:
-        idx = self._index[symbol]
-        return float(self.array[idx])
+        idx = self._index.get(symbol)
+        if idx is None:
+            self.refresh()
+            idx = self._index[symbol]
+        return float(self._read_row(idx)["last"])
+
+    def read_records(self) -> np.ndarray:
+        """Return a copy of every row in which each row is internally consistent."""
+        self.refresh()
+        before = self._seq.copy()
+        records = self.records.copy()
+        torn = ((before & 1) == 1) | (self._seq != before)
+        for idx in np.flatnonzero(torn):
+            records[idx] = self._read_row(int(idx))
+        return records
 
     def snapshot(self) -> Dict[str, float]:
-        return {symbol: float(self.array[idx]) for symbol, idx in self._index.items()}
+        """Last price of every active symbol."""
+        last = self.read_records()["last"].tolist()
+        active = self.active
+        if active.all():
+            return dict(zip(self.symbols, last))
+        return {self.symbols[row]: last[row] for row in np.flatnonzero(active).tolist()}
+
+    def _read_row(self, idx: int) -> np.void:
+        seq = self._seq
+        spins = 0
+        while True:
+            before = seq[idx]
+            if not before & 1:
+                row = self.records[idx].copy()
+                if seq[idx] == before:
+                    return row
+            spins += 1
+            if spins >= _SPIN_LIMIT:
+                spins = 0
+                time.sleep(0)
 
     def close(self) -> None:
-        self.shm.close()
+        for shm in {id(shm): shm for shm in (self.shm, *self._retired, self._root)}.values():
+            shm.close()
+        self._retired = []
 
     def unlink(self) -> None:
-        with contextlib.suppress(FileNotFoundError):
-            self.shm.unlink()
+        """Remove the root and current generation segments (writer only)."""
+        for shm in (self.shm, self._root):
+            with contextlib.suppress(FileNotFoundError):
+                shm.unlink()
 
     @staticmethod
     def _try_cleanup_existing(name: str) -> None:
@@ -71,3 +420,301 @@ class SharedPriceBook:
             shm = shared_memory.SharedMemory(name=name)
             shm.close()
             shm.unlink()
+
+
+def _init_book_header(
+    shm: shared_memory.SharedMemory, capacity: int, generation: int, count: int = 0
+) -> None:
+    header = np.ndarray((_BOOK_HEADER_WORDS,), dtype=np.uint64, buffer=shm.buf)
+    header[:] = 0
+    header[_BOOK_LAYOUT] = BOOK_LAYOUT_VERSION
+    header[_BOOK_CAPACITY] = capacity
+    header[_BOOK_COUNT] = count
+    header[_BOOK_GENERATION] = generation
+    # Written last: readers treat a segment without the magic as not ready.
+    header[_BOOK_MAGIC] = BOOK_MAGIC
+
+
+def tick_ring_name(price_book_name: str) -> str:
+    return f"{price_book_name}_ticks"
+
+
+class SharedTickRing:
+    """
+    Fixed-size single-producer / multi-consumer ring of ``TICK_RECORD_DTYPE``
+    slots in shared memory. The OrderBook publishes every tick it parses and
+    each consumer keeps its own cursor, so no intermediate price is lost
+    between Strategy cycles.
+
+    The producer never waits for consumers. A consumer that falls more than
+    ``capacity`` ticks behind skips ahead to the oldest slot still intact and
+    records the gap in ``overruns`` (events) and ``lost`` (ticks).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = TICK_RING_CAPACITY,
+        create: bool = False,
+        force_recreate: bool = False,
+    ) -> None:
+        self.name = name
+        header_size = _RING_HEADER_WORDS * np.uint64().nbytes
+
+        if create:
+            if force_recreate:
+                SharedPriceBook._try_cleanup_existing(name)
+            try:
+                self.shm = shared_memory.SharedMemory(
+                    name=name,
+                    create=True,
+                    size=header_size + capacity * TICK_RECORD_DTYPE.itemsize,
+                )
+            except FileExistsError:
+                self.shm = shared_memory.SharedMemory(name=name)
+                create = False
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self._header = np.ndarray(
+            (_RING_HEADER_WORDS,), dtype=np.uint64, buffer=self.shm.buf
+        )
+        if create:
+            self._header[:] = 0
+            self._header[_RING_CAPACITY] = capacity
+        self.capacity = int(self._header[_RING_CAPACITY])
+        self.slots = np.ndarray(
+            (self.capacity,),
+            dtype=TICK_RECORD_DTYPE,
+            buffer=self.shm.buf,
+            offset=header_size,
+        )
+
+        # Consumer state is process-local; a fresh reader starts at the head.
+        self.cursor = self.head
+        self.received = 0
+        self.overruns = 0
+        self.lost = 0
+
+    @property
+    def head(self) -> int:
+        """Total number of ticks published since the ring was created."""
+        return int(self._header[_RING_HEAD])
+
+    def publish(
+        self,
+        symbol_id: int,
+        price: float,
+        ts_ns: int,
+        origin_ns: int = 0,
+        book_ns: int = 0,
+    ) -> None:
+        head = int(self._header[_RING_HEAD])
+        self._header[_RING_CLAIM] = head + 1
+        self.slots[head % self.capacity] = (symbol_id, price, ts_ns, origin_ns, book_ns)
+        self._header[_RING_HEAD] = head + 1
+
+    def publish_many(
+        self,
+        symbol_ids: np.ndarray,
+        prices: np.ndarray,
+        ts_ns: np.ndarray,
+        origin_ns=0,
+        book_ns: int = 0,
+    ) -> None:
+        count = len(symbol_ids)
+        if not count:
+            return
+        head = int(self._header[_RING_HEAD])
+        keep = min(count, self.capacity)
+        positions = np.arange(head + count - keep, head + count) % self.capacity
+        self._header[_RING_CLAIM] = head + count
+        slots = self.slots
+        slots["symbol_id"][positions] = symbol_ids[-keep:]
+        slots["price"][positions] = prices[-keep:]
+        slots["ts_ns"][positions] = ts_ns[-keep:]
+        slots["origin_ns"][positions] = (
+            origin_ns[-keep:] if isinstance(origin_ns, np.ndarray) else origin_ns
+        )
+        slots["book_ns"][positions] = book_ns
+        self._header[_RING_HEAD] = head + count
+
+    def read(self, max_items: Optional[int] = None) -> np.ndarray:
+        """Copy out every tick published since the previous call."""
+        head = int(self._header[_RING_HEAD])
+        cursor = self.cursor
+        if head < cursor:
+            # The producer recreated the ring; start over from its beginning.
+            cursor = 0
+        oldest = head - self.capacity
+        if cursor < oldest:
+            self._record_overrun(oldest - cursor)
+            cursor = oldest
+        if max_items is not None:
+            head = min(head, cursor + max_items)
+        if head == cursor:
+            return self.slots[:0].copy()
+
+        ticks = np.take(self.slots, np.arange(cursor, head), mode="wrap")
+        # Slots below CLAIM - capacity may have been rewritten while copying.
+        intact_from = int(self._header[_RING_CLAIM]) - self.capacity
+        if intact_from > cursor:
+            torn = min(intact_from, head) - cursor
+            self._record_overrun(torn)
+            ticks = ticks[torn:]
+        self.cursor = head
+        self.received += len(ticks)
+        return ticks
+
+    def _record_overrun(self, lost: int) -> None:
+        self.overruns += 1
+        self.lost += lost
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def unlink(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            self.shm.unlink()
+
+
+def doorbell_name(price_book_name: str) -> str:
+    return f"{price_book_name}_bell"
+
+
+class SharedDoorbell:
+    """
+    Wake-up signal from the OrderBook to any number of Strategy processes.
+
+    Each subscriber binds a loopback UDP socket and registers its port in a
+    small shared-memory table; ``ring`` sends a one-byte datagram to every
+    registered port. Datagrams never block the sender, and the subscriber's
+    socket can be passed to ``select`` together with the news socket so the
+    Strategy wakes on whichever update lands first. A missed datagram only
+    delays a subscriber until its fallback poll timeout.
+
+    Slots are claimed and released under ``lock``; processes that may
+    subscribe at the same time must share one. Slots left behind by a
+    process that exited without ``close`` are reclaimed once their port is
+    no longer bound.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slots: int = DOORBELL_SLOTS,
+        create: bool = False,
+        force_recreate: bool = False,
+        host: str = HOST,
+        lock: Optional[Lock] = None,
+    ) -> None:
+        self.name = name
+        self.host = host
+        self._lock = lock if lock is not None else contextlib.nullcontext()
+        if create:
+            if force_recreate:
+                SharedPriceBook._try_cleanup_existing(name)
+            try:
+                self.shm = shared_memory.SharedMemory(
+                    name=name, create=True, size=slots * np.uint64().nbytes
+                )
+            except FileExistsError:
+                self.shm = shared_memory.SharedMemory(name=name)
+                create = False
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self._ports = np.ndarray(
+            (self.shm.size // np.uint64().nbytes,), dtype=np.uint64, buffer=self.shm.buf
+        )
+        if create:
+            self._ports[:] = 0
+        self._sender: Optional[socket.socket] = None
+        self.socket: Optional[socket.socket] = None
+        self._slot: Optional[int] = None
+        self._port = 0
+
+    def ring(self) -> None:
+        ports = self._ports
+        active = ports[ports != 0]
+        if not len(active):
+            return
+        if self._sender is None:
+            self._sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+        for port in active.tolist():
+            try:
+                self._sender.sendto(b"\x01", (self.host, port))
+            except OSError:
+                # Full receive buffer or a departed subscriber; either way the
+                # subscriber already has a wake-up pending or no longer cares.
+                continue
+
+    def subscribe(self) -> socket.socket:
+        """Register a wake-up socket for this process and return it."""
+        if self.socket is not None:
+            return self.socket
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.host, 0))
+        sock.setblocking(False)
+        port = sock.getsockname()[1]
+        with self._lock:
+            slot = self._free_slot()
+            if slot is not None:
+                self._ports[slot] = port
+        if slot is None:
+            sock.close()
+            raise RuntimeError(f"No free doorbell slot in {self.name}")
+        self._slot, self._port = slot, port
+        self.socket = sock
+        return sock
+
+    def _free_slot(self) -> Optional[int]:
+        free = np.flatnonzero(self._ports == 0)
+        if len(free):
+            return int(free[0])
+        for slot, port in enumerate(self._ports.tolist()):
+            if not self._port_bound(port):
+                return slot
+        return None
+
+    def _port_bound(self, port: int) -> bool:
+        probe = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            probe.bind((self.host, port))
+        except OSError:
+            return True
+        finally:
+            probe.close()
+        return False
+
+    def drain(self) -> int:
+        """Consume pending wake-ups; returns how many were queued."""
+        drained = 0
+        if self.socket is None:
+            return drained
+        while True:
+            try:
+                self.socket.recv(64)
+            except OSError:
+                return drained
+            drained += 1
+
+    def close(self) -> None:
+        if self._slot is not None:
+            with self._lock:
+                # A subscriber that reclaimed the slot keeps it.
+                if self._ports[self._slot] == self._port:
+                    self._ports[self._slot] = 0
+            self._slot = None
+        for sock in (self.socket, self._sender):
+            if sock is not None:
+                with contextlib.suppress(OSError):
+                    sock.close()
+        self.socket = None
+        self._sender = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            self.shm.unlink()
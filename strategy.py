@@ -1,28 +1,94 @@
 from __future__ import annotations
 
 import json
-import math
+import os
+import re
+import select
 import socket
 import time
-from collections import deque
+import zlib
 from multiprocessing.synchronize import Lock
-from typing import Deque, Dict, Optional
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
 
 from config import (
     BEARISH_THRESHOLD,
     BULLISH_THRESHOLD,
     HOST,
     LONG_WINDOW,
-    MAX_PRICE_HISTORY,
     MESSAGE_DELIMITER,
     NEWS_FEED_PORT,
     ORDER_MANAGER_PORT,
+    ORDER_PROTOCOL,
     ORDER_QUANTITY,
     SHORT_WINDOW,
+    STRATEGY_CHECKPOINT_DIR,
+    STRATEGY_POLL_INTERVAL_SECONDS,
+    STRATEGY_SHARD_MODE,
+    STRATEGY_STATS_INTERVAL_SECONDS,
+    STRATEGY_WAKE_MODE,
     SYMBOLS,
     SHARED_MEMORY_NAME,
 )
-from shared_memory_utils import SharedPriceBook
+from framing import FrameReader
+from indicators import SIGNAL_BUY, SIGNAL_SELL, IncrementalIndicators
+from latency import LatencyRecorder
+from metrics import ProcessMetrics, metrics_name
+from order_sender import OrderSender
+from protocol import ORDER_HELLO, ORDER_PROTOCOL_BINARY, encode_order, encode_symbol_frame
+from shared_memory_utils import (
+    SharedDoorbell,
+    SharedPriceBook,
+    SharedTickRing,
+    doorbell_name,
+    tick_ring_name,
+)
+
+STRATEGY_COUNTERS = ("ticks_total", "orders_total", "acks_total")
+STRATEGY_HOPS = (
+    "orderbook->strategy",
+    "gateway->decision",
+    "order round trip",
+    "ordermanager processing",
+)
+STRATEGY_HISTOGRAMS = STRATEGY_HOPS + ("process_prices",)
+_POSITION_LABELS = {SIGNAL_BUY: "LONG", SIGNAL_SELL: "SHORT"}
+
+
+def strategy_metrics(
+    name: str = "Strategy", shared: bool = False, shared_name: str = SHARED_MEMORY_NAME
+) -> ProcessMetrics:
+    segment = metrics_name(shared_name, name) if shared else None
+    return ProcessMetrics(name, STRATEGY_COUNTERS, STRATEGY_HISTOGRAMS, segment)
+
+
+def partition_symbols(
+    symbols: Sequence[str], shards: int, mode: str = STRATEGY_SHARD_MODE
+) -> List[List[str]]:
+    """
+    Split ``symbols`` into ``shards`` disjoint lists. ``"hash"`` assigns each
+    symbol by CRC32 so a symbol keeps its shard when others are added;
+    ``"range"`` cuts the list into contiguous, near-equal chunks.
+    """
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    if mode == "hash":
+        parts: List[List[str]] = [[] for _ in range(shards)]
+        for symbol in symbols:
+            parts[zlib.crc32(symbol.encode()) % shards].append(symbol)
+        return parts
+    if mode == "range":
+        bounds = np.linspace(0, len(symbols), shards + 1).astype(int)
+        return [list(symbols[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+    raise ValueError(f"Unknown shard mode {mode!r}")
+
+
+def order_handshake(symbols: Sequence[str], protocol: str = ORDER_PROTOCOL) -> bytes:
+    """Bytes that open an order connection: the binary hello plus symbol ids."""
+    if protocol != ORDER_PROTOCOL_BINARY:
+        return b""
+    return ORDER_HELLO + encode_symbol_frame(symbols)
 
 
 def run_strategy(
@@ -32,9 +98,20 @@ def run_strategy(
     order_port: int = ORDER_MANAGER_PORT,
     symbols=None,
     shared_name: str = SHARED_MEMORY_NAME,
+    wake_mode: str = STRATEGY_WAKE_MODE,
+    name: str = "Strategy",
+    doorbell_lock: Optional[Lock] = None,
 ) -> None:
+    """
+    ``symbols`` are the symbols this process trades; the shared price book
+    carries its own symbol directory, which may hold more. Strategy
+    processes started together share ``doorbell_lock`` to claim wake-up slots.
+    """
     symbols = list(symbols or SYMBOLS)
-    price_book = _attach_price_book(symbols, shared_name)
+    price_book = _attach_price_book(shared_name)
+    tick_ring = _attach_tick_ring(shared_name)
+    doorbell = _attach_doorbell(shared_name, doorbell_lock) if wake_mode == "event" else None
+    metrics = strategy_metrics(name, shared=True, shared_name=shared_name)
     engine = StrategyEngine(
         price_book=price_book,
         lock=lock,
@@ -42,25 +119,112 @@ def run_strategy(
         news_port=news_port,
         order_port=order_port,
         symbols=symbols,
+        tick_ring=tick_ring,
+        doorbell=doorbell,
+        name=name,
+        metrics=metrics,
+        order_sender=OrderSender(
+            host, order_port, name=name, handshake=order_handshake(symbols)
+        ).start(),
     )
+    checkpoint = checkpoint_path(name)
+    if checkpoint and os.path.exists(checkpoint):
+        try:
+            print(f"[{name}] Restored {engine.restore(checkpoint)} symbols from {checkpoint}.")
+        except (OSError, KeyError, ValueError) as exc:
+            print(f"[{name}] Ignoring unreadable checkpoint {checkpoint}: {exc}")
     try:
         engine.run()
     finally:
+        if checkpoint:
+            engine.checkpoint(checkpoint)
+        engine.order_sender.stop()
+        metrics.close()
+        metrics.unlink()
+        if doorbell is not None:
+            doorbell.close()
+        tick_ring.close()
         price_book.close()
 
 
-def _attach_price_book(
-    symbols, shared_name: str, retry_delay: float = 0.5
-) -> SharedPriceBook:
+def checkpoint_path(
+    name: str, directory: Optional[str] = STRATEGY_CHECKPOINT_DIR
+) -> Optional[str]:
+    if not directory:
+        return None
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", name).strip("_").lower()
+    return os.path.join(directory, f"{slug}.npz")
+
+
+def _attach_price_book(shared_name: str, retry_delay: float = 0.5) -> SharedPriceBook:
     while True:
         try:
-            return SharedPriceBook(symbols, name=shared_name)
-        except FileNotFoundError:
+            return SharedPriceBook(name=shared_name)
+        except (FileNotFoundError, ValueError):
+            # ValueError: the OrderBook has not finished laying the segment out.
             print("[Strategy] Waiting for shared memory...")
             time.sleep(retry_delay)
 
 
+def _attach_tick_ring(shared_name: str, retry_delay: float = 0.5) -> SharedTickRing:
+    while True:
+        try:
+            return SharedTickRing(tick_ring_name(shared_name))
+        except FileNotFoundError:
+            print("[Strategy] Waiting for tick ring...")
+            time.sleep(retry_delay)
+
+
+def _attach_doorbell(
+    shared_name: str, lock: Optional[Lock] = None, retry_delay: float = 0.5
+) -> SharedDoorbell:
+    while True:
+        try:
+            doorbell = SharedDoorbell(doorbell_name(shared_name), lock=lock)
+        except FileNotFoundError:
+            print("[Strategy] Waiting for doorbell...")
+            time.sleep(retry_delay)
+            continue
+        doorbell.subscribe()
+        return doorbell
+
+
 class StrategyEngine:
+    # Per-symbol state lives in NumPy arrays (``indicators``,
+    # ``_position_codes``); everything else is a fixed set of per-engine fields.
+    __slots__ = (
+        "name",
+        "order_protocol",
+        "order_sender",
+        "price_book",
+        "tick_ring",
+        "doorbell",
+        "poll_interval",
+        "lock",
+        "host",
+        "news_port",
+        "order_port",
+        "symbols",
+        "_symbol_index",
+        "indicators",
+        "_position_codes",
+        "_book_rows",
+        "_seen_sequences",
+        "latest_sentiment",
+        "news_socket",
+        "news_reader",
+        "order_socket",
+        "stats_interval",
+        "metrics",
+        "_ticks_total",
+        "_orders_total",
+        "_acks_total",
+        "_process_ns",
+        "_stats_started",
+        "_stats_ticks",
+        "latency",
+    )
+
     def __init__(
         self,
         price_book: SharedPriceBook,
@@ -69,48 +233,197 @@ class StrategyEngine:
         news_port: int,
         order_port: int,
         symbols,
+        tick_ring: Optional[SharedTickRing] = None,
+        doorbell: Optional[SharedDoorbell] = None,
+        poll_interval: float = STRATEGY_POLL_INTERVAL_SECONDS,
+        short_window: int = SHORT_WINDOW,
+        long_window: int = LONG_WINDOW,
+        name: str = "Strategy",
+        stats_interval: float = STRATEGY_STATS_INTERVAL_SECONDS,
+        order_sender: Optional[OrderSender] = None,
+        order_protocol: str = ORDER_PROTOCOL,
+        metrics: Optional[ProcessMetrics] = None,
     ):
+        self.name = name
+        self.order_protocol = order_protocol
+        # With a sender, orders are written off-thread and coalesced per
+        # cycle; without one they go out inline on ``order_socket``.
+        self.order_sender = order_sender
         self.price_book = price_book
+        self.tick_ring = tick_ring
+        # Without a subscribed doorbell the engine falls back to polling.
+        self.doorbell = doorbell
+        self.poll_interval = poll_interval
         self.lock = lock
         self.host = host
         self.news_port = news_port
         self.order_port = order_port
+        # Engine state is indexed by row, the symbol's position in ``symbols``
+        # (also its id in the order directory); names only appear in logs,
+        # JSON orders and the handshake.
         self.symbols = list(symbols)
-        self.price_history: Dict[str, Deque[float]] = {
-            symbol: deque(maxlen=MAX_PRICE_HISTORY) for symbol in self.symbols
-        }
-        self.positions: Dict[str, Optional[str]] = {symbol: None for symbol in self.symbols}
+        self._symbol_index = {symbol: idx for idx, symbol in enumerate(self.symbols)}
+        # Running-sum moving averages; a tick costs O(1) whatever the window.
+        self.indicators = IncrementalIndicators(len(self.symbols), short_window, long_window)
+        # Positions as signal codes (LONG=BUY, SHORT=SELL, 0=flat) so a cycle
+        # can rule out symbols already positioned without Python loops.
+        self._position_codes = np.zeros(len(self.symbols), dtype=np.int8)
+        self._book_rows: Optional[np.ndarray] = None
+        self._seen_sequences: Optional[np.ndarray] = None
         self.latest_sentiment: Optional[int] = None
         self.news_socket: Optional[socket.socket] = None
-        self.news_buffer = b""
+        self.news_reader = FrameReader(capacity=4096)
         self.order_socket: Optional[socket.socket] = None
+        self.stats_interval = stats_interval
+        self.metrics = metrics or strategy_metrics(name)
+        self._ticks_total = self.metrics.counter("ticks_total")
+        self._orders_total = self.metrics.counter("orders_total")
+        self._acks_total = self.metrics.counter("acks_total")
+        self._process_ns = self.metrics.histogram("process_prices")
+        self._stats_started = time.perf_counter()
+        self._stats_ticks = 0
+        self.latency = LatencyRecorder(
+            name, histograms={hop: self.metrics.histogram(hop) for hop in STRATEGY_HOPS}
+        )
+        if order_sender is not None and order_sender.on_ack is None:
+            order_sender.on_ack = self._on_acks
 
     def run(self) -> None:
-        print("[Strategy] Started.")
+        print(f"[{self.name}] Started with {len(self.symbols)} symbols.")
         while True:
             try:
                 self._ensure_connections()
                 self._consume_news()
+                started = time.perf_counter_ns()
                 self._process_prices()
-                time.sleep(0.2)
+                self._process_ns.record(time.perf_counter_ns() - started)
+                self._maybe_report()
+                self.latency.maybe_report()
+                self._wait_for_update()
             except KeyboardInterrupt:
                 break
 
+    @property
+    def ticks_processed(self) -> int:
+        return self._ticks_total.value
+
+    @property
+    def orders_sent(self) -> int:
+        return self._orders_total.value
+
+    @property
+    def positions(self) -> Dict[str, Optional[str]]:
+        """``LONG``/``SHORT``/``None`` per symbol name, for logs and tests."""
+        return {
+            symbol: _POSITION_LABELS.get(code)
+            for symbol, code in zip(self.symbols, self._position_codes.tolist())
+        }
+
+    def checkpoint(self, path: str) -> None:
+        """Write indicators, positions and the latest sentiment to an ``.npz`` file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        sentiment = -1 if self.latest_sentiment is None else self.latest_sentiment
+        partial = f"{path}.partial"
+        with open(partial, "wb") as handle:
+            np.savez(
+                handle,
+                symbols=np.array(self.symbols),
+                position_codes=self._position_codes,
+                sentiment=np.array(sentiment),
+                **self.indicators.state(),
+            )
+        os.replace(partial, path)
+
+    def restore(self, path: str) -> int:
+        """
+        Load a ``checkpoint``, matching symbols by name so a checkpoint taken
+        with a different symbol list restores the overlap. Returns the number
+        of symbols restored.
+        """
+        with np.load(path) as saved:
+            index = self._symbol_index
+            pairs = [
+                (source, index[symbol])
+                for source, symbol in enumerate(saved["symbols"].tolist())
+                if symbol in index
+            ]
+            if not pairs:
+                return 0
+            source_rows, rows = (np.array(column) for column in zip(*pairs))
+            self.indicators.load_state(saved, rows, source_rows)
+            self._position_codes[rows] = saved["position_codes"][source_rows]
+            sentiment = int(saved["sentiment"])
+            self.latest_sentiment = None if sentiment < 0 else sentiment
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "symbols": len(self.symbols),
+            "ticks": self.ticks_processed,
+            "orders": self.orders_sent,
+        }
+
+    def _on_acks(self, acks: np.ndarray) -> None:
+        """Called on the order sender's ack thread."""
+        now = time.monotonic_ns()
+        self._acks_total.inc(len(acks))
+        self.latency.record("order round trip", now - acks["order_ts_ns"])
+        self.latency.record("ordermanager processing", acks["ack_ns"] - acks["recv_ns"])
+
+    def _maybe_report(self) -> None:
+        """Log ticks/s since the previous report every ``stats_interval`` seconds."""
+        if self.stats_interval <= 0:
+            return
+        now = time.perf_counter()
+        elapsed = now - self._stats_started
+        if elapsed < self.stats_interval:
+            return
+        rate = (self.ticks_processed - self._stats_ticks) / elapsed
+        print(
+            f"[{self.name}] {rate:,.0f} ticks/s, {self.ticks_processed} ticks and "
+            f"{self.orders_sent} orders in total."
+        )
+        self._stats_started = now
+        self._stats_ticks = self.ticks_processed
+
+    def _wait_for_update(self) -> None:
+        """
+        Block until the OrderBook rings the doorbell or news arrives, capped
+        at ``poll_interval``. Without a doorbell this is a plain poll sleep.
+        """
+        if self.doorbell is None or self.doorbell.socket is None:
+            time.sleep(self.poll_interval)
+            return
+        watched = [self.doorbell.socket]
+        if self.news_socket is not None:
+            watched.append(self.news_socket)
+        try:
+            select.select(watched, [], [], self.poll_interval)
+        except (OSError, ValueError):
+            # The news socket was closed underneath us; reconnect next cycle.
+            return
+        self.doorbell.drain()
+
     def _ensure_connections(self) -> None:
         if self.news_socket is None:
             self.news_socket = self._connect(self.news_port)
             if self.news_socket:
                 self.news_socket.setblocking(False)
-        if self.order_socket is None:
+        if self.order_socket is None and self.order_sender is None:
             self.order_socket = self._connect(self.order_port)
+            if self.order_socket:
+                self.order_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                handshake = order_handshake(self.symbols, self.order_protocol)
+                if handshake:
+                    self.order_socket.sendall(handshake)
 
     def _connect(self, port: int) -> Optional[socket.socket]:
         try:
             sock = socket.create_connection((self.host, port))
-            print(f"[Strategy] Connected to port {port}.")
+            print(f"[{self.name}] Connected to port {port}.")
             return sock
         except OSError:
-            print(f"[Strategy] Unable to reach port {port}, retrying shortly.")
+            print(f"[{self.name}] Unable to reach port {port}, retrying shortly.")
             time.sleep(1)
             return None
 
@@ -119,61 +432,118 @@ class StrategyEngine:
             return
         while True:
             try:
-                chunk = self.news_socket.recv(1024)
-                if not chunk:
-                    print("[Strategy] News stream closed, reconnecting.")
+                if not self.news_reader.recv(self.news_socket):
+                    print(f"[{self.name}] News stream closed, reconnecting.")
                     self.news_socket.close()
                     self.news_socket = None
+                    self.news_reader.reset()
                     break
-                self.news_buffer += chunk
-                while True:
-                    idx = self.news_buffer.find(MESSAGE_DELIMITER)
-                    if idx == -1:
-                        break
-                    token = self.news_buffer[:idx]
-                    self.news_buffer = self.news_buffer[idx + len(MESSAGE_DELIMITER) :]
-                    if token:
-                        self._handle_sentiment(token)
+                for token in self.news_reader.messages():
+                    self._handle_sentiment(token)
             except BlockingIOError:
                 break
             except OSError:
                 self.news_socket = None
+                self.news_reader.reset()
                 break
 
-    def _handle_sentiment(self, token: bytes) -> None:
+    def _handle_sentiment(self, token) -> None:
         try:
-            value = int(token.decode())
+            value = int(str(token, "ascii"))
             self.latest_sentiment = value
         except ValueError:
-            print(f"[Strategy] Invalid sentiment chunk: {token!r}")
+            print(f"[{self.name}] Invalid sentiment chunk: {bytes(token)!r}")
 
     def _process_prices(self) -> None:
+        if self.tick_ring is not None:
+            self._process_ticks()
+            return
         if self.lock:
             with self.lock:
-                snapshot = self.price_book.snapshot()
+                records = self.price_book.read_records()
         else:
-            snapshot = self.price_book.snapshot()
-
-        for symbol, price in snapshot.items():
-            if math.isnan(price):
-                continue
-            history = self.price_history[symbol]
-            if not history or history[-1] != price:
-                history.append(price)
-                price_signal = self._price_signal(history)
-                price_timestamp = time.time()
-                self._maybe_trade(symbol, price, price_signal, price_timestamp)
-
-    def _price_signal(self, history: Deque[float]) -> Optional[str]:
-        if len(history) < LONG_WINDOW:
-            return None
-        short_avg = sum(list(history)[-SHORT_WINDOW:]) / SHORT_WINDOW
-        long_avg = sum(history) / len(history)
-        if short_avg > long_avg:
-            return "BUY"
-        if short_avg < long_avg:
-            return "SELL"
-        return None
+            records = self.price_book.read_records()
+
+        # A row is fresh when its update sequence moved since the last cycle,
+        # which also catches a tick that repeats the previous price.
+        sequences = records["seq"]
+        seen = self._seen_sequences
+        if seen is None or len(seen) != len(sequences):
+            # First cycle, or the OrderBook added symbols since the last one.
+            self._seen_sequences = np.zeros_like(sequences)
+            if seen is not None:
+                self._seen_sequences[: len(seen)] = seen
+        fresh = (sequences != self._seen_sequences) & ~np.isnan(records["last"])
+        self._seen_sequences = sequences
+        book_rows = np.flatnonzero(fresh)
+        if not len(book_rows):
+            return
+        rows = self._engine_rows(book_rows)
+        tracked = rows >= 0
+        book_rows = book_rows[tracked]
+        prices = records["last"][book_rows]
+        rows = rows[tracked]
+        self._ticks_total.inc(len(rows))
+        book_ns = records["book_ns"][book_rows]
+        self.latency.record("orderbook->strategy", time.monotonic_ns() - book_ns)
+        signals = self.indicators.update_many(rows, prices)
+        self._trade_signals(rows, prices, signals, time.time(), records["origin_ns"][book_rows])
+
+    def _process_ticks(self) -> None:
+        """Replay every tick published since the last cycle, in arrival order."""
+        overruns = self.tick_ring.overruns
+        ticks = self.tick_ring.read()
+        if self.tick_ring.overruns != overruns:
+            print(f"[{self.name}] Tick ring overrun, {self.tick_ring.lost} ticks lost so far.")
+        if not len(ticks):
+            return
+        rows = self._engine_rows(ticks["symbol_id"])
+        tracked = rows >= 0
+        ticks = ticks[tracked]
+        prices = ticks["price"]
+        rows = rows[tracked]
+        self._ticks_total.inc(len(rows))
+        self.latency.record("orderbook->strategy", time.monotonic_ns() - ticks["book_ns"])
+        signals = self.indicators.update_sequence(rows, prices)
+        self._trade_signals(rows, prices, signals, time.time(), ticks["origin_ns"])
+
+    def _engine_rows(self, book_rows: np.ndarray) -> np.ndarray:
+        """Translate price book rows to indicator rows (-1 for untracked symbols)."""
+        mapped = self._book_rows
+        if mapped is not None and len(book_rows) and book_rows.max() >= len(mapped):
+            # Rows the OrderBook added after the mapping was built.
+            self.price_book.refresh()
+            self._book_rows = None
+        if self._book_rows is None:
+            index = self._symbol_index
+            self._book_rows = np.array(
+                [index.get(symbol, -1) for symbol in self.price_book.symbols], dtype=np.int64
+            )
+        return self._book_rows[book_rows]
+
+    def _trade_signals(
+        self,
+        rows: np.ndarray,
+        prices: np.ndarray,
+        signals: np.ndarray,
+        price_timestamp: float,
+        origin_ns: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Only rows whose price signal agrees with the news signal and whose
+        position would change reach ``_maybe_trade``; ticks are visited in
+        order so a symbol trades on the first qualifying tick of the cycle.
+        """
+        news_signal = self._news_signal()
+        if news_signal is None:
+            return
+        code = SIGNAL_BUY if news_signal == "BUY" else SIGNAL_SELL
+        hits = np.flatnonzero((signals == code) & (self._position_codes[rows] != code))
+        origins = origin_ns[hits].tolist() if origin_ns is not None else [None] * len(hits)
+        for row, price, origin in zip(rows[hits].tolist(), prices[hits].tolist(), origins):
+            self._maybe_trade(row, price, news_signal, price_timestamp, origin)
+        if self.order_sender is not None:
+            self.order_sender.flush()
 
     def _news_signal(self) -> Optional[str]:
         if self.latest_sentiment is None:
@@ -186,41 +556,70 @@ class StrategyEngine:
 
     def _maybe_trade(
         self,
-        symbol: str,
+        row: int,
         price: float,
         price_signal: Optional[str],
         price_timestamp: float,
+        origin_ns: Optional[int] = None,
     ) -> None:
         news_signal = self._news_signal()
         if not price_signal or not news_signal:
             return
         if price_signal != news_signal:
             return
-        desired_position = "LONG" if price_signal == "BUY" else "SHORT"
-        current_position = self.positions[symbol]
-        if current_position == desired_position:
+        desired = SIGNAL_BUY if price_signal == "BUY" else SIGNAL_SELL
+        if self._position_codes[row] == desired:
             return
-        self.positions[symbol] = desired_position
-        self._send_order(symbol, price_signal, price, price_timestamp)
+        self._position_codes[row] = desired
+        self._send_order(row, price_signal, price, price_timestamp, origin_ns)
 
-    def _send_order(self, symbol: str, side: str, price: float, price_timestamp: float) -> None:
-        if not self.order_socket:
+    def _send_order(
+        self,
+        row: int,
+        side: str,
+        price: float,
+        price_timestamp: float,
+        origin_ns: Optional[int] = None,
+    ) -> None:
+        if not self.order_socket and self.order_sender is None:
+            return
+        if self.order_protocol == ORDER_PROTOCOL_BINARY:
+            decision_ns = time.monotonic_ns()
+            origin_ns = decision_ns if origin_ns is None else origin_ns
+            self.latency.record("gateway->decision", decision_ns - origin_ns)
+            payload = encode_order(
+                row,
+                side,
+                ORDER_QUANTITY,
+                price,
+                self.latest_sentiment,
+                decision_ns,
+                origin_ns,
+                time.time_ns(),
+            )
+        else:
+            order = {
+                "symbol": self.symbols[row],
+                "side": side,
+                "quantity": ORDER_QUANTITY,
+                "price": round(price, 2),
+                "sentiment": self.latest_sentiment,
+                "timestamp": time.time(),
+                "latency_ms": round((time.time() - price_timestamp) * 1000, 2),
+            }
+            payload = json.dumps(order).encode() + MESSAGE_DELIMITER
+        if self.order_sender is not None:
+            # Written by the sender thread when this cycle's batch is flushed.
+            self.order_sender.submit(payload)
+            self._orders_total.inc()
+            print(f"[{self.name}] Queued {side} order for {self.symbols[row]} @ {price:.2f}")
             return
-        order = {
-            "symbol": symbol,
-            "side": side,
-            "quantity": ORDER_QUANTITY,
-            "price": round(price, 2),
-            "sentiment": self.latest_sentiment,
-            "timestamp": time.time(),
-            "latency_ms": round((time.time() - price_timestamp) * 1000, 2),
-        }
-        payload = json.dumps(order).encode() + MESSAGE_DELIMITER
         try:
             self.order_socket.sendall(payload)
-            print(f"[Strategy] Sent {side} order for {symbol} @ {price:.2f}")
+            self._orders_total.inc()
+            print(f"[{self.name}] Sent {side} order for {self.symbols[row]} @ {price:.2f}")
         except OSError:
-            print("[Strategy] OrderManager unreachable, retrying.")
+            print(f"[{self.name}] OrderManager unreachable, retrying.")
             self.order_socket = None
 
 
@@ -0,0 +1,106 @@
+import asyncio
+
+from async_gateway import AsyncGatewayServer, Subscriber
+from config import MESSAGE_DELIMITER, SYMBOLS
+from gateway import gateway_metrics
+from protocol import (
+    BINARY_HELLO,
+    FRAME_HEADER,
+    FRAME_KIND_PRICES,
+    FRAME_KIND_SYMBOLS,
+    decode_frame_header,
+)
+
+
+def test_async_gateway_streams_text_and_binary():
+    async def scenario():
+        server = AsyncGatewayServer(host="127.0.0.1", price_port=0, news_port=0, tick_interval=0.01)
+        await server.start()
+        try:
+            text_reader, text_writer = await asyncio.open_connection("127.0.0.1", server.price_port)
+            bin_reader, bin_writer = await asyncio.open_connection("127.0.0.1", server.price_port)
+            bin_writer.write(BINARY_HELLO)
+            header = await asyncio.wait_for(bin_reader.readexactly(FRAME_HEADER.size), 1)
+            kind, _, length = decode_frame_header(header)
+            assert kind == FRAME_KIND_SYMBOLS
+            await bin_reader.readexactly(length)
+            await asyncio.sleep(0.1)
+
+            server.broadcast_prices()
+            text = await asyncio.wait_for(text_reader.readuntil(MESSAGE_DELIMITER), 1)
+            assert text.split(b",")[0] == SYMBOLS[0].encode()
+            header = await asyncio.wait_for(bin_reader.readexactly(FRAME_HEADER.size), 1)
+            kind, count, length = decode_frame_header(header)
+            assert (kind, count) == (FRAME_KIND_PRICES, len(SYMBOLS))
+            assert server.stats()["clients"] == 2
+            await bin_reader.readexactly(length)
+
+            server.add_symbols(["NEW"])
+            server.broadcast_prices()
+            header = await asyncio.wait_for(bin_reader.readexactly(FRAME_HEADER.size), 1)
+            kind, count, length = decode_frame_header(header)
+            assert (kind, count) == (FRAME_KIND_SYMBOLS, len(SYMBOLS) + 1)
+            await bin_reader.readexactly(length)
+            header = await asyncio.wait_for(bin_reader.readexactly(FRAME_HEADER.size), 1)
+            assert decode_frame_header(header)[:2] == (FRAME_KIND_PRICES, len(SYMBOLS) + 1)
+
+            for writer in (text_writer, bin_writer):
+                writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+class _StalledWriter:
+    def close(self):
+        self.closed = True
+
+
+def test_subscriber_conflates_then_evicts_when_stalled():
+    async def scenario():
+        metrics = gateway_metrics()
+        client = Subscriber(
+            _StalledWriter(), queue_size=2, policy="conflate", evict_after=5, metrics=metrics
+        )
+        for tick in range(6):
+            assert client.offer(f"{tick}".encode())
+        assert client.conflated == 4
+        assert metrics.counter("price_conflated_total").value == 4
+        assert [client.queue.get_nowait() for _ in range(2)] == [b"4", b"5"]
+
+        client.queue.put_nowait(b"a")
+        client.queue.put_nowait(b"b")
+        results = [client.offer(b"x") for _ in range(5)]
+        assert results[-1] is False and client.evicted
+        assert client.writer.closed
+        assert metrics.counter("clients_evicted_total").value == 1
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_drop_policy_counts_dropped_prices():
+    async def scenario():
+        metrics = gateway_metrics()
+        client = Subscriber(
+            _StalledWriter(), queue_size=1, policy="drop", evict_after=50, metrics=metrics
+        )
+        for tick in range(4):
+            client.offer(f"{tick}".encode())
+        assert client.queue.get_nowait() == b"0"
+        assert metrics.counter("price_dropped_total").value == client.dropped == 3
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_announcement_is_never_conflated_away():
+    async def scenario():
+        client = Subscriber(_StalledWriter(), queue_size=2, policy="conflate", evict_after=50)
+        client.offer(b"old-1")
+        client.announce(b"dir")
+        for tick in range(5):
+            client.offer(f"new-{tick}".encode())
+        assert client.preamble == b"dir"
+        assert [client.queue.get_nowait() for _ in range(2)] == [b"new-3", b"new-4"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,42 @@
+import copy
+
+from benchmark import compare_results, run_case
+
+
+def _result(**throughput):
+    run = {
+        "symbols": 3,
+        "tick_interval": 0.01,
+        "strategy_shards": 1,
+        "throughput_per_s": throughput,
+        "latency_us": {"Strategy orderbook->strategy": {"p50": 100.0, "p99": 400.0}},
+    }
+    return {"runs": [run]}
+
+
+def test_compare_flags_throughput_drops_and_latency_growth():
+    baseline = _result(**{"Strategy ticks_total": 1000.0, "OrderManager orders_dropped_total": 0.0})
+    assert compare_results(baseline, copy.deepcopy(baseline)) == []
+
+    current = _result(**{"Strategy ticks_total": 850.0, "OrderManager orders_dropped_total": 5.0})
+    current["runs"][0]["latency_us"]["Strategy orderbook->strategy"]["p99"] = 900.0
+    regressions = compare_results(baseline, current, threshold=0.1)
+    assert len(regressions) == 3
+    assert any("ticks_total" in line for line in regressions)
+    assert any("orders_dropped_total" in line for line in regressions)
+    assert any("p99" in line for line in regressions)
+
+
+def test_small_latency_changes_are_noise():
+    baseline = _result()
+    current = _result()
+    current["runs"][0]["latency_us"]["Strategy orderbook->strategy"]["p99"] = 440.0
+    assert compare_results(baseline, current, threshold=0.05) == []
+
+
+def test_run_case_reports_every_process():
+    result = run_case(symbols=3, tick_interval=0.01, strategy_shards=1, duration=0.5, warmup=0.3)
+    assert set(result["processes"]) == {"Gateway", "OrderBook", "Strategy", "OrderManager"}
+    assert all(usage is not None for usage in result["processes"].values())
+    assert result["throughput_per_s"]["Gateway price_updates_total"] > 0
+    assert "OrderBook gateway->orderbook" in result["latency_us"]
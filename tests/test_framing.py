@@ -0,0 +1,40 @@
+import socket
+
+from framing import FrameReader
+from protocol import FRAME_KIND_PRICES, decode_price_records, encode_price_frame
+
+
+def test_messages_split_across_receives():
+    reader = FrameReader(capacity=16)
+    reader.feed(b"AAA,1.0*BBB,")
+    assert [bytes(token) for token in reader.messages()] == [b"AAA,1.0"]
+
+    reader.feed(b"2.0**CCC,3.0*")
+    assert [bytes(token) for token in reader.messages()] == [b"BBB,2.0", b"CCC,3.0"]
+    assert reader.pending == 0
+
+
+def test_buffer_grows_for_oversized_message():
+    reader = FrameReader(capacity=8)
+    reader.feed(b"x" * 20)
+    assert list(reader.messages()) == []
+    reader.feed(b"*")
+    assert [bytes(token) for token in reader.messages()] == [b"x" * 20]
+
+
+def test_recv_into_binary_frames():
+    left, right = socket.socketpair()
+    with left, right:
+        frame = encode_price_frame([0, 1], [10.0, 20.0], 7)
+        left.sendall(frame + frame[:5])
+        reader = FrameReader()
+        reader.recv(right)
+        frames = list(reader.frames())
+        assert len(frames) == 1
+        kind, count, payload = frames[0]
+        assert (kind, count) == (FRAME_KIND_PRICES, 2)
+        assert decode_price_records(payload)["price"].tolist() == [10.0, 20.0]
+
+        left.sendall(frame[5:])
+        reader.recv(right)
+        assert [count for _, count, _ in reader.frames()] == [2]
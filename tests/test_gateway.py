@@ -1,8 +1,22 @@
+import math
 import socket
+import threading
 import time
 
 from config import MESSAGE_DELIMITER, SYMBOLS
-from gateway import GatewayServer
+from gateway import GatewayServer, RandomWalkSource
+from orderbook import _recv_binary_loop, _recv_loop, orderbook_metrics
+from protocol import (
+    BINARY_HELLO,
+    FRAME_HEADER,
+    FRAME_KIND_PRICES,
+    FRAME_KIND_SYMBOLS,
+    TextPriceFormatter,
+    decode_frame_header,
+    decode_price_records,
+    decode_symbols,
+)
+from shared_memory_utils import SharedPriceBook
 
 
 def test_gateway_accepts_clients_and_streams():
@@ -34,3 +48,240 @@ def test_gateway_accepts_clients_and_streams():
             assert news_data.endswith(MESSAGE_DELIMITER)
     finally:
         server.stop()
+
+
+def test_gateway_negotiates_binary_price_frames():
+    server = GatewayServer(host="127.0.0.1", price_port=0, news_port=0, tick_interval=0.01)
+    try:
+        server.price_accept_thread.start()
+        price_port = server.price_server.getsockname()[1]
+
+        with socket.create_connection(("127.0.0.1", price_port)) as client:
+            client.settimeout(1)
+            client.sendall(BINARY_HELLO)
+            header = _recv_exact(client, FRAME_HEADER.size)
+            kind, count, length = decode_frame_header(header)
+            assert kind == FRAME_KIND_SYMBOLS
+            assert decode_symbols(_recv_exact(client, length), count) == SYMBOLS
+
+            time.sleep(0.05)
+            assert server._binary_price_clients and not server._price_clients
+            server.broadcast_prices()
+            kind, count, length = decode_frame_header(_recv_exact(client, FRAME_HEADER.size))
+            records = decode_price_records(_recv_exact(client, length))
+            assert kind == FRAME_KIND_PRICES
+            assert records["symbol_id"].tolist() == list(range(len(SYMBOLS)))
+    finally:
+        server.stop()
+
+
+def test_gateway_handshake_does_not_block_later_clients(monkeypatch):
+    import gateway
+
+    # A silent client holds its handshake for the full timeout.
+    monkeypatch.setattr(gateway, "PROTOCOL_HANDSHAKE_TIMEOUT", 2.0)
+    server = GatewayServer(host="127.0.0.1", price_port=0, news_port=0)
+    try:
+        server.price_accept_thread.start()
+        price_port = server.price_server.getsockname()[1]
+
+        with socket.create_connection(("127.0.0.1", price_port)), socket.create_connection(
+            ("127.0.0.1", price_port)
+        ) as client:
+            client.settimeout(1)
+            client.sendall(BINARY_HELLO)
+            kind, _, _ = decode_frame_header(_recv_exact(client, FRAME_HEADER.size))
+            assert kind == FRAME_KIND_SYMBOLS
+            assert not server._price_clients
+    finally:
+        server.stop()
+
+
+def test_gateway_universe_change_reaches_price_book():
+    server = GatewayServer(
+        host="127.0.0.1", price_port=0, news_port=0, symbols=["AAA", "BBB"], fanout="direct"
+    )
+    book = SharedPriceBook(
+        ["AAA", "BBB"], name="test_gateway_universe", create=True, force_recreate=True
+    )
+    reader = SharedPriceBook(name="test_gateway_universe")
+    try:
+        server.price_accept_thread.start()
+        sock = socket.create_connection(("127.0.0.1", server.price_server.getsockname()[1]))
+        feed = threading.Thread(target=_recv_binary_loop, args=(sock, book, None), daemon=True)
+        feed.start()
+        _wait_for(lambda: server._binary_price_clients)
+
+        server.add_symbols(["CCC"])
+        server.remove_symbols(["AAA"])
+        server.broadcast_prices()
+        assert server.source.symbols == ["BBB", "CCC"]
+        _wait_for(lambda: reader.read("CCC") > 0)
+
+        snapshot = reader.snapshot()
+        assert set(snapshot) == {"BBB", "CCC"}
+        assert snapshot["CCC"] == server.price_prices["CCC"]
+        assert math.isnan(reader.read("AAA"))
+    finally:
+        server.stop()
+        for client in list(server._binary_price_clients):
+            client.close()
+        reader.close()
+        book.close()
+        book.unlink()
+
+
+def test_text_feed_records_metrics_once_per_chunk():
+    book = SharedPriceBook(["AAA", "BBB"], name="test_text_metrics", create=True, force_recreate=True)
+    metrics = orderbook_metrics()
+    gateway, orderbook = socket.socketpair()
+    try:
+        gateway.sendall(b"AAA,1.00*BBB,2.00*bad*")
+        gateway.close()
+        _recv_loop(orderbook, book, None, metrics=metrics)
+
+        assert book.read("BBB") == 2.0
+        assert metrics.counter("price_updates_total").value == 2
+        assert metrics.counter("parse_errors_total").value == 1
+        assert metrics.histogram("publish_prices").total == 1
+    finally:
+        book.close()
+        book.unlink()
+
+
+def test_text_feed_rejects_malformed_and_excess_symbols(monkeypatch):
+    import orderbook
+
+    monkeypatch.setattr(orderbook, "TEXT_FEED_MAX_SYMBOLS", 3)
+    book = SharedPriceBook(["AAA"], name="test_text_symbols", create=True, force_recreate=True)
+    metrics = orderbook_metrics()
+    gateway, client = socket.socketpair()
+    try:
+        gateway.sendall(b"BBB,1.00*bad name,2.00*,3.00*CCC,4.00*DDD,5.00*AAA,6.00*")
+        gateway.close()
+        _recv_loop(client, book, None, metrics=metrics)
+
+        assert book.symbols == ["AAA", "BBB", "CCC"]
+        assert book.read("AAA") == 6.0
+        assert metrics.counter("symbols_added_total").value == 2
+        assert metrics.counter("symbols_rejected_total").value == 3
+        assert metrics.counter("price_updates_total").value == 3
+    finally:
+        book.close()
+        book.unlink()
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if condition():
+                return
+        except KeyError:
+            pass
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return data
+
+
+class _StallingClient:
+    def __init__(self):
+        self.blocked = True
+        self.received = []
+
+    def send(self, data):
+        if self.blocked:
+            raise BlockingIOError
+        self.received.append(bytes(data))
+        return len(data)
+
+
+def test_gateway_conflates_prices_for_stalled_subscriber():
+    server = GatewayServer(host="127.0.0.1", price_port=0, news_port=0, fanout="conflate")
+    try:
+        client = _StallingClient()
+        server._price_clients.add(client)
+        for _ in range(50):
+            server.broadcast_prices()
+        slots = server._conflation[client]
+        first_message = bytes(slots.outbox)
+        assert first_message.count(MESSAGE_DELIMITER) == len(SYMBOLS)
+
+        client.blocked = False
+        server.broadcast_prices()
+        assert client.received[0] == first_message
+        latest = client.received[-1].decode().rstrip("*").split("*")
+        assert [token.split(",")[0] for token in latest] == SYMBOLS
+        assert [float(token.split(",")[1]) for token in latest] == [
+            round(server.price_prices[symbol], 2) for symbol in SYMBOLS
+        ]
+        assert not slots.dirty.any() and not slots.outbox
+    finally:
+        server.stop()
+
+
+def test_gateway_flushes_backlog_when_socket_becomes_writable():
+    symbols = [f"S{i}" for i in range(20_000)]
+    server = GatewayServer(host="127.0.0.1", price_port=0, news_port=0, symbols=symbols)
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # A small receive window so one snapshot cannot be written in one go.
+    client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    try:
+        server.price_accept_thread.start()
+        server.writer_thread.start()
+        client.connect(("127.0.0.1", server.price_server.getsockname()[1]))
+        _wait_for(lambda: server._price_clients)
+        (subscriber,) = server._price_clients
+        subscriber.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        server.broadcast_prices()
+        assert server._conflation[subscriber].pending()
+
+        # No further ticks: the writer thread must finish the snapshot alone.
+        client.settimeout(2)
+        data = b""
+        while data.count(MESSAGE_DELIMITER) < len(symbols):
+            data += client.recv(65536)
+        assert data.endswith(MESSAGE_DELIMITER)
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_gateway_news_keeps_only_newest_sentiment_for_stalled_client():
+    server = GatewayServer(host="127.0.0.1", price_port=0, news_port=0)
+    try:
+        client = _StallingClient()
+        server._news_clients.add(client)
+        for _ in range(5):
+            server.broadcast_news()
+        # The first sentiment is in flight; of the rest only the newest waits.
+        slots = server._news_slots[client]
+        assert len(slots.frames) == 1 and slots.outbox
+        first, newest = bytes(slots.outbox), slots.frames[0]
+
+        client.blocked = False
+        assert server._flush_backlog(client) is False
+        assert client.received == [first, newest]
+        assert not slots.pending()
+    finally:
+        server.stop()
+
+
+def test_random_walk_is_vectorized_and_reproducible():
+    symbols = [f"S{i}" for i in range(500)]
+    first = RandomWalkSource(symbols, seed=7, block_size=4)
+    second = RandomWalkSource(symbols, seed=7, block_size=4)
+    for _ in range(10):
+        path = first.next_prices().copy()
+        assert (path == second.next_prices()).all()
+    assert path.shape == (500,) and (path >= 0.01).all()
+
+    formatter = TextPriceFormatter(symbols)
+    tokens = formatter.format(path).split(MESSAGE_DELIMITER)
+    assert tokens[3] == f"S3,{path[3]:.2f}".encode()
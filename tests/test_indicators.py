@@ -0,0 +1,82 @@
+import numpy as np
+
+from indicators import SIGNAL_BUY, SIGNAL_NONE, SIGNAL_SELL, IncrementalIndicators
+
+
+def naive_signal(history, short_window, long_window):
+    if len(history) < long_window:
+        return SIGNAL_NONE
+    short_avg = sum(history[-short_window:]) / short_window
+    long_avg = sum(history[-long_window:]) / long_window
+    if np.isclose(short_avg, long_avg, rtol=1e-9, atol=0.0):
+        return SIGNAL_NONE
+    return SIGNAL_BUY if short_avg > long_avg else SIGNAL_SELL
+
+
+def test_matches_naive_windowed_means():
+    rng = np.random.default_rng(7)
+    prices = 100.0 + np.cumsum(rng.normal(0.0, 0.5, size=500))
+    indicators = IncrementalIndicators(2, short_window=3, long_window=7, ema_span=7)
+    history = []
+    for price in prices.tolist():
+        history.append(price)
+        signal = indicators.update(1, price)
+        assert signal == naive_signal(history, 3, 7)
+        window = history[-7:]
+        assert np.isclose(indicators.short_mean(1), np.mean(history[-3:]))
+        assert np.isclose(indicators.long_mean(1), np.mean(window))
+        assert np.isclose(indicators.variance(1), np.var(window))
+    # The untouched row stays empty.
+    assert indicators.filled[0] == 0
+
+
+def test_crossover_signals():
+    indicators = IncrementalIndicators(1, short_window=2, long_window=4)
+    signals = [indicators.update(0, price) for price in [1.0, 1.0, 1.0, 2.0]]
+    assert signals == [SIGNAL_NONE, SIGNAL_NONE, SIGNAL_NONE, SIGNAL_BUY]
+    for price in [0.5, 0.5]:
+        signal = indicators.update(0, price)
+    assert signal == SIGNAL_SELL
+
+
+def test_flat_series_has_no_signal():
+    indicators = IncrementalIndicators(1, short_window=3, long_window=5)
+    assert {indicators.update(0, 101.37) for _ in range(1000)} == {SIGNAL_NONE}
+
+
+def test_equal_windows():
+    indicators = IncrementalIndicators(1, short_window=4, long_window=4)
+    for price in [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]:
+        assert indicators.update(0, price) == SIGNAL_NONE
+    assert indicators.short_mean(0) == indicators.long_mean(0) == 4.5
+
+
+def test_update_sequence_matches_scalar_updates():
+    rng = np.random.default_rng(11)
+    rows = rng.integers(0, 4, size=400)
+    prices = 50.0 + rng.normal(0.0, 1.0, size=400).cumsum()
+    scalar = IncrementalIndicators(4, short_window=2, long_window=6)
+    batched = IncrementalIndicators(4, short_window=2, long_window=6)
+    expected = [scalar.update(row, price) for row, price in zip(rows.tolist(), prices.tolist())]
+    signals = np.concatenate(
+        [batched.update_sequence(rows[i : i + 37], prices[i : i + 37]) for i in range(0, 400, 37)]
+    )
+    assert signals.tolist() == expected
+    assert np.allclose(batched.long_mean(), scalar.long_mean())
+    assert np.allclose(batched.short_mean(), scalar.short_mean())
+    assert np.allclose(batched.ema, scalar.ema)
+
+
+def test_large_universe_state_is_compact_and_round_trips():
+    indicators = IncrementalIndicators(10_000, short_window=50, long_window=1_000)
+    per_symbol = indicators.nbytes / 10_000
+    assert per_symbol == 8 * 1_000 + 44
+    assert indicators.nbytes < 100 * 1024 * 1024
+
+    small = IncrementalIndicators(3, short_window=2, long_window=4)
+    for price in (1.0, 2.0, 3.0, 4.0, 5.0):
+        small.update_many(np.array([0, 2]), np.array([price, -price]))
+    copy = IncrementalIndicators(3, short_window=2, long_window=4)
+    copy.load_state({name: array.copy() for name, array in small.state().items()})
+    assert copy.signals().tolist() == small.signals().tolist() == [SIGNAL_BUY, SIGNAL_NONE, SIGNAL_SELL]
+    assert copy.update(0, 6.0) == small.update(0, 6.0)
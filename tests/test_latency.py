@@ -0,0 +1,42 @@
+import numpy as np
+
+from latency import LatencyHistogram, LatencyRecorder
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    histogram.record_many(np.arange(100))
+    assert histogram.percentile(50) == 49
+    assert histogram.percentile(100) == 99
+    assert histogram.max_ns == 99
+
+
+def test_percentiles_within_bucket_resolution():
+    values = np.random.default_rng(7).lognormal(mean=11, sigma=1.5, size=50_000).astype(np.int64)
+    histogram = LatencyHistogram()
+    histogram.record_many(values)
+    for percent in (50, 90, 99, 99.9):
+        expected = np.percentile(values, percent, method="higher")
+        assert abs(histogram.percentile(percent) - expected) <= expected / 64 + 1
+    assert histogram.mean_ns == values.mean()
+
+
+def test_merge_matches_recording_everything_once():
+    values = np.random.default_rng(3).integers(0, 10**9, size=10_000)
+    left, right, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+    left.record_many(values[:4000])
+    right.record_many(values[4000:])
+    both.record_many(values)
+    left.merge(right)
+    assert np.array_equal(left.counts, both.counts)
+    assert left.summary() == both.summary()
+
+
+def test_recorder_reports_each_hop():
+    lines = []
+    recorder = LatencyRecorder("Test", interval=0, emit=lines.append)
+    recorder.record("a->b", 1500)
+    recorder.record("b->c", np.array([10, 20]))
+    recorder.report(reset=True)
+    assert [line.split(":")[0] for line in lines] == ["[Test] latency a->b", "[Test] latency b->c"]
+    assert recorder.histogram("a->b").total == 0
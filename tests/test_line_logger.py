@@ -0,0 +1,20 @@
+import io
+
+from line_logger import LineLogger
+
+
+def test_lines_are_written_in_order_on_stop():
+    stream = io.StringIO()
+    logger = LineLogger(stream=stream).start()
+    for i in range(100):
+        logger.log(f"line {i}")
+    logger.stop()
+    assert stream.getvalue().splitlines() == [f"line {i}" for i in range(100)]
+    assert logger.stats()["written"] == 100
+
+
+def test_full_queue_drops_instead_of_blocking():
+    logger = LineLogger(stream=io.StringIO(), max_pending=2)
+    for i in range(5):
+        logger.log(f"line {i}")
+    assert logger.stats() == {"queued": 2, "written": 0, "dropped": 3}
@@ -0,0 +1,52 @@
+import os
+import urllib.request
+
+from metrics import MetricsServer, ProcessMetrics, metrics_name, render_metrics
+
+
+def test_attached_segment_sees_owner_updates():
+    name = metrics_name(f"pf_test_{os.getpid()}", "Strategy-1/2")
+    owner = ProcessMetrics("Strategy-1/2", ["ticks_total"], ["hop"], shared_name=name)
+    reader = ProcessMetrics.attach(name)
+    try:
+        owner.counter("ticks_total").inc(5)
+        owner.histogram("hop").record(1500)
+        assert reader.process == "Strategy-1/2"
+        assert reader.snapshot() == {"ticks_total": 5}
+        assert reader.histogram("hop").total == 1
+        assert reader.histogram("hop").max_ns == 1500
+    finally:
+        reader.close()
+        owner.close()
+        owner.unlink()
+
+
+def test_render_is_prometheus_text():
+    block = ProcessMetrics("OrderBook", ["price_updates_total"], ["gateway->orderbook"])
+    block.counter("price_updates_total").inc(3)
+    for value in (500, 2_000, 5_000):
+        block.histogram("gateway->orderbook").record(value)
+    lines = render_metrics([block]).splitlines()
+    labels = 'process="OrderBook",name="gateway->orderbook"'
+    assert 'pf_price_updates_total{process="OrderBook"} 3' in lines
+    assert f'pf_latency_ns_bucket{{{labels},le="1024"}} 1' in lines
+    assert f'pf_latency_ns_bucket{{{labels},le="4096"}} 2' in lines
+    assert f'pf_latency_ns_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"pf_latency_ns_sum{{{labels}}} 7500" in lines
+    assert f"pf_latency_ns_count{{{labels}}} 3" in lines
+
+
+def test_server_scrapes_live_segments_and_skips_missing():
+    base = f"pf_test_srv_{os.getpid()}"
+    owner = ProcessMetrics("Gateway", ["price_ticks_total"], shared_name=metrics_name(base, "Gateway"))
+    server = MetricsServer(["Gateway", "OrderBook"], host="127.0.0.1", port=0, base=base).start()
+    try:
+        owner.counter("price_ticks_total").inc(7)
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        body = urllib.request.urlopen(url, timeout=2).read().decode()
+        assert 'pf_price_ticks_total{process="Gateway"} 7' in body
+        assert "OrderBook" not in body
+    finally:
+        server.stop()
+        owner.close()
+        owner.unlink()
@@ -0,0 +1,30 @@
+import json
+import os
+
+import pytest
+
+from microbench import CASES, check, compare, run_case
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_every_case_runs_at_its_smallest_size(name):
+    sizes, _ = CASES[name]
+    assert run_case(name, min(sizes), repeat=1, min_time=0.0) > 0
+
+
+def test_compare_flags_slowdowns_beyond_threshold():
+    baseline = {"a[1]": 100.0, "b[1]": 100.0, "c[1]": 100.0}
+    current = {"a[1]": 109.0, "b[1]": 125.0, "c[1]": 50.0, "new[1]": 1.0}
+    slower = compare(baseline, current, threshold=0.10)
+    assert len(slower) == 1
+    assert slower[0].startswith("b[1]")
+
+
+@pytest.mark.skipif(
+    not os.environ.get("MICROBENCH_BASELINE"), reason="set MICROBENCH_BASELINE to a saved baseline"
+)
+def test_hot_paths_within_baseline():
+    with open(os.environ["MICROBENCH_BASELINE"]) as handle:
+        baseline = json.load(handle)["results"]
+    _, slower = check(baseline, sorted({key.split("[")[0] for key in baseline} & set(CASES)))
+    assert slower == []
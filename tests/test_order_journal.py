@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+from order_journal import (
+    JournalError,
+    OrderJournal,
+    read_journal,
+    read_range,
+    rebuild_positions,
+)
+
+
+def order(symbol, side, quantity, price=100.0):
+    return {"symbol": symbol, "side": side, "quantity": quantity, "price": price, "sentiment": 70}
+
+
+def test_append_reopen_and_rebuild_positions(tmp_path):
+    path = str(tmp_path / "orders.journal")
+    journal = OrderJournal(path, commit_records=2, commit_delay=0.001)
+    count = journal.append([order("AAA", "BUY", 10), order("BBB", "SELL", 5, 99.1234)])
+    assert journal.wait_durable(count, timeout=1.0)
+    journal.close()
+
+    journal = OrderJournal(path)
+    journal.append([order("AAA", "SELL", 3)])
+    journal.close()
+
+    records = read_journal(path)
+    assert len(records) == 3
+    assert records["price"][1] == 991234
+    assert rebuild_positions(records) == {"AAA": 7, "BBB": -5}
+    assert np.all(np.diff(records["ts_ns"]) >= 0)
+
+
+def test_torn_tail_is_discarded(tmp_path):
+    path = str(tmp_path / "orders.journal")
+    journal = OrderJournal(path)
+    journal.append([order("AAA", "BUY", 1)])
+    journal.close()
+    with open(path, "ab") as handle:
+        handle.write(b"\x01\x02\x03")
+    journal = OrderJournal(path)
+    assert journal.written == 1
+    journal.append([order("AAA", "BUY", 1)])
+    journal.close()
+    assert rebuild_positions(read_journal(path)) == {"AAA": 2}
+
+
+def test_read_range_uses_index(tmp_path):
+    path = str(tmp_path / "orders.journal")
+    journal = OrderJournal(path, index_stride=4)
+    for i in range(10):
+        journal.append([order(f"S{i}", "BUY", 1) for _ in range(3)])
+    journal.close()
+    records = read_journal(path)
+    start, end = int(records["ts_ns"][9]), int(records["ts_ns"][21])
+    selected = read_range(path, start, end)
+    expected = records[(records["ts_ns"] >= start) & (records["ts_ns"] < end)]
+    assert np.array_equal(selected, expected)
+    assert os.path.getsize(f"{path}.idx") == 8 * 16
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "not-a-journal"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(JournalError):
+        read_journal(str(path))
@@ -4,7 +4,16 @@ import threading
 import time
 
 from config import MESSAGE_DELIMITER
+from framing import FrameReader
+from order_journal import read_journal, rebuild_positions
 from order_manager import OrderManagerServer
+from protocol import (
+    FRAME_KIND_ACKS,
+    ORDER_HELLO,
+    decode_acks,
+    encode_order,
+    encode_symbol_frame,
+)
 
 
 def test_order_manager_receives_orders():
@@ -39,3 +48,130 @@ def test_order_manager_receives_orders():
         server.stop()
         thread.join(timeout=1)
     assert [order["symbol"] for order in received] == ["AAA", "BBB"]
+
+
+def test_order_manager_accepts_negotiated_binary_orders(tmp_path):
+    received = []
+    journal_path = str(tmp_path / "orders.journal")
+    server = OrderManagerServer(
+        host="127.0.0.1", port=0, on_order=received.append, journal_path=journal_path
+    )
+    port = server.server.getsockname()[1]
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        time.sleep(0.05)
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            # Hello, directory and orders arrive in a single segment.
+            sock.sendall(
+                ORDER_HELLO
+                + encode_symbol_frame(["AAA", "BBB"])
+                + encode_order(1, "SELL", 8, 99.5, 30, 2_000_015_000_000, 2_000_000_000_000)
+                + encode_order(0, "BUY", 5, 101.0, None, 2_000_020_000_000, 2_000_000_000_000)
+            )
+        time.sleep(0.1)
+    finally:
+        server.stop()
+        thread.join(timeout=1)
+    assert [(order["symbol"], order["side"], order["price"]) for order in received] == [
+        ("BBB", "SELL", 99.5),
+        ("AAA", "BUY", 101.0),
+    ]
+    assert received[0]["sentiment"] == 30 and received[1]["sentiment"] is None
+    assert received[0]["latency_ms"] == 15.0
+    records = read_journal(journal_path)
+    assert rebuild_positions(records) == {"AAA": 5, "BBB": -8}
+    # Journal decision times are wall clock, like the receive times.
+    assert (abs(records["order_ts_ns"] - records["ts_ns"]) < 5_000_000_000).all()
+
+
+def test_order_manager_multiplexes_clients_on_one_thread():
+    received = []
+    server = OrderManagerServer(host="127.0.0.1", port=0, on_order=received.append)
+    port = server.server.getsockname()[1]
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    time.sleep(0.05)
+    threads_before = threading.active_count()
+    clients = [socket.create_connection(("127.0.0.1", port)) for _ in range(20)]
+    try:
+        for i, sock in enumerate(clients):
+            sock.sendall(json.dumps({"symbol": f"S{i}"}).encode() + MESSAGE_DELIMITER)
+        time.sleep(0.1)
+        assert threading.active_count() == threads_before
+    finally:
+        for sock in clients:
+            sock.close()
+        started = time.perf_counter()
+        server.stop()
+        thread.join(timeout=1)
+    assert not thread.is_alive()
+    assert time.perf_counter() - started < 0.5
+    assert sorted(order["symbol"] for order in received) == sorted(f"S{i}" for i in range(20))
+
+
+def test_order_manager_drop_policy_counts_shed_orders():
+    server = OrderManagerServer(host="127.0.0.1", port=0, queue_size=1, policy="drop")
+    try:
+        server._enqueue(None, 0, [(None, b"{}")])
+        server._enqueue(None, 0, [(None, b"{}"), (None, b"{}")])
+        assert server.stats()["queued"] == 1
+        assert server.stats()["dropped"] == 2
+    finally:
+        server.stop()
+        server.server.close()
+
+
+def _send_orders_without_reading(port, count):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # A small receive window so the acks back up into the OrderManager.
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.connect(("127.0.0.1", port))
+    sock.sendall(ORDER_HELLO + encode_symbol_frame(["AAA"]))
+    for start in range(0, count, 500):
+        sock.sendall(
+            b"".join(encode_order(0, "BUY", 1, 10.0, None, ts, ts) for ts in range(start, start + 500))
+        )
+    return sock
+
+
+def test_order_manager_queues_acks_for_a_slow_reader():
+    server = OrderManagerServer(host="127.0.0.1", port=0)
+    port = server.server.getsockname()[1]
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    acks = []
+    try:
+        with _send_orders_without_reading(port, 20_000) as sock:
+            time.sleep(0.2)
+            sock.settimeout(2)
+            reader = FrameReader()
+            while sum(map(len, acks)) < 20_000:
+                assert reader.recv(sock)
+                for kind, _, payload in reader.frames():
+                    if kind == FRAME_KIND_ACKS:
+                        acks.append(decode_acks(payload).copy())
+    finally:
+        server.stop()
+        thread.join(timeout=1)
+    counters = server.metrics.snapshot()
+    order_ts = [int(ts) for batch in acks for ts in batch["order_ts_ns"]]
+    assert order_ts == list(range(20_000))
+    assert counters["acks_total"] == 20_000 and counters["acks_dropped_total"] == 0
+
+
+def test_order_manager_counts_acks_beyond_the_buffer_limit():
+    server = OrderManagerServer(host="127.0.0.1", port=0, ack_buffer_bytes=0)
+    port = server.server.getsockname()[1]
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        with _send_orders_without_reading(port, 1_000):
+            deadline = time.monotonic() + 2
+            while server.processed < 1_000 and time.monotonic() < deadline:
+                time.sleep(0.01)
+    finally:
+        server.stop()
+        thread.join(timeout=1)
+    counters = server.metrics.snapshot()
+    assert counters["acks_total"] == 0 and counters["acks_dropped_total"] == 1_000
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+from config import MESSAGE_DELIMITER
+from order_manager import OrderManagerServer
+from order_sender import OrderSender
+from protocol import ORDER_PROTOCOL_BINARY, encode_order
+from strategy import order_handshake
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_flush_coalesces_cycle_into_one_write():
+    received = []
+    server = OrderManagerServer(host="127.0.0.1", port=0, on_order=received.append)
+    port = server.server.getsockname()[1]
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    sender = OrderSender("127.0.0.1", port, name="Test").start()
+    try:
+        assert wait_for(lambda: sender.connected)
+        for i in range(200):
+            order = {"symbol": f"S{i}", "side": "BUY", "quantity": 1, "price": 1.0}
+            sender.submit(json.dumps(order).encode() + MESSAGE_DELIMITER)
+        assert sender.stats()["sent"] == 0, "submit alone must not send"
+        sender.flush()
+        assert wait_for(lambda: len(received) == 200)
+        assert sender.stats()["writes"] == 1
+    finally:
+        sender.stop()
+        server.stop()
+        thread.join(timeout=1)
+    assert [order["symbol"] for order in received] == [f"S{i}" for i in range(200)]
+
+
+def test_pending_orders_are_bounded_while_disconnected():
+    sender = OrderSender("127.0.0.1", 1, name="Test", max_pending=3)
+    for i in range(5):
+        sender.submit(str(i).encode())
+    sender.flush()
+    assert sender.stats() == {"sent": 0, "writes": 0, "queued": 3, "dropped": 2, "acked": 0}
+    assert sender._pending == [b"2", b"3", b"4"]
+
+
+class _FailingSocket:
+    """Accepts ``budget`` bytes in small sends, then fails."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.data = b""
+
+    def send(self, data):
+        if not self.budget:
+            raise ConnectionResetError
+        count = min(len(data), self.budget, 4)
+        self.data += bytes(data[:count])
+        self.budget -= count
+        return count
+
+    def close(self):
+        pass
+
+
+def test_failed_write_requeues_only_unwritten_orders():
+    sender = OrderSender("127.0.0.1", 1, name="Test")
+    sock = _FailingSocket(budget=12)
+    sender.sock = sock
+    sender._pending = [b"later"]
+    sender._write([b"first*", b"second*", b"third*"])
+
+    assert sock.data == b"first*second"
+    assert sender._pending == [b"second*", b"third*", b"later"]
+    assert sender.stats()["sent"] == 1
+    assert not sender.connected
+
+
+def test_binary_orders_are_acknowledged():
+    acks = []
+    server = OrderManagerServer(host="127.0.0.1", port=0)
+    port = server.server.getsockname()[1]
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    handshake = order_handshake(["AAA", "BBB"], ORDER_PROTOCOL_BINARY)
+    sender = OrderSender("127.0.0.1", port, name="Test", handshake=handshake, on_ack=acks.append)
+    sender.start()
+    try:
+        assert wait_for(lambda: sender.connected)
+        for ts_ns in (1, 2, 3):
+            sender.submit(encode_order(ts_ns % 2, "BUY", 1, 10.0, None, ts_ns, ts_ns))
+        sender.flush()
+        assert wait_for(lambda: sender.stats()["acked"] == 3)
+    finally:
+        sender.stop()
+        server.stop()
+        thread.join(timeout=1)
+    acked = np.concatenate(acks)
+    assert sorted(acked["order_ts_ns"]) == [1, 2, 3]
+    assert (acked["ack_ns"] >= acked["recv_ns"]).all()
@@ -0,0 +1,75 @@
+import pytest
+
+from protocol import (
+    ACK_RECORD,
+    FRAME_HEADER,
+    FRAME_KIND_ACKS,
+    FRAME_KIND_ORDERS,
+    FRAME_KIND_PRICES,
+    FRAME_KIND_SYMBOLS,
+    ORDER_RECORD,
+    PRICE_RECORD,
+    ProtocolError,
+    decode_acks,
+    decode_frame_header,
+    decode_orders,
+    decode_price_records,
+    decode_symbols,
+    encode_ack_frame,
+    encode_order,
+    encode_price_frame,
+    encode_symbol_frame,
+)
+
+
+def test_price_frame_round_trip():
+    frame = encode_price_frame([0, 2], [101.5, 99.25], 1234, origin_ns=5678)
+    kind, count, length = decode_frame_header(frame)
+    assert (kind, count) == (FRAME_KIND_PRICES, 2)
+
+    payload = frame[FRAME_HEADER.size : FRAME_HEADER.size + length]
+    records = decode_price_records(payload)
+    assert records["symbol_id"].tolist() == [0, 2]
+    assert records["price"].tolist() == [101.5, 99.25]
+    assert list(PRICE_RECORD.iter_unpack(payload))[1] == (2, 99.25, 1234, 5678)
+
+
+def test_symbol_frame_round_trip_and_bad_magic():
+    frame = encode_symbol_frame(["AAA", "BBB"])
+    kind, count, length = decode_frame_header(frame)
+    assert kind == FRAME_KIND_SYMBOLS
+    assert decode_symbols(frame[FRAME_HEADER.size :], count) == ["AAA", "BBB"]
+
+    with pytest.raises(ProtocolError):
+        decode_frame_header(b"\x00" * FRAME_HEADER.size)
+
+
+def test_order_frame_round_trip():
+    frame = encode_order(
+        1, "BUY", 10, 123.4567, 72, 5_002_500_000, 5_000_000_000, 1_700_000_000_500_000_000
+    )
+    kind, count, length = decode_frame_header(frame)
+    assert (kind, count, length) == (FRAME_KIND_ORDERS, 1, ORDER_RECORD.size)
+    payload = frame[FRAME_HEADER.size :]
+    (order,) = decode_orders(payload, ["AAA", "BBB"])
+    assert order == {
+        "symbol": "BBB",
+        "side": "BUY",
+        "quantity": 10,
+        "price": 123.4567,
+        "sentiment": 72,
+        "timestamp": 1_700_000_000.5,
+        "latency_ms": 2.5,
+        "ts_ns": 5_002_500_000,
+        "origin_ns": 5_000_000_000,
+    }
+    with pytest.raises(ProtocolError):
+        decode_orders(payload, ["AAA"])
+
+
+def test_ack_frame_round_trip():
+    frame = encode_ack_frame([3, 1], [10, 20], 30, 40)
+    kind, count, length = decode_frame_header(frame)
+    assert (kind, count, length) == (FRAME_KIND_ACKS, 2, 2 * ACK_RECORD.size)
+    acks = decode_acks(frame[FRAME_HEADER.size :])
+    assert acks.tolist() == [(3, 10, 30, 40), (1, 20, 30, 40)]
@@ -0,0 +1,126 @@
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from config import GATEWAY_FANOUT_MODE, MESSAGE_DELIMITER
+from gateway import GatewayServer
+from protocol import BINARY_HELLO, FRAME_HEADER, decode_frame_header, decode_price_records
+from replay import TickReplaySource, load_ticks
+
+CSV = """timestamp,symbol,price
+2024-01-02T09:30:00.000,MSFT,370.1
+2024-01-02T09:30:00.000,AAPL,185.2
+2024-01-02T09:30:00.010,AAPL,185.3
+2024-01-02T09:30:00.005,MSFT,370.0
+"""
+
+
+def _write_csv(tmp_path):
+    path = tmp_path / "ticks.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_load_ticks_builds_sorted_memory_mapped_cache(tmp_path):
+    path = _write_csv(tmp_path)
+    symbols, ticks = load_ticks(path)
+
+    assert symbols == ["AAPL", "MSFT"]
+    assert all(isinstance(column, np.memmap) for column in ticks.values())
+    assert ticks["price"].tolist() == [370.1, 185.2, 370.0, 185.3]
+    assert ticks["symbol_id"].tolist() == [1, 0, 1, 0]
+    assert np.all(np.diff(ticks["ts_ns"]) >= 0)
+    for name in ("ts_ns", "symbol_id", "price"):
+        assert os.path.exists(f"{path}.{name}.npy")
+
+    _, cached = load_ticks(path)
+    for name, column in ticks.items():
+        assert (cached[name] == column).all()
+
+
+def test_replay_batches_fast_and_paced(tmp_path):
+    path = _write_csv(tmp_path)
+    fast = TickReplaySource(path, speed=0, max_batch=3)
+    assert [len(ids) for ids, _, _ in fast.batches()] == [3, 1]
+    assert fast.sent == 4 and fast.throughput > 0
+
+    paced = TickReplaySource(path, speed=1.0)
+    start = time.perf_counter()
+    sizes = [len(ids) for ids, _, _ in paced.batches()]
+    assert time.perf_counter() - start >= 0.009
+    assert sum(sizes) == 4 and sizes[0] == 2
+
+
+def test_gateway_replays_file_to_text_subscriber(tmp_path):
+    source = TickReplaySource(_write_csv(tmp_path), speed=0)
+    server = GatewayServer(
+        host="127.0.0.1", price_port=0, news_port=0, symbols=source.symbols, fanout="direct"
+    )
+    try:
+        server.price_accept_thread.start()
+        port = server.price_server.getsockname()[1]
+        with socket.create_connection(("127.0.0.1", port)) as client:
+            client.settimeout(1)
+            thread = threading.Thread(target=server.replay, args=(source,), daemon=True)
+            thread.start()
+            thread.join(timeout=2)
+            data = b""
+            while data.count(MESSAGE_DELIMITER) < 4:
+                data += client.recv(1024)
+        assert data.split(MESSAGE_DELIMITER)[:4] == [
+            b"MSFT,370.10",
+            b"AAPL,185.20",
+            b"MSFT,370.00",
+            b"AAPL,185.30",
+        ]
+    finally:
+        server.stop()
+
+
+def _recv_exact(sock, size):
+    data = b""
+    while len(data) < size:
+        data += sock.recv(size - len(data))
+    return data
+
+
+def test_gateway_replay_keeps_every_tick_with_default_fanout(tmp_path):
+    # One batch repeats both symbols; conflation must not merge those ticks.
+    source = TickReplaySource(_write_csv(tmp_path), speed=0)
+    server = GatewayServer(host="127.0.0.1", price_port=0, news_port=0, symbols=source.symbols)
+    assert server.fanout == GATEWAY_FANOUT_MODE == "conflate"
+    try:
+        server.price_accept_thread.start()
+        port = server.price_server.getsockname()[1]
+        with socket.create_connection(("127.0.0.1", port)) as text, socket.create_connection(
+            ("127.0.0.1", port)
+        ) as binary:
+            text.settimeout(1)
+            binary.settimeout(1)
+            binary.sendall(BINARY_HELLO)
+            _, _, length = decode_frame_header(_recv_exact(binary, FRAME_HEADER.size))
+            _recv_exact(binary, length)  # symbol directory
+            thread = threading.Thread(target=server.replay, args=(source, 2), daemon=True)
+            thread.start()
+            thread.join(timeout=2)
+
+            data = b""
+            while data.count(MESSAGE_DELIMITER) < 4:
+                data += text.recv(1024)
+            _, count, length = decode_frame_header(_recv_exact(binary, FRAME_HEADER.size))
+            records = decode_price_records(_recv_exact(binary, length))
+        assert data.split(MESSAGE_DELIMITER)[:4] == [
+            b"MSFT,370.10",
+            b"AAPL,185.20",
+            b"MSFT,370.00",
+            b"AAPL,185.30",
+        ]
+        assert count == 4
+        assert records["symbol_id"].tolist() == [1, 0, 1, 0]
+        assert records["price"].tolist() == [370.1, 185.2, 370.0, 185.3]
+        assert (np.diff(records["ts_ns"]) >= 0).all()
+    finally:
+        server.stop()
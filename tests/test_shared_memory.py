@@ -1,6 +1,11 @@
 import math
+import multiprocessing as mp
+import select
 
-from shared_memory_utils import SharedPriceBook
+import numpy as np
+import pytest
+
+from shared_memory_utils import SharedDoorbell, SharedPriceBook, SharedTickRing
 
 
 def test_shared_memory_update_and_read():
@@ -18,3 +23,201 @@ def test_shared_memory_update_and_read():
         book.close()
         book.unlink()
 
+
+def test_shared_memory_seqlock_counters_stay_even():
+    book = SharedPriceBook(
+        symbols=["AAA", "BBB"], name="test_price_book_seq", create=True, force_recreate=True
+    )
+    reader = SharedPriceBook(symbols=["AAA", "BBB"], name="test_price_book_seq")
+    try:
+        for price in (1.0, 2.0, 3.0):
+            book.update("AAA", price)
+
+        assert book._seq.tolist() == [6, 0]
+        assert reader.read("AAA") == 3.0
+        assert math.isnan(reader.snapshot()["BBB"])
+    finally:
+        reader.close()
+        book.close()
+        book.unlink()
+
+
+def test_shared_memory_records_and_column_views():
+    book = SharedPriceBook(
+        symbols=["AAA", "BBB"], name="test_price_book_rec", create=True, force_recreate=True
+    )
+    try:
+        last = book.last
+        book.update("BBB", 50.5, bid=50.4, ask=50.6, size=300, ts_ns=123)
+
+        assert last[1] == 50.5, "column views must alias the shared segment"
+        records = book.read_records()
+        assert records["bid"][1] == 50.4
+        assert records["ask"][1] == 50.6
+        assert records["size"][1] == 300
+        assert records["ts_ns"][1] == 123
+        assert records["seq"].tolist() == [0, 2]
+        assert math.isnan(records["bid"][0])
+    finally:
+        book.close()
+        book.unlink()
+
+
+def test_price_book_grows_and_readers_remap_live():
+    book = SharedPriceBook(
+        symbols=["AAA", "BBB"], name="test_price_book_grow", create=True, force_recreate=True
+    )
+    reader = SharedPriceBook(name="test_price_book_grow")
+    try:
+        assert reader.symbols == ["AAA", "BBB"] and reader.capacity == 2
+        book.update("AAA", 10.0)
+        book.update("BBB", 20.0)
+        rows = book.add_symbols(["CCC", "AAA"])
+        assert rows.tolist() == [2, 0]
+        assert book.generation == 1 and book.capacity == 4
+        book.update("CCC", 30.0)
+
+        # Rows survive the copy, so ids the reader already holds stay valid.
+        assert reader.snapshot() == {"AAA": 10.0, "BBB": 20.0, "CCC": 30.0}
+        assert reader.generation == 1 and reader._index["CCC"] == 2
+
+        book.add_symbols(["DDD", "EEE", "FFF"])
+        book.remove_symbols(["BBB"])
+        assert book.generation == 2
+        assert set(reader.snapshot()) == {"AAA", "CCC", "DDD", "EEE", "FFF"}
+        assert math.isnan(reader.read("BBB"))
+
+        book.add_symbols(["BBB"])
+        assert book._index["BBB"] == 1 and "BBB" in reader.snapshot()
+        late = SharedPriceBook(name="test_price_book_grow")
+        assert late.symbols == book.symbols and late.read("AAA") == 10.0
+        late.close()
+    finally:
+        reader.close()
+        book.close()
+        book.unlink()
+
+
+def test_tick_ring_consumers_keep_independent_cursors():
+    ring = SharedTickRing("test_tick_ring", capacity=8, create=True, force_recreate=True)
+    first = SharedTickRing("test_tick_ring")
+    second = SharedTickRing("test_tick_ring")
+    try:
+        ring.publish(0, 10.0, 1)
+        ring.publish(1, 20.0, 2)
+        assert first.read()["price"].tolist() == [10.0, 20.0]
+
+        ring.publish_many(np.array([0, 1]), np.array([11.0, 21.0]), np.array([3, 4]))
+        assert first.read()["symbol_id"].tolist() == [0, 1]
+        assert second.read()["price"].tolist() == [10.0, 20.0, 11.0, 21.0]
+        assert len(second.read()) == 0
+        assert first.received == second.received == 4
+    finally:
+        second.close()
+        first.close()
+        ring.close()
+        ring.unlink()
+
+
+def test_tick_ring_reports_overrun_for_lagging_consumer():
+    ring = SharedTickRing("test_tick_ring_overrun", capacity=4, create=True, force_recreate=True)
+    reader = SharedTickRing("test_tick_ring_overrun")
+    try:
+        count = 10
+        ring.publish_many(
+            np.zeros(count, dtype=np.int64),
+            np.arange(count, dtype=np.float64),
+            np.arange(count, dtype=np.int64),
+        )
+        ticks = reader.read()
+
+        assert ticks["price"].tolist() == [6.0, 7.0, 8.0, 9.0]
+        assert reader.overruns == 1
+        assert reader.lost == 6
+    finally:
+        reader.close()
+        ring.close()
+        ring.unlink()
+
+
+def test_doorbell_wakes_subscribers():
+    producer = SharedDoorbell("test_doorbell", slots=4, create=True, force_recreate=True)
+    subscriber = SharedDoorbell("test_doorbell")
+    try:
+        sock = subscriber.subscribe()
+        producer.ring()
+
+        readable, _, _ = select.select([sock], [], [], 1.0)
+        assert readable == [sock]
+        assert subscriber.drain() == 1
+        assert subscriber.drain() == 0
+
+        subscriber.close()
+        assert not producer._ports.any(), "closing must release the subscriber slot"
+    finally:
+        producer.close()
+        producer.unlink()
+
+
+def _subscribe_and_hold(name, lock, start, ready, done):
+    doorbell = SharedDoorbell(name, lock=lock)
+    start.wait()
+    doorbell.subscribe()
+    ready.put(doorbell.socket.getsockname()[1])
+    done.wait()
+    doorbell.close()
+
+
+def test_doorbell_concurrent_subscribers_claim_distinct_slots():
+    ctx = mp.get_context("spawn")
+    producer = SharedDoorbell("test_doorbell_race", slots=4, create=True, force_recreate=True)
+    lock, start, done, ready = ctx.Lock(), ctx.Event(), ctx.Event(), ctx.Queue()
+    workers = [
+        ctx.Process(target=_subscribe_and_hold, args=("test_doorbell_race", lock, start, ready, done))
+        for _ in range(2)
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        start.set()
+        ports = {ready.get(timeout=10) for _ in workers}
+        assert len(ports) == 2
+        assert set(producer._ports[producer._ports != 0].tolist()) == ports
+        done.set()
+        for worker in workers:
+            worker.join(timeout=10)
+        assert not producer._ports.any()
+    finally:
+        done.set()
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        producer.close()
+        producer.unlink()
+
+
+def test_doorbell_reclaims_stale_slot_and_close_keeps_reclaimed_slot():
+    producer = SharedDoorbell("test_doorbell_stale", slots=1, create=True, force_recreate=True)
+    crashed = SharedDoorbell("test_doorbell_stale")
+    fresh = SharedDoorbell("test_doorbell_stale")
+    try:
+        crashed.subscribe()
+        # Simulate a process that died without close(): its port is unbound.
+        crashed.socket.close()
+        sock = fresh.subscribe()
+        assert producer._ports.tolist() == [sock.getsockname()[1]]
+
+        crashed.close()
+        assert producer._ports.tolist() == [sock.getsockname()[1]]
+
+        # A live subscriber's slot is never reclaimed.
+        blocker = SharedDoorbell("test_doorbell_stale")
+        try:
+            with pytest.raises(RuntimeError):
+                blocker.subscribe()
+        finally:
+            blocker.close()
+    finally:
+        fresh.close()
+        producer.close()
+        producer.unlink()
@@ -1,7 +1,10 @@
-from collections import deque
+import numpy as np
 
 from config import LONG_WINDOW, SHORT_WINDOW
-from strategy import StrategyEngine
+from indicators import SIGNAL_BUY, SIGNAL_SELL
+from protocol import FRAME_HEADER, decode_orders
+from shared_memory_utils import PRICE_RECORD_DTYPE
+from strategy import StrategyEngine, partition_symbols
 
 TEST_SYMBOLS = ["AAA", "BBB"]
 
@@ -32,19 +35,16 @@ def build_engine():
 
 def test_price_signal_buy():
     engine = build_engine()
-    history = deque(maxlen=LONG_WINDOW)
-    base = 100.0
-    for i in range(LONG_WINDOW):
-        history.append(base + i * 0.1)
-    assert engine._price_signal(history) == "BUY"
+    signals = [engine.indicators.update(0, 100.0 + i * 0.1) for i in range(LONG_WINDOW)]
+    assert signals[-1] == SIGNAL_BUY
+    assert SIGNAL_BUY not in signals[:-1], "no signal before the long window fills"
 
 
 def test_price_signal_sell():
     engine = build_engine()
-    history = deque(maxlen=LONG_WINDOW)
     for i in range(LONG_WINDOW):
-        history.append(100.0 - i * 0.1)
-    assert engine._price_signal(history) == "SELL"
+        signals = engine.indicators.update_many(np.arange(2), np.full(2, 100.0 - i * 0.1))
+    assert signals.tolist() == [SIGNAL_SELL, SIGNAL_SELL]
 
 
 def test_maybe_trade_requires_matching_signals():
@@ -52,18 +52,112 @@ def test_maybe_trade_requires_matching_signals():
     symbol = TEST_SYMBOLS[0]
     engine.latest_sentiment = 80  # BUY news signal
     engine.order_socket = DummySocket()
-    engine.positions[symbol] = None
-    engine._maybe_trade(symbol, 123.45, price_signal="BUY", price_timestamp=0.0)
+    engine._maybe_trade(0, 123.45, price_signal="BUY", price_timestamp=0.0)
     assert engine.positions[symbol] == "LONG"
     assert engine.order_socket.payloads, "Order should be sent when signals match"
 
 
+def test_binary_orders_carry_the_engine_row_as_symbol_id():
+    engine = build_engine()
+    engine.order_protocol = "binary"
+    engine.latest_sentiment = 20  # SELL news signal
+    engine.order_socket = DummySocket()
+    engine._maybe_trade(1, 99.5, price_signal="SELL", price_timestamp=0.0)
+    engine._maybe_trade(1, 99.0, price_signal="SELL", price_timestamp=0.0)
+
+    (payload,) = engine.order_socket.payloads
+    (order,) = decode_orders(payload[FRAME_HEADER.size :], TEST_SYMBOLS)
+    assert (order["symbol"], order["side"], order["price"]) == ("BBB", "SELL", 99.5)
+    assert engine.positions == {"AAA": None, "BBB": "SHORT"}
+
+
 def test_maybe_trade_no_trade_on_mismatch():
     engine = build_engine()
     symbol = TEST_SYMBOLS[0]
     engine.latest_sentiment = 20  # SELL news signal
     engine.order_socket = DummySocket()
-    engine.positions[symbol] = None
-    engine._maybe_trade(symbol, 120.0, price_signal="BUY", price_timestamp=0.0)
+    engine._maybe_trade(0, 120.0, price_signal="BUY", price_timestamp=0.0)
     assert engine.positions[symbol] is None
     assert not engine.order_socket.payloads
+
+
+class RecordsPriceBook:
+    """Price book stand-in exposing the structured records the batch path reads."""
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.records = np.zeros(len(self.symbols), dtype=PRICE_RECORD_DTYPE)
+        self.records["last"] = np.nan
+
+    def tick(self, prices):
+        self.records["last"] = prices
+        self.records["seq"] += 2
+
+    def read_records(self):
+        return self.records.copy()
+
+
+def test_process_prices_batches_orders_for_agreeing_symbols():
+    book = RecordsPriceBook(["CCC"] + TEST_SYMBOLS)
+    engine = StrategyEngine(
+        price_book=book,
+        lock=None,
+        host="127.0.0.1",
+        news_port=6001,
+        order_port=6002,
+        symbols=TEST_SYMBOLS,
+    )
+    engine.latest_sentiment = 80  # BUY news signal
+    engine.order_socket = DummySocket()
+    for i in range(LONG_WINDOW):
+        # AAA trends up, BBB trends down, CCC is not traded by this engine.
+        book.tick([100.0 + i, 100.0 + i, 100.0 - i])
+        engine._process_prices()
+    assert engine.positions == {"AAA": "LONG", "BBB": None}
+    assert len(engine.order_socket.payloads) == 1
+    book.tick([200.0, 200.0, 50.0])
+    engine._process_prices()
+    assert len(engine.order_socket.payloads) == 1
+
+
+def test_checkpoint_restores_state_by_symbol_name(tmp_path):
+    book = RecordsPriceBook(TEST_SYMBOLS)
+    engine = StrategyEngine(
+        price_book=book,
+        lock=None,
+        host="127.0.0.1",
+        news_port=6001,
+        order_port=6002,
+        symbols=TEST_SYMBOLS,
+    )
+    engine.latest_sentiment = 80
+    engine.order_socket = DummySocket()
+    for i in range(LONG_WINDOW):
+        book.tick([100.0 + i, 100.0 - i])
+        engine._process_prices()
+    path = str(tmp_path / "state" / "strategy.npz")
+    engine.checkpoint(path)
+
+    restored = StrategyEngine(
+        price_book=book,
+        lock=None,
+        host="127.0.0.1",
+        news_port=6001,
+        order_port=6002,
+        symbols=["AAA", "ZZZ"],
+    )
+    assert restored.restore(path) == 1
+    assert restored.positions == {"AAA": "LONG", "ZZZ": None}
+    assert restored.latest_sentiment == 80
+    assert restored.indicators.long_mean(0) == engine.indicators.long_mean(0)
+    assert restored.indicators.filled[1] == 0
+
+
+def test_partition_symbols_is_disjoint_and_deterministic():
+    symbols = [f"SYM{i}" for i in range(50)]
+    for mode in ("hash", "range"):
+        parts = partition_symbols(symbols, 4, mode)
+        assert len(parts) == 4
+        assert sorted(sum(parts, [])) == sorted(symbols)
+        assert parts == partition_symbols(symbols, 4, mode)
+    assert partition_symbols(symbols, 4, "range")[0] == symbols[:12]